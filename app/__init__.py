@@ -1,9 +1,36 @@
 from flask import Flask
+import logging
+import multiprocessing
 import os
 
 app = Flask(__name__)
 
+# Log level for the app's own loggers, e.g. LINGDB_LOG_LEVEL=DEBUG.
+# Defaults to WARNING so that nothing is written to the console on the hot path.
+logging.basicConfig(format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+logging.getLogger(__name__).setLevel(os.environ.get("LINGDB_LOG_LEVEL", "WARNING").upper())
+
+# Regenerate front.html, survey.html and their static files on startup (e.g.
+# after editing data/selectors.py). Only files whose content changed are written.
+# Meant for development: deployments should run `python -m gen` once, before
+# starting the app. Job workers (see app/jobs.py) import the app too, but
+# leave building to the process that started them.
+if os.environ.get("LINGDB_GENERATE") and multiprocessing.parent_process() is None:
+    import gen
+    gen.build()
+
 # Application errors (in production)
 # if not app.debug:
 
-from . import routes#, errors
+from . import assets, compression, metrics, routes#, errors
+
+# Record dataset loads and reloads (see data/datasets.py) in the metrics
+from data import datasets
+datasets.addLoadListener(metrics.recordLoad)
+datasets.addReloadListener(metrics.recordReload)
+
+# Cache query responses in-process, for deployments without a caching reverse
+# proxy in front of the app (see app/httpcache.py)
+if os.environ.get("LINGDB_HTTP_CACHE"):
+    from . import httpcache
+    app.wsgi_app = httpcache.CachingMiddleware(app.wsgi_app)
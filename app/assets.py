@@ -0,0 +1,73 @@
+"""Serve the generated static assets under content-hashed names.
+
+gen/allgen.py writes some static files (e.g. js/selectors_const.js) under names
+that include a hash of their content, such as js/selectors_const.0123456789.js,
+and records the actual names in app/static/assets.json. Templates refer to them
+with assetURL('js/selectors_const.js'), which resolves to the current name.
+
+Since a hashed file's content never changes (a new version gets a new name),
+browsers and proxies may cache it for a year without revalidating. The same goes
+for the popover fragments in static/popovers/, which are named the same way.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+
+from flask import request, url_for
+
+from . import app
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = os.path.join(app.static_folder, "assets.json")
+
+# How long (in seconds) hashed assets may be cached for: one year, the most
+# that HTTP/1.1 caches are expected to honor
+MAX_AGE = 365 * 24 * 60 * 60
+
+# Matches the name of a content-hashed static file, e.g. "foo.0123456789.js"
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+
+# The manifest, as (asset name -> hashed name, (mtime, size) of the file)
+manifest = ({}, None)
+manifestLock = threading.Lock()
+
+def getManifest() -> dict:
+    """Return the asset manifest, rereading it if it has been regenerated."""
+    global manifest
+    try:
+        stat = os.stat(MANIFEST_PATH)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return {}
+
+    names, loadedVersion = manifest
+    if version != loadedVersion:
+        with manifestLock:
+            with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                names = json.load(f)
+            manifest = (names, version)
+        logger.info("loaded %d asset names", len(names))
+    return names
+
+@app.template_global()
+def assetURL(name) -> str:
+    """Return the URL of the static file name (relative to app/static/),
+    under its content-hashed name if it has one."""
+    return url_for("static", filename=getManifest().get(name, name))
+
+def isHashedAsset(path) -> bool:
+    return path.startswith(app.static_url_path + "/") and HASHED_NAME.search(path) is not None
+
+@app.after_request
+def cacheHashedAssets(response):
+    """Let hashed assets be cached (and reused without revalidating) for a year."""
+    if response.status_code in (200, 304) and isHashedAsset(request.path):
+        response.cache_control.public = True
+        response.cache_control.max_age = MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
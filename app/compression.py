@@ -0,0 +1,156 @@
+"""Compress responses (query results and static assets alike) for clients
+that accept it.
+
+Brotli is used when the brotli package is installed and the client accepts it,
+and gzip otherwise. Query responses are mostly repetitive HTML, and shrink by
+roughly an order of magnitude either way.
+
+Compressed responses get their own ETags (the original tag plus e.g. "-gzip"),
+since a strong ETag must identify the exact bytes sent. Use etagVariants() to
+check an If-None-Match header against every encoding of a tag. Static files
+are revalidated here for the same reason (Flask's own check only knows the
+uncompressed tag), and their compressed bytes are cached, by file, mtime and
+encoding.
+"""
+
+import functools
+import gzip
+import os
+from typing import Optional
+
+from flask import request
+from werkzeug.security import safe_join
+
+from . import app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this (in bytes) aren't worth compressing
+MIN_SIZE = 500
+
+# Compression levels: a little below the maximum, which is much slower for
+# very little gain
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# The Content-Types to compress. Images (other than SVG) are already compressed.
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+# How many compressed static files (in each encoding) to keep in memory
+STATIC_CACHE_SIZE = 256
+
+GZIP = "gzip"
+BROTLI = "br"
+
+def supportedEncodings() -> list:
+    """Return the encodings we can produce, most preferred first."""
+    return [BROTLI, GZIP] if brotli is not None else [GZIP]
+
+def negotiate(acceptEncoding) -> Optional[str]:
+    """Given an Accept-Encoding header value, return the encoding to compress
+    the response with, or None to send it uncompressed."""
+    weights = {}
+    for item in (acceptEncoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, bestWeight = None, 0.0
+    for encoding in supportedEncodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > bestWeight:
+            best, bestWeight = encoding, weight
+    return best
+
+def compress(data: bytes, encoding) -> bytes:
+    if encoding == BROTLI:
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == GZIP:
+        # mtime=0 so that the same data always compresses to the same bytes
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+def etagVariants(tag) -> list:
+    """Return tag, followed by the tag of each compressed version of it."""
+    return [tag] + ["%s-%s" % (tag, encoding) for encoding in supportedEncodings()]
+
+@functools.lru_cache(maxsize=STATIC_CACHE_SIZE)
+def compressedFile(path, mtime, encoding) -> bytes:
+    """Return the compressed contents of the file at path. mtime is only part
+    of the cache key, so that changed files are compressed again."""
+    with open(path, "rb") as f:
+        return compress(f.read(), encoding)
+
+def staticPath() -> Optional[str]:
+    """Return the path of the static file the current request is for, or None
+    if it isn't for one."""
+    if request.endpoint != "static":
+        return None
+    return safe_join(app.static_folder, request.view_args.get("filename", ""))
+
+def notModified(response, tag):
+    """Turn response into a 304 Not Modified response tagged with tag."""
+    response.close()
+    response.status_code = 304
+    response.response = []
+    response.direct_passthrough = False
+    response.headers.pop("Content-Length", None)
+    response.set_etag(tag)
+    return response
+
+def isCompressible(response) -> bool:
+    return (response.status_code == 200
+            and "Content-Encoding" not in response.headers
+            and (response.mimetype or "").startswith(COMPRESSIBLE_TYPES))
+
+@app.after_request
+def compressResponse(response):
+    """Compress the response, if it is worth compressing and the client
+    accepts a supported encoding."""
+    if not isCompressible(response):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    tag, weak = response.get_etag()
+    path = staticPath()
+    if path is not None and tag:
+        # Flask compared If-None-Match with the uncompressed tag only
+        current = [t for t in etagVariants(tag) if request.if_none_match.contains(t)]
+        if current:
+            return notModified(response, current[0])
+
+    if path is not None and response.content_length is not None:
+        if response.content_length < MIN_SIZE:
+            return response
+        data = compressedFile(path, os.path.getmtime(path), encoding)
+        # Close the file that would have been streamed
+        response.close()
+        response.response = [data]
+        response.direct_passthrough = False
+        response.headers["Content-Length"] = str(len(data))
+    else:
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    # Byte ranges would refer to the uncompressed file
+    response.headers.pop("Accept-Ranges", None)
+    if tag:
+        response.set_etag("%s-%s" % (tag, encoding), weak=weak)
+    return response
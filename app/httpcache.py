@@ -0,0 +1,229 @@
+"""HTTP caching of query responses.
+
+A query's response depends only on its dataset (and the version of that
+dataset) and its payload, so every query also has a canonical GET URL,
+/q/<token>, where token is the URL-safe base64 encoding of
+
+    {"dataset": "F25", "payload": [...]}
+
+as JSON, with sorted keys and no whitespace (see encodeToken). Tokens that
+decode to the same query but aren't in this canonical form are redirected to
+the canonical URL, so that every cache sees one URL per query.
+
+The pages of long lists of matching languages (/matches/<token>?query=..) are
+cached the same way.
+
+Responses to /q/ URLs carry a strong ETag, derived from the dataset's content
+hash, the token and the render version (see renderVersion), and may be cached
+publicly for MAX_AGE seconds. After that a cache revalidates with
+If-None-Match, which is answered with 304 Not Modified (without running the
+query) unless the dataset has since been rebuilt, or a deploy has changed how
+responses are rendered.
+
+Any caching reverse proxy can then serve repeated queries without touching
+Python at all, e.g. with nginx:
+
+    proxy_cache_path /var/cache/lingdb keys_zone=lingdb:10m;
+
+    location /q/ {
+        proxy_pass http://127.0.0.1:8000;
+        proxy_cache lingdb;
+        proxy_cache_revalidate on;
+    }
+
+Where no such proxy is deployed (or to try this out locally), set
+LINGDB_HTTP_CACHE=1 to wrap the app in CachingMiddleware, a minimal in-process
+stand-in for one.
+"""
+
+import base64
+import binascii
+import functools
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import compression
+
+# The prefix of the canonical GET URL of every query
+PREFIX = "/q/"
+
+# The prefix of the URLs of the pages of each query's matching languages
+MATCHES_PREFIX = "/matches/"
+
+# How long (in seconds) caches may serve a query response without revalidating
+MAX_AGE = int(os.environ.get("LINGDB_QUERY_MAX_AGE", 300))
+
+# How many responses CachingMiddleware keeps
+MAX_ENTRIES = 1024
+
+# Bump to invalidate every cached response when their rendering changes in a
+# way that renderVersion() can't see (its source files are hashed already)
+RENDER_VERSION = 1
+
+# The packages whose source determines what a query's response looks like
+RENDER_PACKAGES = ("app", "data", "phonemes")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def encodeToken(dataset, payload) -> str:
+    """Return the canonical token for running payload (a list of query dicts,
+    as sent by the frontend) against dataset."""
+    query = {"dataset": dataset, "payload": payload}
+    data = json.dumps(query, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+def tokenFromForm(form) -> str:
+    """Return the canonical token for a POSTed query form."""
+    return encodeToken(form["dataset"], json.loads(form["payload"]))
+
+def decodeToken(token):
+    """Decode a token into (form, canonical token), where form has the same
+    fields as a POSTed query form. Raise a ValueError if the token is malformed."""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        query = json.loads(data.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError) as err:
+        raise ValueError(f"malformed query token: {err}")
+
+    if not isinstance(query, dict) or not isinstance(query.get("dataset"), str) \
+            or not isinstance(query.get("payload"), list):
+        raise ValueError("malformed query token: expected a dataset and a payload")
+
+    form = {"dataset": query["dataset"], "payload": json.dumps(query["payload"])}
+    return form, encodeToken(query["dataset"], query["payload"])
+
+def queryURL(token) -> str:
+    return PREFIX + token
+
+def matchesURL(token, query, cursor, limit=None) -> str:
+    """Return the URL of the page of the ith query's matching languages that
+    starts at cursor (see the /matches/ route), of limit languages (or by
+    default, responder.PAGE_SIZE)."""
+    url = "%s%s?query=%d&cursor=%d" % (MATCHES_PREFIX, token, query, cursor)
+    if limit is not None:
+        url += "&limit=%d" % limit
+    return url
+
+@functools.lru_cache(maxsize=None)
+def renderVersion() -> str:
+    """Return a hash of RENDER_VERSION, LINGDB_RENDER_VERSION (e.g. the
+    deployed commit), the settings that shape responses (the page size) and
+    the source of every module that renders them, so that ETags change with
+    each deploy that could change a response."""
+    from . import responder
+
+    settings = (RENDER_VERSION, os.environ.get("LINGDB_RENDER_VERSION", ""), responder.PAGE_SIZE)
+    digest = hashlib.sha1(repr(settings).encode("utf-8"))
+    for package in RENDER_PACKAGES:
+        for path in sorted(glob.glob(os.path.join(ROOT, package, "*.py"))):
+            digest.update(os.path.relpath(path, ROOT).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha1(f.read()).digest())
+    return digest.hexdigest()[:12]
+
+def etag(datasetVersion, token) -> str:
+    """Return the ETag of the response to the query token on the given version
+    (content hash) of its dataset, as rendered by this version of the app."""
+    key = "%s:%s:%s" % (datasetVersion, renderVersion(), token)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def maxAge(cacheControl):
+    """Return the max-age of a public Cache-Control header value, or None if
+    the response may not be cached by a shared cache."""
+    directives = {}
+    for directive in cacheControl.split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value
+    if "public" not in directives or "no-store" in directives or "private" in directives:
+        return None
+    try:
+        return int(directives.get("max-age", ""))
+    except ValueError:
+        return None
+
+class CachingMiddleware:
+    """A WSGI middleware that caches responses to GET /q/ (and /matches/)
+    requests, standing in for a caching reverse proxy. Fresh responses are
+    served (or answered with 304, if the client already has them) without
+    calling the app."""
+
+    def __init__(self, app, maxEntries=MAX_ENTRIES, clock=time.monotonic):
+        self.app = app
+        self.maxEntries = maxEntries
+        self.clock = clock
+        # (path, encoding) -> (status, headers, body, expiry time),
+        # least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[3] <= self.clock():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxEntries:
+                self.entries.popitem(last=False)
+
+    def fetch(self, environ):
+        """Call the app, and return its response as (status, headers, body)."""
+        # Always ask for the full response, so that it can be cached
+        environ = dict(environ)
+        environ.pop("HTTP_IF_NONE_MATCH", None)
+
+        response = {}
+        chunks = []
+        def startResponse(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = headers
+            return chunks.append
+
+        result = self.app(environ, startResponse)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], b"".join(chunks)
+
+    def __call__(self, environ, startResponse):
+        path = environ.get("PATH_INFO", "")
+        if environ.get("REQUEST_METHOD") != "GET" or not path.startswith((PREFIX, MATCHES_PREFIX)):
+            return self.app(environ, startResponse)
+        if environ.get("QUERY_STRING"):
+            path += "?" + environ["QUERY_STRING"]
+
+        # Responses vary by Accept-Encoding (see app/compression.py)
+        key = (path, compression.negotiate(environ.get("HTTP_ACCEPT_ENCODING")))
+        entry = self.lookup(key)
+        if entry is None:
+            status, headers, body = self.fetch(environ)
+            age = maxAge(dict(headers).get("Cache-Control", ""))
+            if not status.startswith("200") or not age:
+                startResponse(status, headers)
+                return [body]
+            entry = (status, headers, body, self.clock() + age)
+            self.store(key, entry)
+
+        status, headers, body, _ = entry
+        tag = dict(headers).get("ETag")
+        if tag and tag in environ.get("HTTP_IF_NONE_MATCH", ""):
+            keep = ("ETag", "Cache-Control")
+            startResponse("304 Not Modified", [(k, v) for k, v in headers if k in keep])
+            return [b""]
+        startResponse(status, headers)
+        return [body]
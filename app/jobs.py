@@ -0,0 +1,441 @@
+"""Run long analyses (e.g. the same query over every semester) as background
+jobs, rather than in the request that asks for them.
+
+A job is an analysis (one of ANALYSES) and its parameters. It is identified by
+a hash of those and of the versions of the datasets it reads, so:
+
+    * submitting a job that is already queued, running or done returns the
+      existing job rather than starting it again;
+    * a finished job's result is reused until one of its datasets changes.
+
+Jobs are recorded in an SQLite table (LINGDB_JOBS_DB, data/jobs.sqlite by
+default), and run by a pool of LINGDB_JOB_WORKERS processes (default 2), which
+write their progress and results back to the table. Results therefore survive
+restarts, and jobs that were queued or running when their process died are
+started again the next time a process starts its pool (on its first submit or
+poll). A job is only ever run by the worker that claims it, however many
+processes submit it.
+
+Finished (and failed) jobs are deleted LINGDB_JOB_TTL seconds (default a week)
+after they finish.
+
+routes.py serves jobs as:
+
+    POST /jobs              {"analysis": ..., "params": {...}}, returning the job
+    GET  /jobs/<id>         the job: its state, progress, and result or error
+    GET  /jobs/<id>/events  the job's progress as server-sent events, until it ends
+
+Analyses are expensive, so jobs may only be submitted with LINGDB_ADMIN=1.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from data import datasets, snapshot, sqldb
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.environ.get("LINGDB_JOBS_DB", "data/jobs.sqlite")
+
+# How many analyses may run at once (in each process that submits jobs)
+WORKERS = int(os.environ.get("LINGDB_JOB_WORKERS", 2))
+
+# How often (in seconds) /jobs/<id>/events checks for progress
+POLL_INTERVAL = 0.5
+
+# How long (in seconds) finished jobs are kept
+TTL = float(os.environ.get("LINGDB_JOB_TTL", 7 * 24 * 60 * 60))
+
+# Whether POST /jobs accepts submissions
+SUBMIT_ENABLED = os.environ.get("LINGDB_ADMIN") == "1"
+
+# Job states
+QUEUED  = "queued"
+RUNNING = "running"
+DONE    = "done"
+FAILED  = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id        TEXT PRIMARY KEY,
+    analysis  TEXT NOT NULL,
+    params    TEXT NOT NULL,
+    state     TEXT NOT NULL,
+    progress  REAL NOT NULL DEFAULT 0,
+    result    TEXT,
+    error     TEXT,
+    pid       INTEGER,
+    submitted REAL NOT NULL,
+    started   REAL,
+    finished  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);
+"""
+
+################################################################################
+#                                  Analyses
+################################################################################
+# An analysis is a function f(params, progress) that returns a JSON-serializable
+# result, calling progress(done, total) as it goes. It runs in a worker process,
+# so it must be a module-level function.
+#
+# Every analysis takes a "datasets" parameter, the datasets it reads (by
+# default, every dataset that may be loaded), and the parameters it declares,
+# all of which are required.
+
+# The analyses that may be submitted, by name
+ANALYSES = {}
+
+# The types of the parameters each analysis takes (besides "datasets"), by name
+PARAMS = {}
+
+def analysis(name, **paramTypes):
+    """Register the decorated function as the analysis called name, taking
+    parameters of the given types."""
+    def register(f):
+        ANALYSES[name] = f
+        PARAMS[name] = paramTypes
+        return f
+    return register
+
+@analysis("semesters", payload=str)
+def semesters(params, progress):
+    """Run a query payload (as POSTed to /) against each dataset. For each,
+    return the number of languages, how many matched each query, and the graph
+    data of the first query, or the error if there wasn't a quorum."""
+    from . import querier
+
+    names = params["datasets"]
+    result = {}
+    for i, name in enumerate(names):
+        form = {"payload": params["payload"], "dataset": name}
+        queries = querier.queriesFromForm(form)
+        db = querier.dbFromForm(form)
+        try:
+            results = querier.handleQueries(queries, db, dataset=name)
+            result[name] = {
+                "languages": len(db) if isinstance(db, sqldb.Database) else len(datasets.getDataset(name)),
+                "matches": [len(matches) for matches in results],
+                "graphData": querier.graphData(results[0], dataset=name),
+            }
+        except querier.QuorumError as err:
+            result[name] = {"error": str(err)}
+        progress(i + 1, len(names))
+    return result
+
+@analysis("pairs", payload=str)
+def pairs(params, progress):
+    """Run each query of a payload against each dataset, and measure how
+    strongly every pair of them is associated (see app/stats.py). For each
+    dataset, return the number of languages, the indices of the queries that
+    didn't have a quorum, and the contingency table and stats of every pair of
+    the rest (over the languages with data for both)."""
+    from . import querier, stats
+
+    names = params["datasets"]
+    result = {}
+    for i, name in enumerate(names):
+        form = {"payload": params["payload"], "dataset": name}
+        queries = querier.queriesFromForm(form)
+        db = querier.dbFromForm(form)
+        n = len(db) if isinstance(db, sqldb.Database) else len(datasets.getDataset(name))
+
+        indices, masks, dataMasks, noQuorum = [], [], [], []
+        for j, query in enumerate(queries):
+            try:
+                matches = querier.handleQuery(query, db, dataset=name)
+            except querier.QuorumError:
+                noQuorum.append(j)
+                continue
+            indices.append(j)
+            masks.append(snapshot.rowMask(querier.matchedRows(matches), n))
+            dataMasks.append(querier.dataMask(query, db, name, n))
+
+        result[name] = {
+            "languages": n,
+            "noQuorum": noQuorum,
+            "pairs": [{"a": indices[a], "b": indices[b], "table": list(table),
+                       "p": p, "phi": phi, "lift": lift}
+                      for a, b, table, (p, phi, lift) in stats.pairwise(masks, n, dataMasks)],
+        }
+        progress(i + 1, len(names))
+    return result
+
+def availableDatasets() -> list:
+    """Return the names of the datasets that may be loaded."""
+    names = []
+    for name in datasets.getDatasetNames():
+        try:
+            datasets.checkAvailable(name)
+        except KeyError:
+            continue
+        names.append(name)
+    return names
+
+def checkPayload(payload) -> None:
+    """Raise a ValueError unless payload (JSON, as POSTed to /) is a non-empty
+    list of valid queries."""
+    from . import querier
+
+    try:
+        queries = querier.queriesFromForm({"payload": payload})
+    except (ValueError, KeyError, TypeError, AttributeError) as err:
+        raise ValueError("invalid payload: %s: %s" % (type(err).__name__, err))
+    if not queries:
+        raise ValueError("invalid payload: no queries")
+
+def checkParams(analysisName, params) -> dict:
+    """Return params, with "datasets" filled in, or raise a ValueError if the
+    analysis or its datasets don't exist, or its params are missing, unknown,
+    of the wrong type or (for a payload) invalid."""
+    if analysisName not in ANALYSES:
+        raise ValueError("unknown analysis: %r" % analysisName)
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+
+    paramTypes = PARAMS[analysisName]
+    unknown = set(params) - set(paramTypes) - {"datasets"}
+    if unknown:
+        raise ValueError("unknown params: %s" % ", ".join(sorted(unknown)))
+    for key, type_ in paramTypes.items():
+        if not isinstance(params.get(key), type_):
+            raise ValueError("%s must be a %s" % (key, type_.__name__))
+    if "payload" in paramTypes:
+        checkPayload(params["payload"])
+
+    params = dict(params)
+    names = params.setdefault("datasets", availableDatasets())
+    if not isinstance(names, list) or not names:
+        raise ValueError("datasets must be a non-empty list")
+    for name in names:
+        if not isinstance(name, str):
+            raise ValueError("datasets must be a list of names")
+        try:
+            datasets.checkAvailable(name)
+        except KeyError as err:
+            raise ValueError("unknown dataset: %s" % err)
+    return params
+
+################################################################################
+#                                 Job table
+################################################################################
+
+def connect(path=None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path or DATABASE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+# The file fingerprint of each dataset, as of the last submit (see datasetVersion)
+fingerprints = {}
+
+def datasetVersion(name) -> str:
+    """Return a hash of the named dataset's file, without loading it (unlike
+    datasets.getDatasetVersion, which would load it into this process)."""
+    if datasets.ENGINE == "sqlite":
+        path = datasets.sqliteFilename(name)
+    else:
+        path = datasets.databaseFilename(name)
+    fp = fingerprints[path] = datasets.fingerprint(path, fingerprints.get(path))
+    return fp[2]
+
+def jobKey(analysisName, params) -> str:
+    versions = [datasetVersion(name) for name in params["datasets"]]
+    key = json.dumps([analysisName, params, versions], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+def jobDict(row) -> dict:
+    """Return a job (a row of the job table) as sent to clients."""
+    job = {
+        "id": row["id"],
+        "analysis": row["analysis"],
+        "params": json.loads(row["params"]),
+        "state": row["state"],
+        "progress": row["progress"],
+        "submitted": row["submitted"],
+        "started": row["started"],
+        "finished": row["finished"],
+    }
+    if row["state"] == DONE:
+        job["result"] = json.loads(row["result"])
+    elif row["state"] == FAILED:
+        job["error"] = row["error"]
+    return job
+
+def expire(conn) -> None:
+    """Delete the jobs that finished more than TTL seconds ago."""
+    deleted = conn.execute("DELETE FROM jobs WHERE state IN (?, ?) AND finished < ?",
+                           (DONE, FAILED, time.time() - TTL)).rowcount
+    if deleted:
+        logger.info("deleted %d expired jobs", deleted)
+
+def isAlive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+################################################################################
+#                                  Workers
+################################################################################
+
+def runJob(path, jobId) -> None:
+    """Run the queued job jobId of the job table at path (in a worker
+    process), unless another worker has already claimed it."""
+    conn = connect(path)
+    try:
+        claimed = conn.execute(
+            "UPDATE jobs SET state = ?, pid = ?, started = ? WHERE id = ? AND state = ?",
+            (RUNNING, os.getpid(), time.time(), jobId, QUEUED)).rowcount
+        if not claimed:
+            return
+        row = conn.execute("SELECT analysis, params FROM jobs WHERE id = ?", (jobId,)).fetchone()
+
+        def progress(done, total):
+            conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (done / total, jobId))
+
+        try:
+            result = json.dumps(ANALYSES[row["analysis"]](json.loads(row["params"]), progress))
+        except Exception as err:
+            logger.exception("job %s failed", jobId)
+            conn.execute("UPDATE jobs SET state = ?, error = ?, finished = ? WHERE id = ?",
+                         (FAILED, "%s: %s" % (type(err).__name__, err), time.time(), jobId))
+        else:
+            conn.execute("UPDATE jobs SET state = ?, progress = 1, result = ?, finished = ? WHERE id = ?",
+                         (DONE, result, time.time(), jobId))
+    finally:
+        conn.close()
+
+# The process pool, and the process it was started in (pools don't survive a
+# fork, so each gunicorn worker must start its own)
+pool = None
+poolPid = None
+poolLock = threading.Lock()
+
+def getPool() -> ProcessPoolExecutor:
+    """Return this process's pool, starting it (and restarting any jobs that
+    were interrupted) if it isn't running."""
+    global pool, poolPid
+    if poolPid != os.getpid():
+        with poolLock:
+            if poolPid != os.getpid():
+                # Workers are spawned rather than forked: forking a process
+                # with threads (e.g. the dataset reloader) and open SQLite
+                # connections can leave the child deadlocked
+                pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+                poolPid = os.getpid()
+                recover(pool)
+    return pool
+
+def shutdown() -> None:
+    """Stop this process's pool, once its running jobs have finished. (Queued
+    jobs stay queued, to be run by the next pool.)"""
+    global pool, poolPid
+    with poolLock:
+        if poolPid == os.getpid():
+            pool.shutdown(wait=True, cancel_futures=True)
+        pool = poolPid = None
+
+def requeueIfInterrupted(conn, row) -> bool:
+    """If the job row is running in a process that has died, queue it again,
+    and return True."""
+    if row["state"] != RUNNING or isAlive(row["pid"]):
+        return False
+    logger.warning("restarting interrupted job %s", row["id"])
+    return conn.execute("UPDATE jobs SET state = ?, progress = 0 WHERE id = ? AND state = ?",
+                        (QUEUED, row["id"], RUNNING)).rowcount > 0
+
+def recover(pool) -> None:
+    """Requeue the jobs whose workers died, and submit every queued job."""
+    conn = connect()
+    try:
+        for row in conn.execute("SELECT id, state, pid FROM jobs WHERE state = ?", (RUNNING,)).fetchall():
+            requeueIfInterrupted(conn, row)
+        for row in conn.execute("SELECT id FROM jobs WHERE state = ?", (QUEUED,)).fetchall():
+            pool.submit(runJob, DATABASE_PATH, row["id"])
+    finally:
+        conn.close()
+
+def schedule(jobId) -> None:
+    """Have this process's pool run the queued job jobId."""
+    global poolPid
+    try:
+        getPool().submit(runJob, DATABASE_PATH, jobId)
+    except BrokenProcessPool:
+        # A worker died (taking the pool with it): start a new pool, which
+        # submits every queued job, this one included
+        logger.warning("job pool broken; restarting it")
+        with poolLock:
+            poolPid = None
+        getPool()
+
+################################################################################
+#                                    API
+################################################################################
+
+def submit(analysisName, params) -> dict:
+    """Submit a job, unless the same job is already queued, running or done,
+    and return it. Raise a ValueError if the analysis or params are invalid."""
+    params = checkParams(analysisName, params)
+    jobId = jobKey(analysisName, params)
+
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        expire(conn)
+        row = conn.execute("SELECT state FROM jobs WHERE id = ?", (jobId,)).fetchone()
+        if row is None or row["state"] == FAILED:
+            conn.execute("INSERT OR REPLACE INTO jobs (id, analysis, params, state, submitted) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (jobId, analysisName, json.dumps(params), QUEUED, time.time()))
+            queued = True
+        else:
+            queued = False
+        conn.execute("COMMIT")
+
+        if queued:
+            schedule(jobId)
+            logger.info("submitted job %s (%s)", jobId, analysisName)
+        return jobDict(conn.execute("SELECT * FROM jobs WHERE id = ?", (jobId,)).fetchone())
+    finally:
+        conn.close()
+
+def get(jobId):
+    """Return the job with the given id, or None if there isn't one."""
+    getPool()
+    conn = connect()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (jobId,)).fetchone()
+        if row is not None and requeueIfInterrupted(conn, row):
+            schedule(jobId)
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (jobId,)).fetchone()
+    finally:
+        conn.close()
+    return None if row is None else jobDict(row)
+
+def events(jobId):
+    """Yield the job with the given id (as server-sent events) each time its
+    state or progress changes, until it is done or has failed. The job must
+    exist."""
+    last = None
+    while True:
+        job = get(jobId)
+        current = (job["state"], job["progress"])
+        if current != last:
+            yield "data: %s\n\n" % json.dumps(job)
+            last = current
+        if job["state"] in (DONE, FAILED):
+            return
+        time.sleep(POLL_INTERVAL)
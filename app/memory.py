@@ -0,0 +1,218 @@
+"""Account for the memory held by each loaded dataset and by the app's caches.
+
+report() returns the (approximate) size in bytes of:
+
+    datasets: for each dataset loaded in this process (see data/datasets.py),
+        languages     the language dicts, including all of their values
+        database      what its TinyDB database holds beyond those
+        wrappers      what wrapping every language in a Language costs (queries
+                      wrap each of their matches, on every request)
+        snapshot      its snapshot's decoded strings, columns and bitmap
+                      indexes (the file itself is mapped, not allocated, and is
+                      reported as "mapped")
+        precomputed   its precomputed results (see app/precomputed.py)
+        strings       the str objects among all of the above: how many there
+                      are, their size, and how much of that is duplicates,
+                      which interning them would save
+    caches:
+        httpCache     the responses cached by CachingMiddleware, if enabled
+        queries       the interned Query objects (see query.intern)
+        assets        the asset manifest (see app/assets.py)
+
+Objects shared between parts of a dataset are counted once, in the first part
+listed that holds them.
+
+Sizes are measured by walking every object, which takes a while for large
+datasets, so the /admin/memory endpoint is only served with LINGDB_ADMIN=1.
+It also accepts a /q/ token (/admin/memory?query=<token>), to run that query
+between two tracemalloc snapshots and report what it allocated and kept, by
+line: e.g. to see what a new index or cache costs before deploying it.
+
+The same reports are available from the command line:
+
+    python -m app.memory [dataset ...] [--query TOKEN]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+from . import app, assets, httpcache, precomputed, query as querylib
+from .language import Language
+from data import datasets
+
+ENABLED = os.environ.get("LINGDB_ADMIN") == "1"
+
+# How many lines allocating the most memory traceAllocations() reports
+TOP_ALLOCATIONS = 25
+
+# How many frames of each allocation's traceback tracemalloc records
+TRACEBACK_FRAMES = 1
+
+class Sizer:
+    """Measures the deep size of objects, counting each object only once
+    across every call to size(), and keeping count of the strings it sees."""
+
+    def __init__(self):
+        self.seen = set()
+        # str value -> size, for each distinct string value
+        self.stringValues = {}
+        self.strings = 0
+        self.stringBytes = 0
+        self.duplicateBytes = 0
+
+    def size(self, obj) -> int:
+        """Return the size of obj and everything it refers to that hasn't been
+        counted yet."""
+        total = 0
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in self.seen:
+                continue
+            self.seen.add(id(obj))
+            size = sys.getsizeof(obj)
+            total += size
+
+            if isinstance(obj, str):
+                self.strings += 1
+                self.stringBytes += size
+                if obj in self.stringValues:
+                    self.duplicateBytes += size
+                else:
+                    self.stringValues[obj] = size
+            elif isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                stack.extend(obj)
+
+            if hasattr(obj, "__dict__") and not isinstance(obj, type):
+                stack.append(vars(obj))
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+        return total
+
+    def stringReport(self) -> dict:
+        return {
+            "count": self.strings,
+            "distinct": len(self.stringValues),
+            "bytes": self.stringBytes,
+            "duplicateBytes": self.duplicateBytes,
+        }
+
+def snapshotSize(sizer, name):
+    """Return (allocated bytes, mapped bytes) of the named dataset's open
+    snapshot, or None if it hasn't been opened."""
+    opened = datasets.snapshots.get(name)
+    if opened is None:
+        return None
+    snap = opened[0]
+    # The memoryviews into the map are tiny; what they view isn't allocated
+    allocated = sizer.size(snap.strings) + sizer.size(snap.directory)
+    for column in snap.columns.values():
+        allocated += sys.getsizeof(column) + sizer.size(column.bitmapIndex)
+        for attr in ("alphabet", "index"):
+            allocated += sizer.size(getattr(column, attr, None))
+    return allocated, len(snap.mmap)
+
+def datasetReport(name) -> dict:
+    """Return the sizes of the parts of a loaded dataset."""
+    dataset = datasets.loaded[name]
+    sizer = Sizer()
+    report = {
+        "languages": sizer.size(dataset.languages),
+        "database": sizer.size(dataset.database.storage.memory),
+    }
+
+    wrapper = Language(dataset.languages[0]) if dataset.languages else None
+    report["wrappers"] = 0 if wrapper is None else \
+        len(dataset) * (sys.getsizeof(wrapper) + sys.getsizeof(vars(wrapper)))
+
+    snap = snapshotSize(sizer, name)
+    if snap is not None:
+        report["snapshot"], report["mapped"] = snap
+
+    results = precomputed.loaded.get(name, (None, None))[0]
+    if results is not None:
+        report["precomputed"] = sizer.size(results)
+
+    report["total"] = sum(report[part] for part in
+                          ("languages", "database", "wrappers", "snapshot", "precomputed") if part in report)
+    report["strings"] = sizer.stringReport()
+    return report
+
+def cacheReport() -> dict:
+    sizer = Sizer()
+    report = {
+        "queries": sizer.size(list(querylib._interned.values())),
+        "assets": sizer.size(assets.manifest),
+    }
+    if isinstance(app.wsgi_app, httpcache.CachingMiddleware):
+        report["httpCache"] = sizer.size(app.wsgi_app.entries)
+    return report
+
+def report() -> dict:
+    """Return the sizes of every loaded dataset and of the caches."""
+    return {
+        "datasets": {name: datasetReport(name) for name in sorted(datasets.loaded)},
+        "caches": cacheReport(),
+    }
+
+def traceAllocations(handle, limit=TOP_ALLOCATIONS):
+    """Call handle() between two tracemalloc snapshots, and return (its result,
+    the memory it allocated and still held when it returned), where the latter
+    is a dict of the total size and the top limit lines by size."""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(TRACEBACK_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        result = handle()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    allocations = {
+        "size": sum(stat.size_diff for stat in differences),
+        "lines": [{"line": str(stat.traceback), "size": stat.size_diff, "count": stat.count_diff}
+                  for stat in differences[:limit]],
+    }
+    return result, allocations
+
+def traceQuery(token):
+    """Run the query of a /q/ token between two tracemalloc snapshots (see
+    traceAllocations), and return what it allocated and kept. Raise a
+    ValueError if the token is malformed."""
+    from .routes import handleForm
+
+    form, canonical = httpcache.decodeToken(token)
+    with app.test_request_context():
+        _, allocations = traceAllocations(lambda: handleForm(form))
+    allocations["query"] = httpcache.queryURL(canonical)
+    return allocations
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the memory used by datasets and caches.")
+    parser.add_argument('datasets', nargs='*',
+                        help='datasets to load before reporting (default: none)')
+    parser.add_argument('--query', metavar='TOKEN',
+                        help='also report the memory allocated by running the query of a /q/ token')
+    args = parser.parse_args()
+
+    for name in args.datasets:
+        datasets.getLoadedDataset(name)
+    output = {}
+    if args.query:
+        output["allocations"] = traceQuery(args.query)
+    output.update(report())
+    print(json.dumps(output, indent=2))
+
+if __name__ == '__main__':
+    main()
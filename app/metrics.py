@@ -0,0 +1,271 @@
+"""metrics.py defines a small set of Prometheus-style metrics (counters and
+histograms) describing the work done by the app, and the per-request timers that
+feed them.
+
+The metrics are rendered in the Prometheus text exposition format by render(),
+which is served on the /metrics endpoint (see routes.py).
+
+Note that metrics are kept in memory, per process: when running under gunicorn,
+each worker reports only the requests it has handled itself.
+
+A typical request is timed like this:
+
+    timer = metrics.RequestTimer()
+    with timer.phase("parse"):
+        queries = querier.queriesFromRequest(request)
+    ...
+    timer.finish(status)
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Every metric that has been created, in order of creation
+REGISTRY = []
+
+# Histogram bucket upper bounds (in seconds), suitable for timing request phases
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def formatLabels(names, values, extra=()):
+    """Return the {name="value",...} label string for a sample, or "" if
+    there are no labels."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join('%s="%s"' % (n, escape(v)) for n, v in pairs) + "}"
+
+def formatValue(value):
+    """Format a sample value the way Prometheus expects."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    """The ancestor of all metric types. A metric has a name, a help string,
+    and a (possibly empty) list of label names; it stores one value per
+    distinct combination of label values."""
+
+    type = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labelValues(self, labels):
+        """Convert a dict of label values into a tuple ordered like self.labels."""
+        if set(labels) != set(self.labels):
+            raise ValueError(f"metric {self.name} expects labels {self.labels}, not {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        """Return the lines of the text exposition format for this metric."""
+        lines = [
+            "# HELP %s %s" % (self.name, self.help),
+            "# TYPE %s %s" % (self.name, self.type),
+        ]
+        with self.lock:
+            items = sorted(self.values.items())
+        for labelValues, value in items:
+            lines += self.renderSamples(labelValues, value)
+        return lines
+
+    def renderSamples(self, labelValues, value):
+        raise NotImplementedError('concrete Metric implementations should override renderSamples()')
+
+class Counter(Metric):
+    """A Counter is a value that only ever increases, e.g. a number of requests."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.labelValues(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Return the current value of the counter for the given labels."""
+        return self.values.get(self.labelValues(labels), 0)
+
+    def renderSamples(self, labelValues, value):
+        return ["%s%s %s" % (self.name, formatLabels(self.labels, labelValues), formatValue(value))]
+
+class Gauge(Metric):
+    """A Gauge is a value that can go up and down, e.g. the size of a dataset."""
+
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self.labelValues(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def get(self, **labels):
+        """Return the current value of the gauge for the given labels."""
+        return self.values.get(self.labelValues(labels), 0)
+
+    def renderSamples(self, labelValues, value):
+        return ["%s%s %s" % (self.name, formatLabels(self.labels, labelValues), formatValue(value))]
+
+class Histogram(Metric):
+    """A Histogram counts observations (e.g. durations) into cumulative buckets,
+    and keeps their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self.labelValues(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self.values[key] = (counts, total + value)
+
+    def renderSamples(self, labelValues, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = formatLabels(self.labels, labelValues, [("le", formatValue(bound))])
+            lines.append("%s_bucket%s %d" % (self.name, labels, cumulative))
+        labels = formatLabels(self.labels, labelValues)
+        lines.append("%s_sum%s %s" % (self.name, labels, repr(total)))
+        lines.append("%s_count%s %d" % (self.name, labels, cumulative))
+        return lines
+
+def render():
+    """Return every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+#############################################################################
+#                              Request metrics
+#############################################################################
+
+REQUESTS = Counter(
+    "lingdb_requests_total",
+    "Number of query requests handled, by response status.",
+    ["status"])
+
+REQUEST_SECONDS = Histogram(
+    "lingdb_request_seconds",
+    "Total time spent handling a query request.")
+
+PHASE_SECONDS = Histogram(
+    "lingdb_request_phase_seconds",
+    "Time spent in each phase of handling a query request.",
+    ["phase"])
+
+# The phases of a query request, in the order they happen
+PARSE = "parse"         # querier.queriesFromRequest
+SEARCH = "search"       # Query.query
+QUORUM = "quorum"       # the quorum check in querier.handleQuery
+GRAPH_DATA = "graphData"
+RENDER = "render"       # responder.generateHTML and respond
+
+PRECOMPUTED_LOOKUPS = Counter(
+    "lingdb_precomputed_lookups_total",
+    "Number of queries looked up in the precomputed results, by whether they were found.",
+    ["result"])
+
+class RequestTimer:
+    """A RequestTimer records how long each phase of a single request takes,
+    and reports the timings to the request metrics when the request finishes."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with statement as (part of) the named phase.
+        A phase may be entered several times per request, e.g. once per query."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, status):
+        """Record this request's timings in the metrics, and return the total
+        time taken in seconds."""
+        total = time.perf_counter() - self.start
+        for name, seconds in self.phases.items():
+            PHASE_SECONDS.observe(seconds, phase=name)
+        REQUEST_SECONDS.observe(total)
+        REQUESTS.inc(status=status)
+        return total
+
+    def serverTiming(self):
+        """Return the phase timings formatted as a Server-Timing header value,
+        so they can be inspected from the browser's developer tools."""
+        return ", ".join("%s;dur=%.2f" % (name, seconds * 1000)
+                         for name, seconds in self.phases.items())
+
+#############################################################################
+#                              Dataset metrics
+#############################################################################
+
+DATASET_RELOADS = Counter(
+    "lingdb_dataset_reloads_total",
+    "Number of times a dataset was reloaded after its file changed, by result.",
+    ["dataset", "status"])
+
+DATASET_RELOAD_SECONDS = Histogram(
+    "lingdb_dataset_reload_seconds",
+    "Time spent reloading a dataset after its file changed.",
+    ["dataset"])
+
+DATASET_LOAD_SECONDS = Gauge(
+    "lingdb_dataset_load_seconds",
+    "Time taken by the most recent load of each dataset.",
+    ["dataset"])
+
+DATASET_BYTES = Gauge(
+    "lingdb_dataset_bytes",
+    "Size of the file each dataset was most recently loaded from.",
+    ["dataset"])
+
+DATASET_LANGUAGES = Gauge(
+    "lingdb_dataset_languages",
+    "Number of languages in each loaded dataset.",
+    ["dataset"])
+
+def recordLoad(dataset):
+    """Record a load of a dataset (see data.datasets.addLoadListener)."""
+    DATASET_LOAD_SECONDS.set(dataset.seconds, dataset=dataset.name)
+    DATASET_BYTES.set(dataset.size, dataset=dataset.name)
+    DATASET_LANGUAGES.set(len(dataset), dataset=dataset.name)
+
+def recordReload(name, seconds, error):
+    """Record a reload of the named dataset (see data.datasets.addReloadListener)."""
+    DATASET_RELOADS.inc(dataset=name, status="error" if error else "ok")
+    DATASET_RELOAD_SECONDS.observe(seconds, dataset=name)
+
+class NullTimer:
+    """A stand-in for RequestTimer that records nothing, used when functions
+    that accept a timer are called outside of a request."""
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+NULL_TIMER = NullTimer()
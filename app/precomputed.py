@@ -0,0 +1,128 @@
+"""Serve the results of single-trait queries precomputed by gen/resultgen.py.
+
+Each dataset's results file is read (once) the first time it is needed, and
+then answers any query in it from memory: the matching languages are looked up
+by the query's digest, and only their causes are computed.
+
+A results file is only used while it matches the served version of its
+dataset (its .db file, or its .sqlite file with LINGDB_ENGINE=sqlite); if the
+dataset has been rebuilt since, queries are evaluated live until resultgen is
+rerun. Matching languages are read from the same engine, so SQLite deployments
+never load the TinyDB dataset.
+
+Set LINGDB_PRECOMPUTED=0 to always evaluate queries live.
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+
+from . import metrics
+from .language import Language
+from .query import Match, Matches
+from data import datasets
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("LINGDB_PRECOMPUTED", "1") != "0"
+
+# How many hex digits of Query.digest() key the results (64 bits is plenty
+# for a few thousand queries per dataset, and keeps the files small)
+DIGEST_LENGTH = 16
+
+def digestKey(query) -> str:
+    return query.digest()[:DIGEST_LENGTH]
+
+def decodeMask(mask) -> list:
+    """Return the indices of the bits set in a mask (see gen/resultgen.py)."""
+    data = base64.urlsafe_b64decode(mask + "=" * (-len(mask) % 4))
+    bits = int.from_bytes(data, "little")
+    return [i for i in range(bits.bit_length()) if bits >> i & 1]
+
+class Results:
+    """The precomputed results for one version of one dataset."""
+
+    def __init__(self, data):
+        self.dataset = data["dataset"]
+        self.version = data["version"]
+        self.sqliteVersion = data.get("sqliteVersion")
+        self.masks = data["masks"]
+        self.results = data["results"]
+        # The decoded masks, as they are needed
+        self.indices = {}
+
+    def __len__(self):
+        return len(self.results)
+
+    def servedVersion(self):
+        """Return the version of the dataset file these results are for, for
+        the engine being served (see datasets.getDatasetVersion)."""
+        return self.sqliteVersion if datasets.ENGINE == "sqlite" else self.version
+
+    def matchingIndices(self, maskIndex):
+        indices = self.indices.get(maskIndex)
+        if indices is None:
+            indices = self.indices[maskIndex] = decodeMask(self.masks[maskIndex])
+        return indices
+
+# The Results of each dataset, as (results, (mtime, size) of the file), or
+# (None, None) for datasets that have no results file
+loaded = {}
+loadLock = threading.Lock()
+
+def getResults(name):
+    """Return the precomputed Results for the named dataset, or None if there
+    are none."""
+    path = datasets.resultsFilename(name)
+    try:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+
+    results, loadedVersion = loaded.get(name, (None, None))
+    if version is not None and version != loadedVersion:
+        with loadLock:
+            with open(path, "r", encoding="utf-8") as f:
+                results = Results(json.load(f))
+            loaded[name] = (results, version)
+        logger.info("loaded %d precomputed results for %s", len(results), name)
+    elif version is None:
+        results = None
+    return results
+
+def lookup(query, name, db):
+    """Look up the results of query on the named dataset (whose database is db).
+
+    Return None if they weren't precomputed. Otherwise, return a tuple of
+    (matches, hasQuorum): the query's Matches, and whether enough languages
+    had data for it (if not, matches is None)."""
+    if not ENABLED:
+        return None
+
+    results = getResults(name)
+    key = digestKey(query)
+    if results is None or results.servedVersion() != datasets.getDatasetVersion(name) \
+            or key not in results.results:
+        metrics.PRECOMPUTED_LOOKUPS.inc(result="miss")
+        return None
+
+    metrics.PRECOMPUTED_LOOKUPS.inc(result="hit")
+    maskIndex = results.results[key]
+    if maskIndex is None:
+        return None, False
+
+    indices = results.matchingIndices(maskIndex)
+    if datasets.ENGINE == "sqlite":
+        docs = db.documents(i + 1 for i in indices)
+    else:
+        languages = datasets.getLoadedDataset(name).languages
+        docs = [languages[i] for i in indices]
+
+    matches = []
+    for doc in docs:
+        lang = Language(doc)
+        matches.append(Match(lang, query.cause(lang)))
+    return Matches(matches, db, query), True
@@ -0,0 +1,140 @@
+"""Profile individual queries in production, to see where a slow one spends
+its time without having to reproduce it locally.
+
+Profiling is off unless LINGDB_PROFILE_DIR names a directory to write profiles
+to. Then a query is profiled (with cProfile) at random, for a fraction
+LINGDB_PROFILE_SAMPLE (e.g. 0.01) of all queries, or on demand, if its request
+has an "X-LingDB-Profile: <secret>" header, where <secret> is the value of
+LINGDB_PROFILE_SECRET (or with LINGDB_ADMIN=1 and no secret set, e.g. locally,
+"X-LingDB-Profile: 1"). (Cached responses, e.g. to /q/ URLs behind a caching
+proxy, aren't computed and so can't be profiled: to profile a query on demand,
+POST it to / with the header.)
+
+Each profile is written to LINGDB_PROFILE_DIR as
+
+    <time>-<pid>-<n>-<query>.pstats   the pstats dump, e.g. for `python -m
+                                      pstats`, snakeviz, or flameprof/gprof2dot
+                                      to draw a flame graph
+    <time>-<pid>-<n>-<query>.json     what was profiled: the query's canonical
+                                      /q/ URL (see app/httpcache.py), status,
+                                      and duration
+
+where <n> counts the profiles written by the process, and <query> is a hash of
+the query's canonical token, so that every profile of one query matches
+*-<query>.pstats. The response names its profile in an X-LingDB-Profile header,
+and isn't cached (so that no one else is sent that header).
+"""
+
+import cProfile
+import functools
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from flask import has_request_context, request
+
+from . import httpcache
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("LINGDB_PROFILE_DIR")
+
+# The fraction of queries to profile even when not asked to
+SAMPLE_RATE = float(os.environ.get("LINGDB_PROFILE_SAMPLE", 0))
+
+# The value of the header that asks for a profile (see shouldProfile)
+SECRET = os.environ.get("LINGDB_PROFILE_SECRET")
+ADMIN = os.environ.get("LINGDB_ADMIN") == "1"
+
+HEADER = "X-LingDB-Profile"
+
+# Numbers the profiles written by this process, so that their names are unique
+profileCounter = itertools.count()
+
+# cProfile can only profile one thread of a process at a time, so concurrent
+# requests aren't profiled while another one is
+profileLock = threading.Lock()
+
+def isAuthorized(value) -> bool:
+    """Return whether value, of a request's X-LingDB-Profile header, may ask
+    for a profile."""
+    if value is None:
+        return False
+    if SECRET:
+        return hmac.compare_digest(value.encode("utf-8"), SECRET.encode("utf-8"))
+    return ADMIN and value == "1"
+
+def shouldProfile() -> bool:
+    if not PROFILE_DIR:
+        return False
+    if has_request_context() and isAuthorized(request.headers.get(HEADER)):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+def profileName(form) -> str:
+    """Return the file name (without extension) of a new profile of form."""
+    try:
+        token = httpcache.tokenFromForm(form)
+    except (KeyError, ValueError):
+        token = ""
+    digest = hashlib.sha1(token.encode("utf-8")).hexdigest()[:12]
+    return "%s-%06d-%d-%s" % (time.strftime("%Y%m%dT%H%M%S"), os.getpid() % 1000000,
+                              next(profileCounter), digest)
+
+def writeProfile(profiler, form, seconds, status) -> str:
+    """Write a profile of form and return the path of its pstats file."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, profileName(form))
+    profiler.dump_stats(path + ".pstats")
+
+    try:
+        url = httpcache.queryURL(httpcache.tokenFromForm(form))
+    except (KeyError, ValueError):
+        url = None
+    info = {
+        "url": url,
+        "dataset": form.get("dataset"),
+        "status": status,
+        "seconds": seconds,
+        "time": time.time(),
+    }
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2, sort_keys=True)
+    return path + ".pstats"
+
+def profiled(handle):
+    """Decorate handle(form, ...), which returns (response, status), to profile
+    the calls chosen by shouldProfile()."""
+    @functools.wraps(handle)
+    def wrapper(form, *args, **kwargs):
+        if not shouldProfile() or not profileLock.acquire(blocking=False):
+            return handle(form, *args, **kwargs)
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response, status = handle(form, *args, **kwargs)
+            finally:
+                profiler.disable()
+            seconds = time.perf_counter() - start
+        finally:
+            profileLock.release()
+
+        try:
+            path = writeProfile(profiler, form, seconds, status)
+        except OSError:
+            logger.exception("couldn't write profile to %s", PROFILE_DIR)
+        else:
+            logger.info("profiled query in %.1fms: %s", seconds * 1000, path)
+            response.headers[HEADER] = os.path.basename(path)
+        # The header describes this request only, so keep it out of shared caches
+        response.cache_control.no_store = True
+        return response, status
+    return wrapper
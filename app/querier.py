@@ -1,11 +1,11 @@
 import json
-from typing import Iterable, List
+from typing import Iterable, List, Union
 import tinydb
 
 from collections import Counter
 
-from . import query as querylib
-from data import selectors, datasets
+from . import metrics, precomputed, query as querylib
+from data import selectors, datasets, snapshot, sqldb
 from phonemes import vowels, consonants, metaclasses
 
 """Querier.py defines the functions needed to take in a POST request from the
@@ -20,10 +20,15 @@ QUORUM_THRESHOLD = 0.5
 class QuorumError(RuntimeError):
     pass
 
-def dbFromRequest(request) -> tinydb.TinyDB:
-    """Given an XHR request from the frontend, return the TinyDB instance that
-    contains the dataset the request is looking for"""
-    form = request.form
+def dbFromRequest(request) -> Union[tinydb.TinyDB, sqldb.Database]:
+    """Given an XHR request from the frontend, return the database (TinyDB, or
+    SQLite with LINGDB_ENGINE=sqlite) that contains the dataset the request is
+    looking for"""
+    return dbFromForm(request.form)
+
+def dbFromForm(form) -> Union[tinydb.TinyDB, sqldb.Database]:
+    """Like dbFromRequest, but given the request's form (e.g. as decoded from a
+    /q/ URL by httpcache.decodeToken) rather than the request itself."""
     dataset = form["dataset"]
     return datasets.getDatabase(dataset)
 
@@ -31,8 +36,11 @@ def dbFromRequest(request) -> tinydb.TinyDB:
 def queriesFromRequest(request) -> List[querylib.Query]:
     """Given an XHR request from the frontend, return a list of Query objects,
     one for each query specified in the XHR request"""
+    return queriesFromForm(request.form)
 
-    form = request.form
+def queriesFromForm(form) -> List[querylib.Query]:
+    """Like queriesFromRequest, but given the request's form rather than the
+    request itself."""
 
     queryDatas = json.loads(form["payload"])
 
@@ -109,7 +117,9 @@ def queriesFromRequest(request) -> List[querylib.Query]:
         else:
             raise ValueError(f'Unrecognized Query type: {type_}')
 
-        queries.append(query)
+        # Share one Query object between identical queries, so they are only
+        # evaluated once (see handleQueries)
+        queries.append(querylib.intern(query))
 
     return queries
 
@@ -126,31 +136,73 @@ def queriesFromRequest(request) -> List[querylib.Query]:
 
 
 
-def handleQueries(queries: Iterable[querylib.Query], db):
+def handleQueries(queries: Iterable[querylib.Query], db, timer=metrics.NULL_TIMER, dataset=None):
     """Execute each query in queries and return a list of Matches objects indicating
-    the results of running all queries."""
-    return [handleQuery(q, db) for q in queries]
+    the results of running all queries.
+
+    Queries with the same key() are only evaluated once. If they differ only in
+    their desc, each gets its own Matches object sharing the same Match list.
+
+    If the name of db's dataset is given, precomputed results are used where
+    they exist (see handleQuery)."""
+    evaluated = {}
+    results = []
+    for q in queries:
+        key = q.key()
+        if key not in evaluated:
+            evaluated[key] = handleQuery(q, db, timer, dataset)
+        matches = evaluated[key]
+        if matches.query is not q:
+            matches = querylib.Matches(matches.matches, matches.db, q)
+        results.append(matches)
+    return results
 
-def handleQuery(query: querylib.Query, db):
+def handleQuery(query: querylib.Query, db, timer=metrics.NULL_TIMER, dataset=None):
     """handleQuery will run a single query from the frontend against the DB,
     returning the status code and results.
     Results will be a tuple consisting of first the entire JSON of the language
     that was matched, followed by the specific values held by that language
     that were responsible for satisfying the query.
     E.g. If we asked for a language with at least three consonants, we would
-    return all the consonants in that language as the second tuple entry."""
+    return all the consonants in that language as the second tuple entry.
+
+    If a metrics.RequestTimer is provided, the search and quorum check are
+    timed as separate phases.
+
+    If dataset (the name of db's dataset) is provided and the query's results
+    were precomputed (by gen/resultgen.py), they are returned instead of
+    evaluating the query."""
     if not isinstance(query, querylib.Query):
         raise TypeError(f"handleQuery() only accepts Query objects, not: {type(query)}")
 
-    results = query.query(db)
+    if dataset is not None:
+        with timer.phase(metrics.SEARCH):
+            found = precomputed.lookup(query, dataset, db)
+        if found is not None:
+            results, hasQuorum = found
+            if not hasQuorum:
+                raise QuorumError("Not enough languages had data for property '%s'" % query.property)
+            return results
+
+    with timer.phase(metrics.SEARCH):
+        results = query.query(db)
+
+    with timer.phase(metrics.QUORUM):
+        checkQuorum(query, db)
+
+    return results
+
+def checkQuorum(query: querylib.Query, db):
+    """Raise a QuorumError if too few languages in db have data for the
+    properties that query depends on."""
 
     # Perform a quorum check - did enough of the queried languages have data to
     # provide?
     Lang = tinydb.Query()
 
-    # if query.property isn't a list, make it a singleton list
+    # if query.property isn't a tuple of properties, make it a singleton list
     properties = query.property
-    if type(properties) != type([]):
+    if isinstance(properties, str):
         properties = [properties]
 
     # query.property is a list of properties.
@@ -158,17 +210,98 @@ def handleQuery(query: querylib.Query, db):
     # WARNING: This is a poor approximation in general, but works for our specific case.
     # we really want to check that enough languages have data for EVERY property
     for p in properties:
-        langsWithData = db.search(Lang[p].exists())
-        if len(langsWithData) < QUORUM_THRESHOLD * len(db):
+        if isinstance(db, sqldb.Database):
+            numWithData = db.countWithProperty(p)
+        else:
+            numWithData = len(db.search(Lang[p].exists()))
+        if numWithData < QUORUM_THRESHOLD * len(db):
             raise QuorumError("Not enough languages had data for property '%s'" % query.property)
 
-    return results
-
-def graphData(matches):
-    """Given the results of a single query, count up how many times a particular
-    cause has occurred, and return the results, encoded as JSON
-
-    For example, if we have:
+def graphSnapshot(dataset, db):
+    """Return the snapshot of the named dataset, to count values from, or None
+    if there isn't one (or it doesn't hold the same languages as db)."""
+    if dataset is None:
+        return None
+    try:
+        snap = datasets.getSnapshot(dataset)
+    except (KeyError, OSError, snapshot.SnapshotError):
+        return None
+    # len() of a TinyDB database reads every document, so ask the dataset
+    numLanguages = len(db) if isinstance(db, sqldb.Database) else len(datasets.getLoadedDataset(dataset))
+    return snap if len(snap) == numLanguages else None
+
+def matchedRows(matches):
+    """Return the snapshot rows of the matching languages, or None if they
+    aren't known. Rows are in document order, so a language's row is its
+    doc_id - 1 (see data/json_to_db.py)."""
+    try:
+        return [match.language.data.doc_id - 1 for match in matches]
+    except AttributeError:
+        return None
+
+def queryProperties(query) -> list:
+    """Return the properties query depends on (none, for Always and Never)."""
+    properties = getattr(query, "property", None)
+    if properties is None:
+        return []
+    if isinstance(properties, str):
+        return [properties]
+    return list(properties)
+
+def dataMask(query, db, dataset=None, numLanguages=None):
+    """Return a bitmask of the rows (see matchedRows) of the languages in db
+    with data for every property query depends on, or None if it depends on
+    none. The snapshot of the named dataset is used, if it has one."""
+    properties = queryProperties(query)
+    if not properties:
+        return None
+    snap = graphSnapshot(dataset, db)
+    if numLanguages is None:
+        numLanguages = len(db) if snap is None else len(snap)
+
+    mask = (1 << numLanguages) - 1
+    Lang = tinydb.Query()
+    for p in properties:
+        if snap is not None:
+            try:
+                presence = snap.column(p).presence
+            except KeyError:
+                return 0
+            mask &= int.from_bytes(presence, "little")
+        elif isinstance(db, sqldb.Database):
+            rows = [langId - 1 for (langId,) in db.execute("SELECT lang_id FROM fields WHERE key = ?", (p,))]
+            mask &= snapshot.rowMask(rows, numLanguages)
+        else:
+            mask &= snapshot.rowMask((doc.doc_id - 1 for doc in db.search(Lang[p].exists())), numLanguages)
+    return mask
+
+def languageCounts(languages, properties):
+    """Count how many of languages (dicts) have each value of properties. Each
+    list counts once for every distinct item in it."""
+    counts = Counter()
+    for lang in languages:
+        values = set()
+        for p in properties:
+            value = lang.get(p)
+            if isinstance(value, list):
+                values.update(value)
+            elif value is not None:
+                values.add(value)
+        counts.update(values)
+    return counts
+
+def graphData(matches, dataset=None):
+    """Given the results of a single query, count up the values of its property,
+    and return the counts as a list of [value, count] pairs:
+
+        List    how many matching languages have each of the query's values,
+                most common first
+        Num     how many matching languages have each value, by value
+        String  how many matching languages have each value, most common first
+        Bool    how many languages (matching or not) have the property true,
+                and how many false
+
+    For example, for a list query for [p,t,k], if we have:
         English [p,t,k]
         French  [p,t]
         Spanish [p],
@@ -179,14 +312,41 @@ def graphData(matches):
         [k, 1],
     ]
 
-    Note: Currently only list type data is supported. TODO: Add support for others later.
+    If the query's dataset has a snapshot (see data/snapshot.py), the values
+    are counted straight from its coded columns, over the rows of the matching
+    languages. Otherwise they are counted from the languages themselves.
     """
-
-    causes = []
-    for match in matches:
-        if type(match.cause) != type([]):
-            return []
-        causes += match.cause
-    counter = Counter(causes)
-    ret = counter.most_common()
-    return ret
+    query = matches.query
+    if query.type not in (querylib.LIST, querylib.NUM, querylib.STRING, querylib.BOOL):
+        return []
+
+    properties = query.property if isinstance(query.property, tuple) else (query.property,)
+
+    # Bools are counted over every language, everything else over the matches
+    allLanguages = query.type == querylib.BOOL
+
+    counts = None
+    snap = graphSnapshot(dataset, matches.db)
+    if snap is not None:
+        rows = range(len(snap)) if allLanguages else matchedRows(matches)
+        if rows is not None:
+            counts = Counter()
+            for p in properties:
+                if p in snap.directory:
+                    # The columns of a metaproperty (consonants and vowels)
+                    # never share values, so their counts can just be added
+                    counts.update(snap.column(p).counts(rows))
+
+    if counts is None:
+        languages = matches.db.all() if allLanguages else [match.language.data for match in matches]
+        counts = languageCounts(languages, properties)
+
+    if query.type == querylib.LIST:
+        order = {value: i for i, value in enumerate(query.ls)}
+        pairs = [(value, n) for value, n in counts.items() if value in order]
+        return [list(p) for p in sorted(pairs, key=lambda p: (-p[1], order[p[0]]))]
+    if query.type == querylib.NUM:
+        return [[value, counts[value]] for value in sorted(counts)]
+    if query.type == querylib.STRING:
+        return [list(p) for p in sorted(counts.items(), key=lambda p: (-p[1], p[0]))]
+    return [[True, counts[True]], [False, counts[False]]]
@@ -1,8 +1,9 @@
-import copy, json
+import hashlib, json, operator, weakref
 from collections.abc import Sequence
 
 import tinydb
 
+from data import sqldb
 from data.const import ValueType
 from .language import Language
 
@@ -52,25 +53,64 @@ LT  = "less than"     # Match if the number of phoneme matches  < target
 NEQ = "not equal to"  # Match if the number of phoneme matches != target
 ALL = "all"
 
+def normalizeMode(mode):
+    """Return mode in its canonical form: lowercase, with runs of whitespace
+    collapsed, so that e.g. "At  least" and "at least" are the same mode."""
+    if isinstance(mode, str):
+        return " ".join(mode.lower().split())
+    return mode
+
 def intersect(lsA, lsB):
     """Given two lists lsA, lsB, intersect will return a list containing those
     elements common to both lists"""
     return list(set(lsA).intersection(set(lsB)))
 
+# The comparison function for each mode, called as f(value, target). Queries
+# bind theirs once, when they are constructed (see Query._compare). These are
+# operator functions, so they work just as well on NumPy arrays as on scalars.
+# ALL compares a List query's count of values against the number of (distinct)
+# values it lists.
+COMPARATORS = {
+    LT:     operator.lt,
+    GT:     operator.gt,
+    GEQ:    operator.ge,
+    LEQ:    operator.le,
+    EQ:     operator.eq,
+    NEQ:    operator.ne,
+    ALL:    operator.eq,
+}
+
+def comparator(mode):
+    """Return the comparison function for mode, called as f(value, target)."""
+    if mode not in COMPARATORS:
+        raise KeyError("comparator: unrecognized mode '%s'" % mode)
+    return COMPARATORS[mode]
+
 def compareByMode(mode, a, b):
     """Compare two values a,b using the comparison function specified by
     the provided string 'mode'."""
-    comp = {
-        LT:     (lambda a, b: a < b),
-        GT:     (lambda a, b: a > b),
-        GEQ:    (lambda a, b: a >= b),
-        LEQ:    (lambda a, b: a <= b),
-        EQ:     (lambda a, b: a == b),
-        NEQ:    (lambda a, b: a != b),
-    }
-    if mode not in comp:
-        raise KeyError("compareByMode: unrecognized mode '%s'" % mode)
-    return comp[mode](a, b)
+    return comparator(mode)(a, b)
+
+# The SQL comparison operator for each mode (see Query.sql)
+SQL_OPERATORS = {
+    LT:     "<",
+    GT:     ">",
+    GEQ:    ">=",
+    LEQ:    "<=",
+    EQ:     "=",
+    NEQ:    "!=",
+    ALL:    "=",
+}
+
+def sqlOperator(mode):
+    """Return the SQL comparison operator equivalent to compareByMode(mode, ...)"""
+    if mode not in SQL_OPERATORS:
+        raise KeyError("sqlOperator: unrecognized mode '%s'" % mode)
+    return SQL_OPERATORS[mode]
+
+def placeholders(values):
+    """Return "?, ?, ..., ?", with one parameter placeholder per value."""
+    return ", ".join("?" * len(values))
 
 def createMatches(matchingLangs, causes, db, query):
     """Given a list of matching languages and a list of causes, one for each
@@ -135,27 +175,109 @@ class Matches(Sequence):
         """Return a set of all the languages associated with matches in self.matches"""
         return set([m.language for m in self.matches])
 
+def _restoreQuery(cls, fields):
+    """Return a query of class cls with the given fields (see Query.__reduce__)."""
+    query = cls.__new__(cls)
+    query._setFields(**fields)
+    return query
+
 class Query:
     """A Query is in simplest form a function on a language, which returns true if the
     query is satisfied on that language, and false if the query is not satisfied on
     that language.
 
+    Queries are immutable value objects: once constructed their fields cannot be
+    changed, two queries with the same fields compare (and hash) equal, and
+    they may be used as dict keys or deduplicated with intern().
+
     The query.Query class acts as the ancestor for all other query classes."""
 
+    # _compare is the comparator (see COMPARATORS) of the query's mode, bound
+    # once by the constructor rather than looked up for every language tested
+    __slots__ = ("descStr", "type", "_hash", "_compare", "__weakref__")
+
     def __init__(self):
-        self.descStr = "<Base Query - undefined parameters>"
+        self._setFields(descStr="<Base Query - undefined parameters>", type=None)
+
+    def _setFields(self, **fields):
+        """Set the given fields on this query. Only constructors should call this."""
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot set '{name}': {type(self).__name__} queries are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete '{name}': {type(self).__name__} queries are immutable")
+
+    def __reduce__(self):
+        """Pickle (and copy) queries by their fields, since they can't be set
+        the usual way. The cached hash is left out: string hashes differ
+        between processes."""
+        fields = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name not in ("_hash", "__weakref__") and hasattr(self, name):
+                    fields[name] = getattr(self, name)
+        return _restoreQuery, (type(self), fields)
+
+    def _fields(self):
+        """Return a dict of the public fields of this query (the equivalent of
+        vars(self) for a class without a __dict__)."""
+        fields = {}
+        for cls in reversed(type(self).__mro__):
+            for name in getattr(cls, "__slots__", ()):
+                if not name.startswith("_") and hasattr(self, name):
+                    fields[name] = getattr(self, name)
+        return fields
+
+    def key(self):
+        """Return a hashable, canonical description of what this query matches.
+
+        Two queries with the same key always produce the same matches, so the key
+        ignores the desc (which only affects the reply) and the order of ls."""
+        fields = self._fields()
+        del fields["descStr"]
+        if "ls" in fields:
+            fields["ls"] = tuple(sorted(set(fields["ls"])))
+        return (type(self).__name__,) + tuple(sorted(fields.items()))
+
+    def canonical(self):
+        """Return key() as a JSON-serializable dict."""
+        className, *fields = self.key()
+        canonical = dict(fields)
+        canonical["class"] = className
+        return canonical
+
+    def digest(self):
+        """Return a hash of key() that is stable across processes and runs
+        (unlike hash(), which is salted per process for strings)."""
+        data = json.dumps(self.canonical(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def __eq__(self, other):
+        if type(self) != type(other):
+            return NotImplemented
+        return self.key() == other.key() and self.descStr == other.descStr
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._setFields(_hash=hash((self.key(), self.descStr)))
+            return self._hash
 
     def __str__(self):
         """Return a human-readable description of what it would take for this
         query to be satisfied; for example, a List query might look like:
         "{n} languages contain {mode} {k} of {ls}".
         """
-        return self.descStr()
+        return self.desc()
 
     def __repr__(self):
         """Return a complete description of the fields of this query."""
         t = type(self)
-        data = json.dumps(vars(self), indent=2)
+        data = json.dumps(self._fields(), indent=2)
         return "{0} query:\n{1}".format(t, data)
 
     def desc(self):
@@ -169,8 +291,7 @@ class Query:
         in particular, enclosing square brackets are omitted, as are quotes
         around string literals."""
 
-        # Create a deepcopy of vars to avoid modifying the original query
-        params = copy.deepcopy(vars(self))
+        params = self._fields()
 
         # Convert literal lists to simplified string representations
         if "ls" in params:
@@ -187,12 +308,44 @@ class Query:
         the relevant property for the matching language."""
         raise NotImplementedError('concrete Query implementations should override query()')
 
+    def sql(self):
+        """Compile this query to SQL for an sqldb.Database. Return a tuple of
+        (sql, params), where sql selects the ids (as lang_id) of the matching
+        languages, with one ? placeholder for each of params."""
+        raise NotImplementedError('concrete Query implementations should override sql()')
+
+    def cause(self, lang):
+        """Return the cause of a matching language's match (see Match)."""
+        return None
+
+    def querySQL(self, db):
+        """Execute this query on an sqldb.Database, returning the same results
+        query() would on the equivalent TinyDB database."""
+        sql, params = self.sql()
+        matchingLangs = [Language(m) for m in db.search(sql, params)]
+        causes = [self.cause(lang) for lang in matchingLangs]
+        return createMatches(matchingLangs, causes, db, self)
+
+# Interning table for queries, keyed by (key(), descStr).
+# Values are weak references, so queries no longer in use anywhere are dropped.
+_interned = weakref.WeakValueDictionary()
+
+def intern(query):
+    """Return the canonical instance of query: the first query equal to it that
+    is still alive, or query itself if there is none. Interned queries can be
+    compared by identity, and identical queries in a batch share one object."""
+    return _interned.setdefault((query.key(), query.descStr), query)
+
 class List(Query):
     """Query.List is a class defining the properties of a list based query from
     the user to the database.
     A List query is of the form "at least 2 of [x,y,z]",
     or "exactly 0 of [p,q,r,s]"."""
 
+    # _target is what the count of matching values is compared to (k, or for
+    # ALL, the number of values in ls), and _lsSet is ls as a set
+    __slots__ = ("property", "mode", "k", "ls", "_target", "_lsSet")
+
     def __init__(self, property, mode, k, ls, desc=defaultDesc[LIST]):
         """Create a List based query using the given mode, k, and ls. Mode is
         one of the constants defined in data.const; e.g. GREATER_THAN, LESS_THAN,
@@ -200,27 +353,29 @@ class List(Query):
         ls defines the list on which the mode and k operate; e.g. "at least K of
         ls=[a,b,c,...]". """
 
+        mode = normalizeMode(mode)
         if mode not in (EQ, NEQ, GT, LT, GEQ, LEQ, ALL):
             raise InvalidModeError(f"'{mode}' is not a valid mode for list queries!")
 
         if not isinstance(k, int):
             raise TypeError(f"'{k}' is not a valid integer K for list queries!")
 
-        if not isinstance(ls, list):
+        if not isinstance(ls, (list, tuple)):
             raise TypeError(f"'{ls}' is not a valid list for list queries!")
 
         # Special case: allow lists of properties to signify "meta" properties
         # that are a concatenation of several other existing properties
-        if not isinstance(property, str) and not isinstance(property, list):
+        if not isinstance(property, (str, list, tuple)):
             raise TypeError(f"'{property}' is not a valid property for list queries!")
 
-        self.property = property
-        self.mode = mode
-        self.k = k
-        self.ls = ls
+        # Lists are stored as tuples so the query stays immutable
+        if not isinstance(property, str):
+            property = tuple(property)
 
-        self.descStr = desc
-        self.type = LIST
+        lsSet = frozenset(ls)
+        self._setFields(property=property, mode=mode, k=k, ls=tuple(ls),
+                        descStr=desc, type=LIST, _compare=COMPARATORS[mode],
+                        _target=len(lsSet) if mode == ALL else k, _lsSet=lsSet)
 
     def query(self, db):
         """Execute this query on the specified database, returning the status code
@@ -232,10 +387,13 @@ class List(Query):
         For example, if we query for a language with at least 3 consonants,
         the cause would be a list of all consonants in the matching language."""
 
+        if isinstance(db, sqldb.Database):
+            return self.querySQL(db)
+
         Lang = tinydb.Query()
 
         # Special case for "meta" properties consisting of several concatenated properties
-        if isinstance(self.property, list):
+        if isinstance(self.property, tuple):
             return self.metaquery(db)
 
         matches =  db.search(Lang[self.property].test(self.test))
@@ -254,8 +412,8 @@ class List(Query):
         aggregate list.
         """
 
-        if not isinstance(self.property, list):
-            raise TypeError(f"List metaqueries must have property of type list (not {type(self.property)})")
+        if not isinstance(self.property, tuple):
+            raise TypeError(f"List metaqueries must have property of type tuple (not {type(self.property)})")
 
         # This is an ugly & potentially inefficient solution but it works
         allLangs = [Language(a) for a in db.all()]
@@ -267,21 +425,51 @@ class List(Query):
             metaset = set.union(*[set(getattr(lang, metaprop)) for metaprop in self.property])
 
             # Find overlap with query's specified ls
-            intersection = metaset.intersection(set(self.ls))
+            intersection = metaset.intersection(self._lsSet)
 
             # If query conditions are satisfied, this lang is a match!
-            if compareByMode(self.mode, len(intersection), self.k):
+            if self._compare(len(intersection), self._target):
                 matchingLangs.append(lang)
                 causes.append(list(intersection))
 
         return createMatches(matchingLangs, causes, db, self)
 
+    def sql(self):
+        """Count the distinct values of the language's list that are in ls,
+        comparing the count to k. Languages with no such values are kept by
+        the LEFT JOIN, so that e.g. "at most 1" matches them too."""
+        op = sqlOperator(self.mode)
+
+        # Metaqueries count the values of several list properties together,
+        # and (like metaquery()) consider every language
+        if isinstance(self.property, tuple):
+            tables = sorted({sqldb.listTable(p) for p in self.property})
+            items = " UNION ALL ".join("SELECT lang_id, key, %s AS value FROM %s" % (column, table)
+                                       for table, column in tables)
+            sql = ("SELECT l.id AS lang_id FROM languages l "
+                   "LEFT JOIN (%s) v ON v.lang_id = l.id AND v.key IN (%s) AND v.value IN (%s) "
+                   "GROUP BY l.id HAVING COUNT(DISTINCT v.value) %s ?"
+                   % (items, placeholders(self.property), placeholders(self.ls), op))
+            return sql, list(self.property) + list(self.ls) + [self._target]
+
+        table, column = sqldb.listTable(self.property)
+        sql = ("SELECT f.lang_id FROM fields f "
+               "LEFT JOIN {table} v ON v.lang_id = f.lang_id AND v.key = f.key AND v.{column} IN ({ls}) "
+               "WHERE f.key = ? GROUP BY f.lang_id HAVING COUNT(DISTINCT v.{column}) {op} ?"
+               ).format(table=table, column=column, ls=placeholders(self.ls), op=op)
+        return sql, list(self.ls) + [self.property, self._target]
+
+    def cause(self, lang):
+        if isinstance(self.property, tuple):
+            metaset = set.union(*[set(getattr(lang, metaprop)) for metaprop in self.property])
+            return list(metaset.intersection(self._lsSet))
+        return intersect(getattr(lang, self.property), self.ls)
+
     def test(self, ls):
         """A method to be passed to TinyDB's .test() method to check whether a
         given list ls matches the parameters defined by this query."""
 
-        intersection = intersect(ls, self.ls)
-        return compareByMode(self.mode, len(intersection), self.k)
+        return self._compare(len(self._lsSet.intersection(ls)), self._target)
 
     # def metatest(self, lg):
     #     """A method to be passd to TinyDB's .test() method to check whether a
@@ -299,11 +487,14 @@ class Num(Query):
     A Num query is of the form "Property 'num consonants' has value at least 4",
     or "Property 'num phonemes' has value at most 7"."""
 
+    __slots__ = ("property", "mode", "k")
+
     def __init__(self, property, mode, k, desc=defaultDesc[NUM]):
         """Create a Number based query comparing the value of the given property
         to the provided k value using the given mode.
         Can be read as 'Does property have a value of <comparison mode> k?'"""
 
+        mode = normalizeMode(mode)
         if mode not in [ EQ, NEQ, GT, LT, LEQ, GEQ ]:
             raise InvalidModeError(f"'{mode}' is not a valid mode for numerical queries!")
 
@@ -313,12 +504,8 @@ class Num(Query):
         if not isinstance(property, str):
             raise TypeError(f"'{property}' is not a valid property for numerical queries!")
 
-        self.mode = mode
-        self.k = k
-        self.property = property
-
-        self.descStr = desc
-        self.type = NUM
+        self._setFields(property=property, mode=mode, k=k, descStr=desc, type=NUM,
+                        _compare=COMPARATORS[mode])
 
     def query(self, db):
         """Execute this query on the specified database, returning the status code
@@ -328,6 +515,9 @@ class Num(Query):
         For Num queries, the cause field will be the specific numerical value
         of the relevant property for the matching language."""
 
+        if isinstance(db, sqldb.Database):
+            return self.querySQL(db)
+
         Lang = tinydb.Query()
         matches = db.search(Lang[self.property].test(self.test))
         matchingLangs = [Language(m) for m in matches]
@@ -338,18 +528,28 @@ class Num(Query):
         return createMatches(matchingLangs, causes, db, self)
 
     def test(self, n):
-        return compareByMode(self.mode, n, self.k)
+        return self._compare(n, self.k)
+
+    def sql(self):
+        sql = "SELECT lang_id FROM fields WHERE key = ? AND value %s ?" % sqlOperator(self.mode)
+        return sql, [self.property, self.k]
+
+    def cause(self, lang):
+        return getattr(lang, self.property)
 
 class String(Query):
     """Query.String is a class defining the properties of a string-based query
     from the user to the database.
     A String query is of the form "Property 'country' is equal to 'Ecuador'."""
 
+    __slots__ = ("property", "mode", "value")
+
     def __init__(self, property, mode, value, desc=defaultDesc[STRING]):
         """Create a String based query comparing the value of the given property
         to the provided value using the given mode.
         Only == and != are supported as modes for string based queries."""
 
+        mode = normalizeMode(mode)
         if mode is None:
             mode = EQ
 
@@ -362,12 +562,8 @@ class String(Query):
         if not isinstance(property, str):
             raise TypeError("'%s' is not a valid property for string queries!" % property)
 
-        self.mode = mode
-        self.value = value
-        self.property = property
-
-        self.descStr = desc
-        self.type = STRING
+        self._setFields(property=property, mode=mode, value=value, descStr=desc, type=STRING,
+                        _compare=COMPARATORS[mode])
 
     def query(self, db):
         """Execute this query on the specified database, returning the status code
@@ -377,6 +573,9 @@ class String(Query):
         For String queries, the cause will be the specific string value of
         the relevant property for the matching language."""
 
+        if isinstance(db, sqldb.Database):
+            return self.querySQL(db)
+
         Lang = tinydb.Query()
         matches = db.search(Lang[self.property].test(self.test))
         matchingLangs = [Language(m) for m in matches]
@@ -387,7 +586,14 @@ class String(Query):
         return createMatches(matchingLangs, causes, db, self)
 
     def test(self, s):
-        return compareByMode(self.mode, s, self.value)
+        return self._compare(s, self.value)
+
+    def sql(self):
+        sql = "SELECT lang_id FROM fields WHERE key = ? AND value %s ?" % sqlOperator(self.mode)
+        return sql, [self.property, self.value]
+
+    def cause(self, lang):
+        return getattr(lang, self.property)
 
 class Bool(Query):
     """Query.String is a class defining the properties of a boolean-based query
@@ -397,6 +603,8 @@ class Bool(Query):
     "X languages have tone."
     """
 
+    __slots__ = ("property", "value", "mode")
+
     def __init__(self, property, value, desc=defaultDesc[BOOL]):
 
         if value is None:
@@ -421,12 +629,8 @@ class Bool(Query):
         if not isinstance(property, str):
             raise TypeError(f"{property} is not a valid property for a boolean query")
 
-        self.property = property
-        self.value = value
-        self.mode = EQ
-
-        self.descStr = desc
-        self.type = BOOL
+        self._setFields(property=property, value=value, mode=EQ, descStr=desc, type=BOOL,
+                        _compare=COMPARATORS[EQ])
 
     def query(self, db):
         """Execute this query on the specified database, returning the status code
@@ -435,6 +639,9 @@ class Bool(Query):
         Results will be returned as a list of Match objects.
         For Bool queries, the cause will always be None."""
 
+        if isinstance(db, sqldb.Database):
+            return self.querySQL(db)
+
         Lang = tinydb.Query()
         matches = db.search(Lang[self.property].test(self.test))
         matchingLangs = [Language(m) for m in matches]
@@ -445,7 +652,11 @@ class Bool(Query):
         return createMatches(matchingLangs, causes, db, self)
 
     def test(self, b):
-        return compareByMode(self.mode, b, self.value)
+        return self._compare(b, self.value)
+
+    def sql(self):
+        sql = "SELECT lang_id FROM fields WHERE key = ? AND value %s ?" % sqlOperator(self.mode)
+        return sql, [self.property, self.value]
 
 
 class Always(Query):
@@ -454,6 +665,9 @@ class Always(Query):
 
     Results will be returned as a list of Match objects.
     For Always queries, the cause will always be None"""
+
+    __slots__ = ()
+
     def query(self, db):
         matches = db.all()
         matchingLangs = [Language(m) for m in matches]
@@ -467,5 +681,8 @@ class Never(Query):
 
     The Never query only ever returns an empty list.
     (i.e. a list of zero Match objects)"""
+
+    __slots__ = ()
+
     def query(self, db):
         return createMatches([], [], db, self)
@@ -42,9 +42,18 @@ A is the implicant, and B is the implicand.
 """
 
 import json
+import os
+import re
 from jinja2 import Template
 
+# orjson is several times faster than the json module, but optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from phonemes import isPhoneme
+from . import querier, stats
 
 #############################################################################
 #                           Join Modes
@@ -79,48 +88,25 @@ INFO = "info"              # Blue message
 WARN = "warning"           # Yellow message
 DANGER = "danger"          # Red message
 
-def respond(HTML, status, data=None):
-    """Given a string of HTML content and a status code, return a dictionary
-    as JSON containing the two fields.
-
-    The JSON returned should be suitable to send directly back to the client
-    for processing."""
-
-    resp = {
-        RET_CODE: status,
-        PAYLOAD: HTML,
-    }
-
-    if data is not None:
-        resp[DATA] = data
-
-    return json.dumps(resp, ensure_ascii=False)
-
-def quorumErrorHTML(err):
-    HTML = """
-    <span class=quote>There is as yet insufficient data for a meaningful answer.</span>
-    <br>
-    <span class=quoteattrib> -- Isaac Asmiov, 1956 </span>
-    <br><br>
-    Please check back later once more data has been gathered!"""
-    return HTML
-
-def serverErrorHTML(err):
-    HTML = """Sorry, an unknown server error occurred! Please let the developer know how you got this message so they can fix it."""
-    return HTML
+#############################################################################
+#                           Templates
+#############################################################################
+"""The templates of the HTML sent to the client, compiled once, when this
+module is imported, rather than on every request."""
 
-def generateHTML(results, listMode=False):
-    """Given a list of queries, and a list (of lists) containining one list of
-    matches for each of those queries (as tuples, described above),
-    return the string representation of the HTML that will be displayed
-    on the frontend in order to inform the user of the query results."""
+def compactHTML(HTML):
+    """Strip the comments and indentation from a template's HTML, collapsing
+    each run of whitespace into a single space (which renders the same)."""
+    HTML = re.sub(r"<!--.*?-->", "", HTML, flags=re.DOTALL)
+    return re.sub(r"\s+", " ", HTML).strip()
 
-    n = len(results) # which equals the number of queries
+def compileTemplate(HTML):
+    return Template(compactHTML(HTML))
 
-    # TODO move long pieces of HTML into separate directory e.g. templates?
-    # TODO oneQueryHTML should not have a col-md-4 - makes no sense
+# TODO move long pieces of HTML into separate directory e.g. templates?
+# TODO ONE_QUERY_HTML should not have a col-md-4 - makes no sense
 
-    oneQueryHTML = """
+ONE_QUERY_HTML = """
     {{ reply }}
 
     <!-- Show language list button, followed by the list itself -->
@@ -134,16 +120,12 @@ def generateHTML(results, listMode=False):
 
                 <!-- Which languages satisfy the query -->
                 <div class="col-md-4">
-                    <table class="lang-list-table"
-                        <tbody>
-                            {% for match in results[0] %}
-                            <tr>
-                                <td>{{ match.language.name() }}</td>
-                                <td>{{ match.cause }}</td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
+                    <table class="lang-list-table">
+                        <tbody>{{ rows[0] }}</tbody>
                     </table>
+                    {% if more[0] %}
+                    <a class="load-more-matches" data-url="{{ more[0] }}" onclick="loadMoreMatches(this)" style="cursor: pointer;">Show more languages...</a>
+                    {% endif %}
                 </div>
 
             </div>
@@ -154,7 +136,7 @@ def generateHTML(results, listMode=False):
     <div id="chart_div"></div>
     """
 
-    twoQueryHTML = """
+TWO_QUERY_HTML = """
     <h4>Non-implicational</h4>
     {{ unionReply }}
     <br>
@@ -167,6 +149,8 @@ def generateHTML(results, listMode=False):
     <br>
     {{ baReply }}
     <br>
+    {{ statsReply }}
+    <br>
 
     <!-- Show language list button, followed by the list itself -->
     <a data-toggle="collapse" data-target=".lang-list" onclick="toggleShowHideText(this)" style="cursor: pointer;margin-top: 10px;display: inline-block;">Show matching languages...</a>
@@ -180,31 +164,23 @@ def generateHTML(results, listMode=False):
                 <!-- Which languages satisfy the first query -->
                 <div class="col-md-4">
                     <h5>{{ aNum }} languages {{ aDesc }}</h5>
-                    <table class="lang-list-table"
-                        <tbody>
-                            {% for match in results[0] %}
-                            <tr>
-                                <td>{{ match.language.name() }}</td>
-                                <td>{{ match.cause }}</td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
+                    <table class="lang-list-table">
+                        <tbody>{{ rows[0] }}</tbody>
                     </table>
+                    {% if more[0] %}
+                    <a class="load-more-matches" data-url="{{ more[0] }}" onclick="loadMoreMatches(this)" style="cursor: pointer;">Show more languages...</a>
+                    {% endif %}
                 </div>
 
                 <!-- Which languages satisfy the second query -->
                 <div class="col-md-4">
                     <h5>{{ bNum }} languages {{ bDesc }}</h5>
-                    <table class="lang-list-table"
-                        <tbody>
-                            {% for match in results[1] %}
-                            <tr>
-                                <td>{{ match.language.name() }}</td>
-                                <td>{{ match.cause }}</td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
+                    <table class="lang-list-table">
+                        <tbody>{{ rows[1] }}</tbody>
                     </table>
+                    {% if more[1] %}
+                    <a class="load-more-matches" data-url="{{ more[1] }}" onclick="loadMoreMatches(this)" style="cursor: pointer;">Show more languages...</a>
+                    {% endif %}
                 </div>
 
             </div>
@@ -215,38 +191,143 @@ def generateHTML(results, listMode=False):
     <div id="chart_div"></div>
     """
 
-    rawHTML = ""
+# The rows of a list of matching languages, one per (name, cause)
+ROWS_HTML = """
+    {% for name, cause in rows %}
+    <tr>
+        <td>{{ name }}</td>
+        <td>{{ cause }}</td>
+    </tr>
+    {% endfor %}
+    """
+
+FRACTION_HTML = """
+    <span data-toggle="tooltip" title="" data-original-title="{{ percent }}% of languages matched">
+    {{ quantifier }} languages <span style="font-size: x-small;">({{ numerator }} / {{ denominator }})</span>
+    </span> {{ desc }}"""
+
+# The significance of the association between two queries (see app/stats.py)
+STATS_HTML = """
+    <span style="font-size: x-small;" data-toggle="tooltip" title=""
+          data-original-title="{{ table.a }} both, {{ table.b }} only the first, {{ table.c }} only the second, {{ table.d }} neither">
+    Fisher's exact test: {{ p }}, &phi; = {{ phi }}, lift = {{ lift }}
+    </span>"""
+
+ONE_QUERY_TEMPLATE = compileTemplate(ONE_QUERY_HTML)
+TWO_QUERY_TEMPLATE = compileTemplate(TWO_QUERY_HTML)
+ROWS_TEMPLATE = compileTemplate(ROWS_HTML)
+FRACTION_TEMPLATE = compileTemplate(FRACTION_HTML)
+STATS_TEMPLATE = compileTemplate(STATS_HTML)
+
+#############################################################################
+#                           Match lists
+#############################################################################
+"""Only the first PAGE_SIZE matching languages of each query are listed in a
+response. If there are more, the list ends in a link to the next page of them
+(see matchesPage() and the /matches/ route), which the frontend fetches when
+it is clicked, so a query matching thousands of languages still gets its reply
+right away."""
+
+PAGE_SIZE = int(os.environ.get("LINGDB_PAGE_SIZE", 100))
+
+# The most rows a single page may be asked for
+MAX_PAGE_SIZE = 1000
+
+def formatCause(cause):
+    """Return the cause of a match as it should be displayed: phonemes are
+    enclosed in /../, lists are joined with commas, and None is left blank."""
+    if cause is None:
+        return ""
+    if isinstance(cause, list):
+        return ", ".join("/%s/" % p if isPhoneme(p) else p for p in cause)
+    return cause
+
+def rowsHTML(matches, start=0, stop=None):
+    """Return the table rows listing matches[start:stop]."""
+    rows = [(match.language.name(), formatCause(match.cause)) for match in matches[start:stop]]
+    return ROWS_TEMPLATE.render(rows=rows)
+
+def matchesPage(matches, cursor, limit, pageURL):
+    """Return one page of a list of matching languages, from cursor (an index
+    into matches) on, as JSON: {"rows": <table rows>, "next": <URL of the next
+    page, or null>}. pageURL(cursor) returns the URL of the page at cursor."""
+    end = cursor + limit
+    return dumps({
+        "rows": rowsHTML(matches, cursor, end),
+        "next": pageURL(end) if end < len(matches) else None,
+    })
+
+def respond(HTML, status, data=None):
+    """Given a string of HTML content and a status code, return a dictionary
+    as JSON containing the two fields.
+
+    The JSON returned should be suitable to send directly back to the client
+    for processing."""
+
+    resp = {
+        RET_CODE: status,
+        PAYLOAD: HTML,
+    }
+
+    if data is not None:
+        resp[DATA] = data
+
+    return dumps(resp)
+
+def dumps(obj):
+    """Encode obj as compact JSON, with orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def quorumErrorHTML(err):
+    HTML = """
+    <span class=quote>There is as yet insufficient data for a meaningful answer.</span>
+    <br>
+    <span class=quoteattrib> -- Isaac Asmiov, 1956 </span>
+    <br><br>
+    Please check back later once more data has been gathered!"""
+    return HTML
+
+def serverErrorHTML(err):
+    HTML = """Sorry, an unknown server error occurred! Please let the developer know how you got this message so they can fix it."""
+    return HTML
+
+def generateHTML(results, listMode=False, pageURL=None, dataset=None):
+    """Given a list of queries, and a list (of lists) containining one list of
+    matches for each of those queries (as tuples, described above),
+    return the string representation of the HTML that will be displayed
+    on the frontend in order to inform the user of the query results.
+
+    If pageURL is given, only the first PAGE_SIZE matches of each query are
+    listed, followed by a link to pageURL(i, PAGE_SIZE), the next page of
+    matches of the ith query. Otherwise, every match is listed.
+
+    dataset is the name of the results' dataset, if known, so that its snapshot
+    can be used to tell which languages have data for each query."""
+
+    n = len(results) # which equals the number of queries
+
+    template = None
     if n == 1:
-        rawHTML = oneQueryHTML
+        template = ONE_QUERY_TEMPLATE
     elif n == 2:
-        rawHTML = twoQueryHTML
+        template = TWO_QUERY_TEMPLATE
     else:
         raise ValueError("Number of concurrent queries must be 1 or 2 (not %d)" % n)
 
-    # Iterate over all results and make the causes "prettier" to render
-    for matches in results:
-        for match in matches:
-
-            # Replace None causes with the empty string
-            if match.cause is None:
-                match.cause = ""
-
-            # Replace list causes with a prettier string.
-            # Phonemes are enclosed in /../ and brackets, quotation marks are removed
-            if type(match.cause) == type([]):
-                match.cause = ["/%s/" % p if isPhoneme(p) else p for p in match.cause ]
-                match.cause = ", ".join(match.cause)
+    replies = generateRepliesHTML(results, dataset)
 
-    replies = generateRepliesHTML(results)
-    replies["results"] = results # not sure if jinja needs this to be passed to use it in the template
-
-    template = Template(rawHTML)
+    stop = PAGE_SIZE if pageURL is not None else None
+    replies["rows"] = [rowsHTML(matches, 0, stop) for matches in results]
+    replies["more"] = [pageURL(i, stop) if stop is not None and len(matches) > stop else None
+                       for i, matches in enumerate(results)]
 
     HTML = template.render(replies)
 
     return HTML
 
-def generateRepliesHTML(results):
+def generateRepliesHTML(results, dataset=None):
     # TODO: Standardize naming.
     # "desc" refers to the latter half of the reply: e.g. "have stress"
     # "reply" refers to the entire string: "About half of languages (10 / 20) have stress"
@@ -270,21 +351,27 @@ def generateRepliesHTML(results):
 
         bNum
         bDesc
+
+        statsReply
     """
 
     n = len(results)
 
     replies = {}
 
+    # len() of a TinyDB database reads every language, so only do it once
+    numLanguages = len(results[0].db)
+
     if n == 1:
-        replies["reply"] = generateReplyHTML(results, UNION) # mode doesn't matter
+        replies["reply"] = generateReplyHTML(results, UNION, numLanguages) # mode doesn't matter
     elif n == 2:
-        replies["aReply"] = generateReplyHTML(results[:1], UNION) # TODO fix slice
-        replies["bReply"] = generateReplyHTML(results[1:], UNION)
-        replies["intersectionReply"] = generateReplyHTML(results, INTERSECTION)
-        replies["unionReply"] = generateReplyHTML(results, UNION)
-        replies["abReply"] = generateReplyHTML(results, A_IMPLIES_B)
-        replies["baReply"] = generateReplyHTML(results, B_IMPLIES_A)
+        replies["aReply"] = generateReplyHTML(results[:1], UNION, numLanguages) # TODO fix slice
+        replies["bReply"] = generateReplyHTML(results[1:], UNION, numLanguages)
+        replies["intersectionReply"] = generateReplyHTML(results, INTERSECTION, numLanguages)
+        replies["unionReply"] = generateReplyHTML(results, UNION, numLanguages)
+        replies["abReply"] = generateReplyHTML(results, A_IMPLIES_B, numLanguages)
+        replies["baReply"] = generateReplyHTML(results, B_IMPLIES_A, numLanguages)
+        replies["statsReply"] = generateStatsHTML(results, numLanguages, dataset)
 
         # TODO: add missing fields
         replies["aNum"] = len(results[0])
@@ -303,10 +390,12 @@ def getLanguageSetsFromResults(results):
     """
     return [matches.languageSet() for matches in results]
 
-def generateReplyHTML(results, joinMode):
+def generateReplyHTML(results, joinMode, numLanguages=None):
     """Given results, a list of Matches objects, generate the HTML of the reply
     in the format specified by the second argument (e.g. union, intersection, etc)
 
+    numLanguages is the number of languages in the results' database, if known.
+
     e.g.
 
     "Almost all languages (19/20) have tone"
@@ -328,7 +417,7 @@ def generateReplyHTML(results, joinMode):
     db = results[0].db
 
     numerator = len(langs)
-    denominator = len(db)
+    denominator = len(db) if numLanguages is None else numLanguages
 
     # TODO: Verify these indices aren't flipped around.
     if joinMode == A_IMPLIES_B:
@@ -351,11 +440,6 @@ def generateFractionHTML(numerator, denominator):
     "_About half of languages_ (9/20) {}"
 
     """
-    HTML = """
-    <span data-toggle="tooltip" title="" data-original-title="{{ percent }}% of languages matched">
-    {{ quantifier }} languages <span style="font-size: x-small;">({{ numerator }} / {{ denominator }})</span>
-    </span> {{ desc }}"""
-
     # avoid division by zero
     frac = 0
     if denominator != 0:
@@ -369,9 +453,31 @@ def generateFractionHTML(numerator, denominator):
         "desc": "{}", # Placeholder to be replaced in subsequent step.
     }
 
-    template = Template(HTML)
+    return FRACTION_TEMPLATE.render(**params)
 
-    return template.render(**params)
+def generateStatsHTML(results, numLanguages, dataset=None):
+    """Given the results of two queries over numLanguages languages, return HTML
+    describing how significantly they are associated, among the languages with
+    data for both:
+
+    "Fisher's exact test: p = 0.012, phi = 0.41, lift = 1.30"
+    """
+    known = (1 << numLanguages) - 1
+    for matches in results:
+        mask = querier.dataMask(matches.query, matches.db, dataset, numLanguages)
+        if mask is not None:
+            known &= mask
+    table = stats.fromResults(results, numLanguages, known)
+    p, phi, lift = stats.compute(table)
+
+    formatNumber = lambda x: "n/a" if x is None else "%.2f" % x
+    params = {
+        "table": table,
+        "p": "p < 0.001" if p < 0.001 else "p = %.3g" % p,
+        "phi": formatNumber(phi),
+        "lift": formatNumber(lift),
+    }
+    return STATS_TEMPLATE.render(**params)
 
 def mergeQueryDescs(queries, joinMode):
     """Given queries (a list of queries), and joinMode, one of
@@ -1,44 +1,212 @@
-from flask import render_template, redirect, request
+import logging
 
-from . import app, querier, responder
+from flask import Response, abort, jsonify, make_response, render_template, redirect, request
+
+from . import app, compression, httpcache, jobs, metrics, profiling, querier, responder
+from data import datasets
+
+logger = logging.getLogger(__name__)
+
+@profiling.profiled
+def handleForm(form):
+    """Run the queries in a query form (POSTed, or decoded from a /q/ URL),
+    and return (response body, status)."""
+    timer = metrics.RequestTimer()
+
+    # Build queries from request
+    with timer.phase(metrics.PARSE):
+        queries = querier.queriesFromForm(form)
+        db = querier.dbFromForm(form)
+
+    # Ask querier to run the query against the DB, and generate HTML response
+    HTML = ""
+    status = ""
+    results = None
+    graphData = None
+    try:
+        results = querier.handleQueries(queries, db, timer, dataset=form["dataset"])
+        with timer.phase(metrics.GRAPH_DATA):
+            graphData = querier.graphData(results[0], dataset=form["dataset"])
+        logger.debug("graph data: %s", graphData)
+        token = httpcache.tokenFromForm(form)
+        pageURL = lambda i, cursor: httpcache.matchesURL(token, i, cursor)
+        with timer.phase(metrics.RENDER):
+            HTML = responder.generateHTML(results, pageURL=pageURL, dataset=form["dataset"])
+        status = responder.INFO
+    except querier.QuorumError as err:
+        HTML = responder.quorumErrorHTML(err)
+        status = responder.WARN
+        logger.info("quorum error: %s", err)
+    except Exception as err:
+        HTML = responder.serverErrorHTML(err)
+        status = responder.DANGER
+        logger.exception("error while handling queries: %s", queries)
+
+    with timer.phase(metrics.RENDER):
+        body = responder.respond(HTML, status, data=graphData)
+
+    seconds = timer.finish(status)
+    logger.info("handled %d queries in %.1fms (%s)", len(queries), seconds * 1000, timer.serverTiming())
+
+    response = make_response(body)
+    response.headers["Server-Timing"] = timer.serverTiming()
+    return response, status
 
 @app.route("/", methods = ["GET", "POST"])
 def main():
     # Handle POST requests, which include queries for the DB
     if request.method == 'POST':
-
-        # Build queries from request
-        queries = querier.queriesFromRequest(request)
-        db = querier.dbFromRequest(request)
-
-        # Ask querier to run the query against the DB, and generate HTML response
-        HTML = ""
-        status = ""
-        results = None
-        graphData = None
-        try:
-            print("handling queries...")
-            results = querier.handleQueries(queries, db)
-            print("obtaining graph data...")
-            graphData = querier.graphData(results[0])
-            print("graph data:", graphData)
-            print("generating HTML...")
-            HTML = responder.generateHTML(results)
-            status = responder.INFO
-        except querier.QuorumError as err:
-            HTML = responder.quorumErrorHTML(err)
-            status = responder.WARN
-            print(err)
-        except Exception as err:
-            HTML = responder.serverErrorHTML(err)
-            status = responder.DANGER
-            print(err)
-
-        return responder.respond(HTML, status, data=graphData)
+        response, status = handleForm(request.form)
+        return response
 
     # Handle normal GET requests
     return render_template('front.html')
 
+def cachedResponse(dataset, key, handle):
+    """Return the response of handle() (which returns (response, status)) as a
+    publicly cacheable response, tagged with an ETag derived from key and the
+    version of dataset. If the client's copy is still current, answer 304 Not
+    Modified without calling handle() at all."""
+    try:
+        version = datasets.getDatasetVersion(dataset)
+    except KeyError:
+        abort(404)
+    tag = httpcache.etag(version, key)
+
+    # If the client's copy (compressed or not) is still current, don't even
+    # run the query
+    current = [t for t in compression.etagVariants(tag) if request.if_none_match.contains(t)]
+    if current:
+        response = make_response("", 304)
+        response.set_etag(current[0])
+        status = responder.INFO
+    else:
+        response, status = handle()
+        response.set_etag(tag)
+
+    if status == responder.DANGER or response.cache_control.no_store:
+        # Don't cache server errors, which may be transient, or responses that
+        # were marked uncacheable (e.g. profiled ones)
+        response.cache_control.no_store = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = httpcache.MAX_AGE
+    return response
+
+@app.route("/q/<token>")
+def cachedQuery(token):
+    """The canonical, cacheable GET form of a query (see app/httpcache.py)"""
+    try:
+        form, canonical = httpcache.decodeToken(token)
+    except ValueError:
+        abort(400)
+    if token != canonical:
+        return redirect(httpcache.queryURL(canonical), 301)
+
+    return cachedResponse(form["dataset"], token, lambda: handleForm(form))
+
+@profiling.profiled
+def handleMatchesPage(form, index, cursor, limit):
+    """Return (response body, status) for a page of the matching languages of
+    the index-th query in a query form."""
+    queries = querier.queriesFromForm(form)
+    if not 0 <= index < len(queries):
+        abort(400)
+    db = querier.dbFromForm(form)
+    try:
+        results = querier.handleQueries(queries, db, dataset=form["dataset"])
+    except querier.QuorumError:
+        # No languages were listed in the first place
+        abort(404)
+
+    token = httpcache.tokenFromForm(form)
+    # Following pages have the same limit (left out of the URL if it's the default)
+    pageLimit = None if limit == responder.PAGE_SIZE else limit
+    pageURL = lambda cursor: httpcache.matchesURL(token, index, cursor, pageLimit)
+    body = responder.matchesPage(results[index], cursor, limit, pageURL)
+    response = make_response(body)
+    response.mimetype = "application/json"
+    return response, responder.INFO
+
+@app.route("/matches/<token>")
+def matchesPage(token):
+    """A page of the languages matching one of the queries of a /q/ token: the
+    query'th query (default 0), starting from the cursor'th match (default 0)"""
+    try:
+        form, canonical = httpcache.decodeToken(token)
+    except ValueError:
+        abort(400)
+    index = request.args.get("query", 0, type=int)
+    cursor = request.args.get("cursor", 0, type=int)
+    limit = request.args.get("limit", responder.PAGE_SIZE, type=int)
+    if cursor < 0 or not 0 < limit <= responder.MAX_PAGE_SIZE:
+        abort(400)
+    if token != canonical:
+        return redirect(httpcache.matchesURL(canonical, index, cursor, request.args.get("limit", type=int)), 301)
+
+    key = "%s:%d:%d:%d" % (token, index, cursor, limit)
+    return cachedResponse(form["dataset"], key, lambda: handleMatchesPage(form, index, cursor, limit))
+
+@app.route("/jobs", methods = ["POST"])
+def submitJob():
+    """Submit a long-running analysis (see app/jobs.py), given as JSON:
+    {"analysis": name, "params": {...}}. Return the job, to poll for its result.
+    Only served with LINGDB_ADMIN=1."""
+    if not jobs.SUBMIT_ENABLED:
+        abort(404)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        abort(400)
+    try:
+        job = jobs.submit(body.get("analysis"), body.get("params", {}))
+    except ValueError as err:
+        return jsonify(error=str(err)), 400
+    response = jsonify(job)
+    response.status_code = 202 if job["state"] in (jobs.QUEUED, jobs.RUNNING) else 200
+    response.headers["Location"] = "/jobs/%s" % job["id"]
+    return response
+
+@app.route("/jobs/<jobId>")
+def getJob(jobId):
+    """A job's state and progress, and its result once it is done"""
+    job = jobs.get(jobId)
+    if job is None:
+        abort(404)
+    return jsonify(job)
+
+@app.route("/jobs/<jobId>/events")
+def jobEvents(jobId):
+    """A job's progress, streamed as server-sent events until it ends"""
+    if jobs.get(jobId) is None:
+        abort(404)
+    return Response(jobs.events(jobId), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"})
+
+@app.route('/metrics')
+def metricsEndpoint():
+    """Expose request counts and phase timings in the Prometheus text format"""
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@app.route('/admin/memory')
+def memoryEndpoint():
+    """Report the memory used by each loaded dataset and by the caches, or with
+    ?query=<token>, what running that /q/ query allocates (see app/memory.py).
+    Only served with LINGDB_ADMIN=1."""
+    # Imported here, so that `python -m app.memory` can run it as a script
+    from . import memory
+    if not memory.ENABLED:
+        abort(404)
+    token = request.args.get("query")
+    if token is None:
+        return jsonify(memory.report())
+    try:
+        form, canonical = httpcache.decodeToken(token)
+    except ValueError:
+        abort(400)
+    _, allocations = memory.traceAllocations(lambda: handleForm(form))
+    allocations["query"] = httpcache.queryURL(canonical)
+    return jsonify(allocations)
+
 @app.route('/index.html')
 def index():
     return redirect('/')
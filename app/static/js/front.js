@@ -35,27 +35,69 @@ function frontInit() {
   // Update the document with trait selectors from template
   traitSelectorInit();
 
-  // Iterate over constants in selectors_const.js, initializing all popovers / selectors
+  // Initialize the popovers / selectors whose bodies have already been
+  // fetched (e.g. if the page is being reset). The rest are initialized as
+  // they are selected, or once the page has finished loading.
   for (key in SELECTORS_DICT) {
-    var selector = SELECTORS_DICT[key];
-    var mode = selector["mode"];
-    var cls = selector["popover prefix"];
-    if (["boolean", "no query"].includes(mode)) continue;
-    else if (mode == "pick k ipa") {
+    var cls = SELECTORS_DICT[key]["popover prefix"];
+    if (loadedPopoverBodies[cls]) initSelector(SELECTORS_DICT[key]);
+  }
+
+  reloadPopovers();
+  reloadTooltips();
+
+  initGraphs();
+
+  prefetchPopoverBodies();
+}
+
+// Popover bodies are not part of the page; they are fetched from the URLs in
+// POPOVER_FRAGMENTS (see gen/allgen.py) into #popover-templates when they are
+// first needed. Maps each popover prefix to a promise of its body.
+var loadedPopoverBodies = {};
+
+// Return a promise that resolves once the popover body for cls is in the page
+function loadPopoverBody(cls) {
+  if (!loadedPopoverBodies[cls]) {
+    loadedPopoverBodies[cls] = $.get(POPOVER_FRAGMENTS[cls], null, null, "html")
+      .then(function(html) { $("#popover-templates").append(html); });
+  }
+  return loadedPopoverBodies[cls];
+}
+
+// Fetch (if necessary) the popover body of the given selector, then initialize
+// its popovers / selectors
+function initSelector(selector) {
+  var mode = selector["mode"];
+  var cls = selector["popover prefix"];
+  if (["boolean", "no query"].includes(mode)) return;
+  if (!POPOVER_FRAGMENTS[cls]) {
+    console.error(`No popover body for ${cls}`);
+    return;
+  }
+
+  loadPopoverBody(cls).then(function() {
+    if (mode == "pick k ipa") {
       initIPAChart(cls);
     }
     else if (["pick one", "pick class", "pick multi", "pick k"].includes(mode)){
       initPopovers(cls);
     }
     else {
-      console.err("Attempted to initialize a selector with unrecognized mode");
+      console.error("Attempted to initialize a selector with unrecognized mode");
     }
-  }
-
-  reloadPopovers();
-  reloadTooltips();
+  });
+}
 
-  initGraphs();
+// Once the page is idle, fetch the popover bodies that haven't been yet, so
+// that they are ready before they are selected
+function prefetchPopoverBodies() {
+  var idle = window.requestIdleCallback || function(f) { setTimeout(f, 1000); };
+  idle(function() {
+    for (key in SELECTORS_DICT) {
+      initSelector(SELECTORS_DICT[key]);
+    }
+  });
 }
 
 // Initialize trait selector divs by replacing the placeholder trait selectors
@@ -182,6 +224,10 @@ function handleTraitSelect(element) {
   $selElement.removeClass("inactive");
   $selElement.addClass("active");
 
+  // Make sure its popover body has been fetched
+  var selector = SELECTORS_DICT[$selElement.attr("type")];
+  if (selector) initSelector(selector);
+
   // Clear the results
   resetResults();
 }
@@ -214,6 +260,22 @@ function handleModeSelect(el) {
   }
 }
 
+// Fetch the next page of a list of matching languages (see the /matches/ route
+// in routes.py), and append it to the list. The link then points to the page
+// after that, or is removed if there are no more.
+function loadMoreMatches(link) {
+  var $link = $(link);
+  $.getJSON($link.attr("data-url"), function(page) {
+    $link.prev(".lang-list-table").children("tbody").append(page.rows);
+    if (page.next) {
+      $link.attr("data-url", page.next);
+    }
+    else {
+      $link.remove();
+    }
+  });
+}
+
 // Get the text of the calling element, and replace the word "Hide" with "Show"
 // or vice versa
 function toggleShowHideText(el) {
@@ -791,17 +853,34 @@ function handleSubmit(responseType) {
     return;
   }
 
-  var payload = "payload=" + JSON.stringify(requests);
-  // Hacky: build a request string from params directly.
-  payload += `&listMode=${listMode}`;
-  payload += `&dataset=${DATASET}`;
-  payload += `&responseType=${responseType}`;
+  // Send the query as a GET to its canonical URL, so that the browser (and
+  // any proxy in front of the server) can cache the response
+  var url = "/q/" + queryToken(DATASET, requests);
+
+  console.log("Sending query: " + url);
+  $.get(url, callback, "text");
+}
 
-  console.log("Sending post with payload: " + payload);
-  $.post("/",
-         payload,
-         callback
-       );
+// Return the token of the canonical URL of a query (see app/httpcache.py):
+// the URL-safe base64 encoding of its JSON, with sorted keys and no whitespace
+function queryToken(dataset, requests) {
+  var json = JSON.stringify(sortKeys({"dataset": dataset, "payload": requests}));
+  var binary = "";
+  for (var b of new TextEncoder().encode(json)) {
+    binary += String.fromCharCode(b);
+  }
+  return btoa(binary).replace(/\+/g, "-").replace(/\//g, "_").replace(/=+$/, "");
+}
+
+// Return a copy of value in which every object's keys are in sorted order
+function sortKeys(value) {
+  if (Array.isArray(value)) return value.map(sortKeys);
+  if (value === null || typeof value !== "object") return value;
+  var sorted = {};
+  for (var key of Object.keys(value).sort()) {
+    sorted[key] = sortKeys(value[key]);
+  }
+  return sorted;
 }
 
 // Handle clicks on the collapsible list button
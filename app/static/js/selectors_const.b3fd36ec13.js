@@ -0,0 +1,3 @@
+/* Automatically generated by gen/allgen.py. DO NOT EDIT! */
+var SELECTORS_DICT={"affixal-freq-selector":{"html id":"affixal-freq-selector","mode":"pick one","popover prefix":"af-lbox-popover","reply":"use %s to form words","reply vars":["sel"]},"complex-consonants-selector":{"html id":"complex-consonants-selector","mode":"boolean","popover prefix":null,"reply":"contain complex consonants","reply vars":null},"consonant-articulation-selector":{"html id":"consonant-articulation-selector","mode":"pick multi","popover prefix":"ca-lbox-popover","reply":"contain %s %s %s of consonant articulation","reply vars":["mode","k","sel"]},"consonant-class-selector":{"html id":"consonant-class-selector","mode":"pick class","popover prefix":"ccbox-popover","reply":"contain %s %s of %s","reply vars":["mode","k","selList"]},"consonant-type-selector":{"html id":"consonant-type-selector","mode":"pick multi","popover prefix":"ct-lbox-popover","reply":"have %s %s of %s consonants","reply vars":["mode","k","selList"]},"endangerment-selector":{"html id":"endangerment-selector","mode":"pick multi","popover prefix":"ebox-popover","reply":"have an endangerment level that matches %s %s of %s","reply vars":["mode","k","selList"]},"functional-morphology-selector":{"html id":"functional-morphology-selector","mode":"pick multi","popover prefix":"fm-lbox-popover","reply":"use %s %s of the following functional morphologies: %s","reply vars":["mode","k","selList"]},"headedness-selector":{"html id":"headedness-selector","mode":"pick multi","popover prefix":"h-lbox-popover","reply":"are %s %s of %s","reply vars":["mode","k","selList"]},"ipa-consonant-selector":{"html id":"ipa-consonant-selector","mode":"pick k ipa","popover prefix":"ipacbox-popover","reply":"contain %s %s of %s","reply vars":["mode","k","selList"]},"ipa-vowel-selector":{"html id":"ipa-vowel-selector","mode":"pick k ipa","popover prefix":"ipavbox-popover","reply":"contain %s %s of %s","reply vars":["mode","k","selList"]},"metaclass-selector":{"html id":"metaclass-selector","mode":"pick multi","popover prefix":"mc-lbox-popover","reply":"have %s %s phoneme that is %s","reply vars":["mode","k","selList"]},"morphological-selector":{"html id":"morphological-selector","mode":"pick multi","popover prefix":"m-lbox-popover","reply":"use %s %s of the morphological types %s","reply vars":["mode","k","selList"]},"nonaffixal-freq-selector":{"html id":"nonaffixal-freq-selector","mode":"pick one","popover prefix":"nf-lbox-popover","reply":"use %s strategies to form words","reply vars":["sel"]},"phoneme-inventory-size-selector":{"html id":"phoneme-inventory-size-selector","mode":"pick multi","popover prefix":"pi-lbox-popover","reply":"have a phoneme inventory with %s %s %s","reply vars":["mode","k","sel"]},"placeholder-selector":{"html id":"placeholder-selector","mode":"no query"},"stress-selector":{"html id":"stress-selector","mode":"pick one","popover prefix":"ss-lbox-popover","reply":"have %s stress","reply vars":["sel"]},"syllable-selector":{"html id":"syllable-selector","mode":"pick multi","popover prefix":"s-lbox-popover","reply":"use %s %s of the syllable structures %s","reply vars":["mode","k","selList"]},"tone-selector":{"html id":"tone-selector","mode":"boolean","popover prefix":null,"reply":"have tone","reply vars":null},"vowel-class-selector":{"html id":"vowel-class-selector","mode":"pick class","popover prefix":"vcbox-popover","reply":"contain %s %s of %s","reply vars":["mode","k","selList"]},"vowel-type-selector":{"html id":"vowel-type-selector","mode":"pick multi","popover prefix":"vt-lbox-popover","reply":"have %s %s of %s vowels","reply vars":["mode","k","selList"]},"word-formation-selector":{"html id":"word-formation-selector","mode":"pick multi","popover prefix":"wf-lbox-popover","reply":"use %s %s of %s to form words","reply vars":["mode","k","selList"]},"word-order-selector":{"html id":"word-order-selector","mode":"pick multi","popover prefix":"wo-lbox-popover","reply":"have %s %s of %s word orders","reply vars":["mode","k","selList"]}};
+var POPOVER_FRAGMENTS={"af-lbox-popover":"/static/popovers/af-lbox-popover.1cc783e0b8.html","ca-lbox-popover":"/static/popovers/ca-lbox-popover.6a0713e586.html","ccbox-popover":"/static/popovers/ccbox-popover.a8fd87b020.html","ct-lbox-popover":"/static/popovers/ct-lbox-popover.1d060e191c.html","ebox-popover":"/static/popovers/ebox-popover.4b907ab923.html","fm-lbox-popover":"/static/popovers/fm-lbox-popover.e42c9a6f3f.html","h-lbox-popover":"/static/popovers/h-lbox-popover.5e9294947b.html","ipacbox-popover":"/static/popovers/ipacbox-popover.617b639a24.html","ipavbox-popover":"/static/popovers/ipavbox-popover.0881970b24.html","m-lbox-popover":"/static/popovers/m-lbox-popover.3aded6a4e1.html","mc-lbox-popover":"/static/popovers/mc-lbox-popover.1cdd97cbf5.html","nf-lbox-popover":"/static/popovers/nf-lbox-popover.4faeb21036.html","pi-lbox-popover":"/static/popovers/pi-lbox-popover.b509d9f565.html","s-lbox-popover":"/static/popovers/s-lbox-popover.c286187978.html","ss-lbox-popover":"/static/popovers/ss-lbox-popover.05f98da656.html","vcbox-popover":"/static/popovers/vcbox-popover.121ed1abda.html","vt-lbox-popover":"/static/popovers/vt-lbox-popover.dcc86c16cd.html","wf-lbox-popover":"/static/popovers/wf-lbox-popover.9854093e37.html","wo-lbox-popover":"/static/popovers/wo-lbox-popover.bc7f6e57d1.html"};
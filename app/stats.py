@@ -0,0 +1,162 @@
+"""stats.py measures how strongly the results of two queries are associated,
+from their 2x2 contingency table: of the n languages of a dataset that have
+data for both queries' properties,
+
+    a   match both queries      b   match only the first
+    c   match only the second   d   match neither
+
+For each table it computes:
+    p       the two-sided p-value of Fisher's exact test (the probability of
+            a table at least as extreme as this one, if the queries were
+            independent)
+    phi     the phi coefficient, a correlation between -1 and 1
+    lift    how many times more often languages match both queries than
+            they would if the queries were independent
+
+Fisher's test sums hypergeometric probabilities, which are computed from a
+table of log factorials. The table is built once for each dataset size, after
+which a test only costs a few dozen additions and exp()s, so pairwise() can
+test thousands of pairs of queries (given as bitmasks of their matches) at once.
+
+Languages missing data for either query are left out of its table, rather than
+counted as matching neither: missing answers cluster (e.g. a student who skipped
+one survey), and would otherwise show up as associations.
+"""
+
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+from data.snapshot import popcount, rowMask
+
+Table = namedtuple("Table", ["a", "b", "c", "d"])
+Stats = namedtuple("Stats", ["p", "phi", "lift"])
+
+# Tables whose probability is within this (relative) tolerance of the observed
+# table's count as being as extreme as it, so rounding can't exclude ties
+LOG_TOLERANCE = 1e-7
+
+# Tail probabilities smaller than the observed table's by this factor (e^-40)
+# no longer affect the p-value, so fisher() stops summing them
+LOG_NEGLIGIBLE = 40
+
+@lru_cache(maxsize=16)
+def logFactorials(n) -> list:
+    """Return [log(0!), log(1!), ..., log(n!)]."""
+    table = [0.0] * (n + 1)
+    for k in range(2, n + 1):
+        table[k] = table[k - 1] + math.log(k)
+    return table
+
+def fromCounts(numA, numB, numBoth, n) -> Table:
+    """Return the table of two queries matching numA and numB of n languages,
+    numBoth of them the same."""
+    return Table(numBoth, numA - numBoth, numB - numBoth, n - numA - numB + numBoth)
+
+def fromMasks(maskA, maskB, known) -> Table:
+    """Return the table of two queries matching the languages (rows) in the
+    bitmasks maskA and maskB, counting only the languages in the bitmask known."""
+    maskA &= known
+    maskB &= known
+    return fromCounts(popcount(maskA), popcount(maskB), popcount(maskA & maskB), popcount(known))
+
+def fromResults(results, n, known=None) -> Table:
+    """Return the table of a pair of Matches (see app/query.py) from a dataset
+    of n languages, counting only the languages (rows) in the bitmask known
+    (by default, all of them)."""
+    if known is None:
+        known = (1 << n) - 1
+    maskA, maskB = (rowMask((m.language.data.doc_id - 1 for m in matches), n) for matches in results)
+    return fromMasks(maskA, maskB, known)
+
+def fisher(table, logFact=None) -> float:
+    """Return the two-sided p-value of Fisher's exact test for table. logFact
+    must be logFactorials(n) (or longer), where n is the sum of the table."""
+    a, b, c, d = table
+    n = a + b + c + d
+    if logFact is None:
+        logFact = logFactorials(n)
+    row1, row2, col1, col2 = a + b, c + d, a + c, b + d
+    constant = logFact[row1] + logFact[row2] + logFact[col1] + logFact[col2] - logFact[n]
+
+    def logP(x):
+        """The log probability of the table with x in its top left corner."""
+        return constant - logFact[x] - logFact[row1 - x] - logFact[col1 - x] - logFact[row2 - col1 + x]
+
+    lo, hi = max(0, col1 - row2), min(row1, col1)
+    threshold = logP(a) + LOG_TOLERANCE
+    negligible = threshold - LOG_NEGLIGIBLE
+
+    def tail(x, step):
+        """Sum the probabilities from x away from the mode, until they are
+        negligible (they only decrease)."""
+        total = 0.0
+        while lo <= x <= hi:
+            lp = logP(x)
+            if lp < negligible:
+                break
+            total += math.exp(lp)
+            x += step
+        return total
+
+    # The probabilities increase up to the mode, then decrease. The tables as
+    # extreme as a are the tail beyond a on its side of the mode, and the tail
+    # beyond the first table on the other side that is no more likely than a.
+    mode = (row1 + 1) * (col1 + 1) // (n + 2)
+    if a <= mode:
+        p = tail(a, -1)
+        # Find the first x in [start, hi] with logP(x) <= threshold
+        start, end = max(mode, a + 1), hi + 1
+        while start < end:
+            mid = (start + end) // 2
+            if logP(mid) <= threshold:
+                end = mid
+            else:
+                start = mid + 1
+        p += tail(start, 1)
+    else:
+        p = tail(a, 1)
+        # Find the last x in [lo, mode] with logP(x) <= threshold
+        start, end = lo - 1, mode
+        while start < end:
+            mid = (start + end + 1) // 2
+            if logP(mid) <= threshold:
+                start = mid
+            else:
+                end = mid - 1
+        p += tail(start, -1)
+    return min(p, 1.0)
+
+def phi(table):
+    """Return the phi coefficient of table, or None if a row or column is empty."""
+    a, b, c, d = table
+    denominator = (a + b) * (c + d) * (a + c) * (b + d)
+    if denominator == 0:
+        return None
+    return (a * d - b * c) / math.sqrt(denominator)
+
+def lift(table):
+    """Return the lift of table, P(A and B) / (P(A) P(B)), or None if either
+    query matched no languages."""
+    a, b, c, d = table
+    denominator = (a + b) * (a + c)
+    if denominator == 0:
+        return None
+    return a * (a + b + c + d) / denominator
+
+def compute(table, logFact=None) -> Stats:
+    return Stats(fisher(table, logFact), phi(table), lift(table))
+
+def pairwise(masks, n, dataMasks=None):
+    """Given bitmasks of the languages (out of n) matching each of several
+    queries, and of the languages with data for each (None for all of them),
+    yield (i, j, table, stats) for every pair of queries i < j."""
+    logFact = logFactorials(n)
+    everything = (1 << n) - 1
+    if dataMasks is None:
+        dataMasks = [None] * len(masks)
+    dataMasks = [everything if mask is None else mask for mask in dataMasks]
+    for i, maskA in enumerate(masks):
+        for j in range(i + 1, len(masks)):
+            table = fromMasks(maskA, masks[j], dataMasks[i] & dataMasks[j])
+            yield i, j, table, compute(table, logFact)
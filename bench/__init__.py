@@ -0,0 +1,23 @@
+"""Benchmarks for the query, render and data pipeline paths.
+
+Run every benchmark on the latest real dataset and on every synthetic dataset
+(see data/synthetic.py), comparing the results against bench/baseline.json:
+
+    python -m bench
+
+Other useful invocations:
+
+    # Benchmark particular datasets
+    python -m bench F17 _syn10k
+
+    # Only run the query benchmarks, and save the results
+    python -m bench -k query -o results.json
+
+    # Record the current timings as the baseline to compare against
+    python -m bench --save-baseline
+
+Timings depend heavily on the machine, so a baseline is only meaningful on the
+machine that recorded it; bench/baseline.json is not checked in.
+
+See bench/load.py for load testing the app as a whole.
+"""
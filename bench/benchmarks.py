@@ -0,0 +1,120 @@
+"""The benchmarks themselves.
+
+Each benchmark is a function that takes the name of a dataset and returns a
+Case: a function to be timed (run), and optionally a function to be called
+(untimed) before each run to prepare its arguments (setup).
+
+Benchmarks are registered with the @benchmark decorator, which can restrict
+them to the datasets they make sense for.
+"""
+
+from app import httpcache, querier, responder
+from app.query import List, Num, String, Bool
+from data import const, csv_to_json, datasets, json_to_db
+from . import payloads
+
+# Every registered benchmark, in order of registration
+BENCHMARKS = []
+
+class Case:
+    """One benchmark, prepared to run on one dataset."""
+
+    def __init__(self, run, setup=None):
+        self.run = run
+        self.setup = setup or (lambda: ())
+
+class Benchmark:
+    def __init__(self, name, func, applies):
+        self.name = name
+        self.func = func
+        self.applies = applies
+
+    def prepare(self, dataset) -> Case:
+        return self.func(dataset)
+
+def anyDataset(dataset):
+    return True
+
+def isSynthetic(dataset):
+    return dataset.startswith(const.SYNTHETIC_PREFIX)
+
+def hasCSV(dataset):
+    """Only real semesters have CSV files to convert."""
+    return not dataset.startswith('_') and csv_to_json.get_path(dataset, const.Surveys.GRAMMAR.value).exists()
+
+def benchmark(name, applies=anyDataset):
+    """Register the decorated function as a benchmark named name, to be run on
+    every dataset for which applies(dataset) is true."""
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, func, applies))
+        return func
+    return decorator
+
+def freshDatabase(dataset):
+    """Return the dataset's database, with TinyDB's query cache cleared, so
+    that searches really are repeated."""
+    db = datasets.getDatabase(dataset)
+    db.clear_cache()
+    return db
+
+def queryCase(query):
+    return lambda dataset: Case(lambda: query.query(freshDatabase(dataset)))
+
+def resultsFor(payload, dataset):
+    """Return a function that evaluates the queries of payload on dataset."""
+    def results():
+        queries = querier.queriesFromRequest(payloads.FakeRequest(payload, dataset))
+        return (querier.handleQueries(queries, freshDatabase(dataset)),)
+    return results
+
+#############################################################################
+#                               Benchmarks
+#############################################################################
+
+@benchmark("queriesFromRequest")
+def parseRequests(dataset):
+    requests = [payloads.FakeRequest(p, dataset) for p in payloads.SAMPLE_PAYLOADS.values()]
+    def run():
+        for request in requests:
+            querier.queriesFromRequest(request)
+    return Case(run)
+
+benchmark("List.query")(queryCase(List("consonants", "at least", 2, ["p", "t", "k"])))
+benchmark("List.metaquery")(queryCase(List(["consonants", "vowels"], "at least", 1, ["b", "d", "g", "a"])))
+benchmark("Num.query")(queryCase(Num("num consonants", "at least", 20)))
+benchmark("String.query")(queryCase(String("affixal word formation frequency", "exactly", "exclusively suffixing")))
+benchmark("Bool.query")(queryCase(Bool("tone", True)))
+
+@benchmark("handleQuery")
+def handleQuery(dataset):
+    query = List("consonants", "at least", 2, ["p", "t", "k"])
+    return Case(lambda: querier.handleQuery(query, freshDatabase(dataset)))
+
+@benchmark("graphData")
+def graphData(dataset):
+    results = resultsFor(payloads.SAMPLE_PAYLOADS["list-metaclass"], dataset)
+    return Case(lambda results: querier.graphData(results[0], dataset=dataset), setup=results)
+
+# Renders the first page of each list of matches, as the app does
+def pageURL(i, cursor):
+    return httpcache.matchesURL("token", i, cursor)
+
+@benchmark("generateHTML[1 query]")
+def generateHTML1(dataset):
+    results = resultsFor(payloads.SAMPLE_PAYLOADS["list-consonants"], dataset)
+    return Case(lambda results: responder.generateHTML(results, pageURL=pageURL), setup=results)
+
+@benchmark("generateHTML[2 queries]")
+def generateHTML2(dataset):
+    results = resultsFor(payloads.SAMPLE_PAYLOADS["two-queries"], dataset)
+    return Case(lambda results: responder.generateHTML(results, pageURL=pageURL), setup=results)
+
+@benchmark("Dataset.from_semester", applies=hasCSV)
+def fromSemester(dataset):
+    return Case(lambda: csv_to_json.Dataset.from_semester(dataset))
+
+# convert() rewrites the dataset's .db file, so only run it on synthetic
+# datasets, never on the ones checked into git
+@benchmark("json_to_db.convert", applies=isSynthetic)
+def convert(dataset):
+    return Case(lambda: json_to_db.convert(dataset))
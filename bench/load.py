@@ -0,0 +1,177 @@
+"""Load test the app: replay realistic query payloads (see bench/payloads.py)
+against routes.main, and report latency percentiles and throughput for several
+concurrency levels and datasets.
+
+By default requests are sent in-process through the Flask test client. Since
+the app is deployed on sync gunicorn workers, which handle one request at a
+time, in-process requests are also handled one at a time; with concurrency > 1
+the extra clients simply queue, as they would for a single worker.
+
+Alternatively, --url sends real HTTP requests to a running server, e.g.
+
+    gunicorn app:app -w 1 &
+    python -m bench.load --url http://127.0.0.1:8000
+
+Usage:
+    # 200 requests at each of concurrency 1, 4 and 16, against F25
+    python -m bench.load
+
+    # Compare datasets of different sizes, and save the results
+    python -m bench.load -d F25,_syn10k -c 1,8 -n 50 -o load.json
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from . import payloads
+
+DEFAULT_CONCURRENCY = "1,4,16"
+DEFAULT_DATASETS = "F25"
+DEFAULT_REQUESTS = 200
+
+def percentile(sortedValues, p):
+    """Return the p-th percentile (0-100) of sortedValues, by nearest rank."""
+    if not sortedValues:
+        return float("nan")
+    rank = max(int(round(p / 100 * len(sortedValues))), 1)
+    return sortedValues[min(rank, len(sortedValues)) - 1]
+
+class InProcessClient:
+    """Sends requests through the Flask test client, one at a time."""
+
+    lock = threading.Lock()
+
+    def __init__(self):
+        from app import app
+        self.client = app.test_client()
+
+    def post(self, form):
+        """POST form to "/", and return (HTTP status, response body)."""
+        with self.lock:
+            response = self.client.post("/", data=form)
+            return response.status_code, response.get_data(as_text=True)
+
+class HTTPClient:
+    """Sends requests to a running server."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def post(self, form):
+        data = urllib.parse.urlencode(form).encode("utf-8")
+        try:
+            with urllib.request.urlopen(self.url, data=data) as response:
+                return response.status, response.read().decode("utf-8")
+        except urllib.error.HTTPError as err:
+            return err.code, ""
+
+def isError(status, body):
+    """Was the request a failure? Quorum warnings are legitimate responses,
+    but server errors are reported with a "danger" code."""
+    if status != 200:
+        return True
+    try:
+        return json.loads(body).get("code") == "danger"
+    except ValueError:
+        return True
+
+def runLevel(makeClient, forms, concurrency):
+    """Send every form in forms, from concurrency threads at once, and return
+    a dict describing the latencies and throughput."""
+    latencies = []
+    errors = [0]
+    nextForm = iter(forms)
+    lock = threading.Lock()
+
+    def worker():
+        client = makeClient()
+        while True:
+            with lock:
+                form = next(nextForm, None)
+            if form is None:
+                return
+            start = time.perf_counter()
+            status, body = client.post(form)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += isError(status, body)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+def run(makeClient, datasetNames, concurrencies, numRequests, seed=0, log=print):
+    """Run every concurrency level against every dataset, and return the results."""
+    log("%-12s %5s %8s %7s %10s %9s %9s %9s" % (
+        "dataset", "conc", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms"))
+    results = []
+    for dataset in datasetNames:
+        # Every level replays the same payloads, so levels are comparable
+        rng = random.Random(seed)
+        forms = [payloads.form(payloads.randomPayload(rng), dataset) for _ in range(numRequests)]
+
+        # Warm up (e.g. open the database) before timing anything
+        makeClient().post(forms[0])
+
+        for concurrency in concurrencies:
+            result = runLevel(makeClient, forms, concurrency)
+            result["dataset"] = dataset
+            results.append(result)
+            log("%-12s %5d %8d %7d %10.1f %9.1f %9.1f %9.1f" % (
+                dataset, concurrency, result["requests"], result["errors"], result["throughput"],
+                result["p50"] * 1000, result["p95"] * 1000, result["p99"] * 1000))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the app.")
+    parser.add_argument('-c', '--concurrency', default=DEFAULT_CONCURRENCY,
+                        help='comma-separated concurrency levels (default: %(default)s)')
+    parser.add_argument('-d', '--datasets', default=DEFAULT_DATASETS,
+                        help='comma-separated datasets to query (default: %(default)s)')
+    parser.add_argument('-n', '--requests', type=int, default=DEFAULT_REQUESTS,
+                        help='requests per concurrency level (default: %(default)s)')
+    parser.add_argument('--url',
+                        help='send requests to the server at this URL, instead of in-process')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed for the generated payloads (default: %(default)s)')
+    parser.add_argument('-o', '--output',
+                        help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if args.url:
+        makeClient = lambda: HTTPClient(args.url)
+    else:
+        makeClient = InProcessClient
+
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    datasetNames = args.datasets.split(",")
+    results = run(makeClient, datasetNames, concurrencies, args.requests, seed=args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
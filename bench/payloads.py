@@ -0,0 +1,83 @@
+"""Realistic query payloads, shaped like the ones the frontend POSTs to "/",
+for use by the benchmarks and the load tester.
+
+A payload is a list of one or two query dicts, which is JSON-encoded into the
+"payload" field of the request form (see querier.queriesFromRequest).
+"""
+
+import json
+import random
+
+from data import selectors
+from data.selectors import choices
+
+# Hand-picked payloads covering each kind of Query.
+# The first is the payload of test/test_querier.py
+SAMPLE_PAYLOADS = {
+    "list-metaclass": [
+        {"mode": "at least", "k": "1", "selList": ["voiced"],
+         "trait": "metaclass-selector", "reply": "have at least 1 phoneme that is voiced"},
+    ],
+    "list-consonants": [
+        {"mode": "at least", "k": "2", "selList": ["p", "t", "k"],
+         "trait": "ipa-consonant-selector", "reply": "contain at least 2 of p, t, k"},
+    ],
+    "num": [
+        {"mode": "at least", "k": "28", "selList": ["vowels"], "sel": "vowels",
+         "trait": "phoneme-inventory-size-selector",
+         "reply": "have a phoneme inventory with at least 28 vowels"},
+    ],
+    "string": [
+        {"selList": ["exclusively suffixing"], "sel": "exclusively suffixing",
+         "trait": "affixal-freq-selector", "reply": "use exclusively suffixing to form words"},
+    ],
+    "bool": [
+        {"trait": "tone-selector", "reply": "have tone"},
+    ],
+    "two-queries": [
+        {"trait": "tone-selector", "reply": "have tone"},
+        {"mode": "at least", "k": "1", "selList": ["mostly head-final"],
+         "trait": "headedness-selector", "reply": "are at least 1 of mostly head-final"},
+    ],
+}
+
+def randomQuery(rng: random.Random):
+    """Return a random query dict, for a random trait, like one the frontend
+    might send."""
+    queryable = [s for s in selectors.SELECTORS if s[selectors.MODE] != selectors.NO_QUERY]
+    selector = rng.choice(queryable)
+    trait = selector[selectors.HTML_ID]
+    replyVars = selector[selectors.REPLY_VARS] or []
+
+    queryData = {"trait": trait, "reply": "match a random query for %s" % trait}
+    if "sel" in replyVars:
+        queryData["sel"] = rng.choice(choices(selector))
+    if "selList" in replyVars:
+        options = choices(selector)
+        queryData["selList"] = rng.sample(options, rng.randint(1, min(4, len(options))))
+    if "mode" in replyVars:
+        queryData["mode"] = rng.choice(["at least", "at most", "exactly", "more than"])
+        if "selList" in queryData:
+            queryData["k"] = str(rng.randint(0, len(queryData["selList"])))
+        else:
+            queryData["k"] = str(rng.randint(0, 40))
+    return queryData
+
+def randomPayload(rng: random.Random):
+    """Return a random payload of one or two queries."""
+    return [randomQuery(rng) for _ in range(rng.choice([1, 1, 2]))]
+
+def form(payload, dataset, listMode=False):
+    """Return the request form the frontend would POST for payload."""
+    return {
+        "payload": json.dumps(payload),
+        "dataset": dataset,
+        "listMode": json.dumps(listMode),
+    }
+
+class FakeRequest:
+    """Just enough of a flask.Request for querier.queriesFromRequest and
+    querier.dbFromRequest."""
+
+    def __init__(self, payload, dataset):
+        self.form = form(payload, dataset)
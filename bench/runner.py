@@ -0,0 +1,140 @@
+"""Run the benchmarks, and compare their results against a stored baseline.
+
+Results are written as JSON of the form:
+
+    {
+        "meta": {"python": "3.9.7", "platform": "...", "time": "..."},
+        "results": {
+            "List.query[F25]": {"runs": 5, "min": 0.0012, "median": 0.0013, "mean": 0.0013},
+            ...
+        }
+    }
+
+and a baseline is simply a results file saved from an earlier run.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+from data import const, csv_to_json, datasets
+from .benchmarks import BENCHMARKS
+
+# Where the baseline is stored by default
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# The real dataset benchmarked by default (the most recent semester)
+DEFAULT_DATASET = const.Datasets.F25.value
+
+# How much slower (as a fraction of the baseline) a benchmark may get before
+# it is considered a regression
+DEFAULT_TOLERANCE = 0.25
+
+def resultName(benchmark, dataset):
+    return "%s[%s]" % (benchmark.name, dataset)
+
+def timeCase(case, repeat):
+    """Time repeat runs of case (after one untimed warmup run), and return a
+    dict of summary statistics, in seconds."""
+    times = []
+    for i in range(repeat + 1):
+        args = case.setup()
+        start = time.perf_counter()
+        case.run(*args)
+        elapsed = time.perf_counter() - start
+        if i > 0:
+            times.append(elapsed)
+    return {
+        "runs": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+    }
+
+def run(datasetNames, repeat, only=None, log=print):
+    """Run every benchmark (or only those whose names contain only) on every
+    dataset it applies to, and return the results dict."""
+    results = {}
+    for dataset in datasetNames:
+        for benchmark in BENCHMARKS:
+            if only and only not in benchmark.name:
+                continue
+            if not benchmark.applies(dataset):
+                continue
+            name = resultName(benchmark, dataset)
+            results[name] = timeCase(benchmark.prepare(dataset), repeat)
+            log("%-45s %10.3fms" % (name, results[name]["median"] * 1000))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare the median times of results against those of baseline, and
+    return a list of (name, baselineTime, time) for each regression.
+    Benchmarks missing from either side are ignored."""
+    regressions = []
+    for name, result in results["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        if result["median"] > old["median"] * (1 + tolerance):
+            regressions.append((name, old["median"], result["median"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument('datasets', nargs='*',
+                        help=f'which datasets to benchmark (default: {DEFAULT_DATASET} and every synthetic dataset)')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='how many timed runs of each benchmark (default: %(default)s)')
+    parser.add_argument('-k', '--only',
+                        help='only run benchmarks whose names contain this string')
+    parser.add_argument('-o', '--output',
+                        help='write the results as JSON to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='compare against this results file (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save the results as the new baseline, instead of comparing against it')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='fraction by which a benchmark may slow down before failing (default: %(default)s)')
+    args = parser.parse_args()
+
+    # The real CSVs produce plenty of (expected) warnings on every conversion
+    csv_to_json.logger.setLevel(logging.ERROR)
+
+    datasetNames = args.datasets or [DEFAULT_DATASET] + datasets.syntheticDatasetNames()
+    results = run(datasetNames, args.repeat, only=args.only)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, old, new in regressions:
+        print("REGRESSION %-45s %10.3fms -> %.3fms (%+.0f%%)" % (name, old * 1000, new * 1000, (new / old - 1) * 100))
+    if regressions:
+        sys.exit(1)
+    print("No regressions against %s" % args.baseline)
@@ -3,5 +3,6 @@
 from .datasets import (
     getDataset,
     getDatasetNames,
+    getSnapshot,
     readDataset
 )
@@ -52,6 +52,10 @@ class Datasets(enum.Enum):
 # alias for clarity
 Semesters = Datasets
 
+# Synthetic datasets (see data/synthetic.py) are not listed in Datasets;
+# instead, any dataset on disk whose name begins with this prefix is one.
+SYNTHETIC_PREFIX = "_syn"
+
 # Which surveys are available?
 class Surveys(enum.Enum):
     """ Which surveys are available?
@@ -32,6 +32,7 @@ import argparse
 from collections import defaultdict
 from collections.abc import Sequence
 import csv
+import functools
 import hashlib
 import json
 import logging
@@ -43,6 +44,7 @@ from typing import (
     Any,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
     Type,
@@ -543,6 +545,13 @@ def get_path(semester: str, survey: str, anonymized: bool = True) -> Optional[pa
     prefix = "anon" if anonymized else "unanon"
     return DATASET_PATH / semester / f'{prefix}-{survey}.csv'
 
+def read_csv_rows(path: pathlib.Path) -> Iterator[List[str]]:
+    """ Yield the rows of the CSV file at path one at a time, skipping its header row. """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
 class Dataset:
     """ A Dataset consists of a collection of LanguageData for a given semester.
 
@@ -595,11 +604,9 @@ class Dataset:
                                semester, survey.value)
                 continue
 
-            with open(path, 'r', newline='', encoding='utf-8') as f:
-                rows = list(csv.reader(f))
-
-            # Skip first row as it's just a header.
-            languages = [LanguageData.from_csv_row(row, survey_specs[survey]) for row in rows[1:]]
+            # Parse and merge each row as it is read, so only the merged
+            # LanguageData (not the rows) are ever held in memory.
+            languages = (LanguageData.from_csv_row(row, survey_specs[survey]) for row in read_csv_rows(path))
 
             for language_data in languages:
                 # Merge data from this survey into any other data we
@@ -649,19 +656,38 @@ class Dataset:
 #                               Preprocessing
 ################################################################################
 
+NON_ASCII_RE = re.compile(r'[^\x00-\x7F]')
+
+# How many distinct values str_hash remembers. Each student's netid and name
+# appear in every survey of a semester, so this only needs to hold one
+# semester's worth, while keeping memory bounded for very large exports.
+STR_HASH_CACHE_SIZE = 1 << 16
+
+
+@functools.lru_cache(maxsize=STR_HASH_CACHE_SIZE)
 def str_hash(s: str) -> str:
-    """ Convert s to a standard normal form and return a hash for it. """
+    """ Convert s to a standard normal form and return a hash for it.
+        Results are memoized, since the same netids and names recur across
+        a semester's surveys. """
     # Remove extra spaces and standardize capitalization.
     s = s.strip().lower()
 
     # Convert to ASCII bytes.
-    b = re.sub(r'[^\x00-\x7F]',' ', s).encode('ASCII')
+    b = NON_ASCII_RE.sub(' ', s).encode('ASCII')
 
     # Generate a hash and trim off just the front for brevity.
     # The risk of collisions should still be negligible.
     return hashlib.sha3_256(b).hexdigest()[:const.HASH_SIZE]
 
 
+def anonymize_rows(rows: Iterable[List[str]]) -> Iterator[List[str]]:
+    """ Yield each row with its sensitive data (netid and name) anonymized. """
+    for row in rows:
+        row[const.NETID] = str_hash(row[const.NETID])
+        row[const.NAME] = str_hash(row[const.NAME])
+        yield row
+
+
 def anonymize_semester_data(semester: str) -> None:
     """ Convert the given semester's "unanon" CSV files to "anon" ones.
         Log a warning and return gracefully if an "unanon" file doesn't exist. """
@@ -675,21 +701,21 @@ def anonymize_semester_data(semester: str) -> None:
 
         logger.info('Anonymizing %s ...', str(path))
 
-        # Files will be pretty small, so we just read the whole thing into memory.
-        with open(path, 'r', newline='', encoding='utf-8') as f:
-            rows = list(csv.reader(f))
-
-        path = get_path(semester, survey)
-        with open(path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
+        # Stream the rows from one file to the other, writing to a temporary
+        # file first so that a failed run never leaves a partial anon file.
+        anon_path = get_path(semester, survey)
+        tmp_path = anon_path.with_name(anon_path.name + '.tmp')
+        with open(path, 'r', newline='', encoding='utf-8') as f, \
+             open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+            reader = csv.reader(f)
+            writer = csv.writer(out)
 
             # Write the first row as-is, since it's just headers.
-            writer.writerow(rows[0])
-            for row in rows[1:]:
-                # Anonymize sensitive data and write back to file.
-                row[const.NETID] = str_hash(row[const.NETID])
-                row[const.NAME] = str_hash(row[const.NAME])
-                writer.writerow(row)
+            header = next(reader, None)
+            if header is not None:
+                writer.writerow(header)
+            writer.writerows(anonymize_rows(reader))
+        tmp_path.replace(anon_path)
 
 
 ################################################################################
@@ -1,12 +1,17 @@
 """Define the different possible datasets that we can query, and some common operations
 for datasets.
 
-Defines & initializes all of the TinyDB instances that the app will be using.
+Loads (lazily) the TinyDB instances that the app will be using.
 
 A note on terminology:
     A "dataset" is the json/dictionary representation of the data, whereas
     a "database" is the TinyDB instance this raw JSON data underlies.
 
+Both are backed by the same LoadedDataset: each dataset's .db file is parsed
+once, the first time either its dataset or its database is requested, and only
+that one dataset is loaded. Test datasets (see isTestDataset) are never loaded
+unless LINGDB_TEST_DATASETS is set, so production can't serve them by accident.
+
 A note on why databases/datasets are lazily generated:
 
 In order to generate the .json and .db files for each dataset, we run
@@ -21,20 +26,45 @@ may not have been generated yet.
 
 """
 
+import glob
+import hashlib
 import json
+import logging
+import os
+import threading
+import time
+
 import tinydb
-from . import const
+from tinydb.database import Document
+from tinydb.storages import MemoryStorage
+
+from . import const, snapshot, sqldb
+
+logger = logging.getLogger(__name__)
 
 
 # See data/const.py for relevant constants (e.g. dataset names)
 DATASET_PATH = const.DATASET_PATH
-datasetNames = const.Datasets.names()
 
-# The datasets themselves, uninitialized until needed
-datasets = None
+def syntheticDatasetNames():
+    """Return the names of the synthetic datasets (see data/synthetic.py) that
+    have been generated on disk. Like the datasets in const.Datasets, they
+    can be queried by name."""
+    pattern = DATASET_PATH.format(const.SYNTHETIC_PREFIX + "*", "")
+    return sorted(os.path.basename(os.path.normpath(path)) for path in glob.glob(pattern))
 
-# The TinyDB database instances for each dataset
-databases = None
+datasetNames = const.Datasets.names() + syntheticDatasetNames()
+
+# Set LINGDB_TEST_DATASETS=1 to allow test datasets to be loaded
+TEST_DATASETS_ENABLED = bool(os.environ.get("LINGDB_TEST_DATASETS"))
+
+def isTestDataset(name):
+    """Test datasets are those whose names begin with "_" (e.g. _test) or end
+    with "test" (e.g. S19test). Synthetic datasets are not test datasets: they
+    are only on disk if someone generated them to be queried."""
+    if name.startswith(const.SYNTHETIC_PREFIX):
+        return False
+    return name.startswith("_") or name.endswith("test")
 
 def datasetFilename(dataset):
     return DATASET_PATH.format(dataset, "%s.json" % dataset)
@@ -42,33 +72,113 @@ def datasetFilename(dataset):
 def databaseFilename(dataset):
     return DATASET_PATH.format(dataset, "%s.db" % dataset)
 
-def initDatabases() -> None:
-    """Initialize the databases for this application"""
-    global databases
+def snapshotFilename(dataset):
+    return DATASET_PATH.format(dataset, "%s.snap" % dataset)
 
-    # Do nothing if DBs already initialized
-    if databases is not None:
-        return
+def sqliteFilename(dataset):
+    return DATASET_PATH.format(dataset, "%s.sqlite" % dataset)
 
-    databases = {
-        dataset: tinydb.TinyDB(databaseFilename(dataset), encoding="utf-8") for dataset in datasetNames
-    }
+def resultsFilename(dataset):
+    return DATASET_PATH.format(dataset, "%s.results.json" % dataset)
 
-def getDatabase(name) -> tinydb.TinyDB:
-    """Return the database whose name is the one specified, if it exists"""
-    # A bit of a hack: generate databases only the first time they are requested
-    # See note at top of file
-    if not databases:
-        initDatabases()
+# Which database getDatabase() returns: "tinydb" (the default), or "sqlite" to
+# query the indexed SQLite files instead (see data/sqldb.py)
+ENGINE = os.environ.get("LINGDB_ENGINE", "tinydb")
 
-    return databases[name]
+################################################################################
+#                                  Loading
+################################################################################
 
-def initDatasets():
-    """Intialize the datasets when they are needed"""
-    global datasets
+class LoadedDataset:
+    """A dataset, parsed once from its .db file, that backs both getDataset()
+    (a list of languages) and getDatabase() (an in-memory TinyDB instance
+    holding the same data)."""
+
+    def __init__(self, name, data, fingerprint, seconds):
+        self.name = name
+        self.fingerprint = fingerprint
+        # How long it took to load, and the size of the file it was loaded from
+        self.seconds = seconds
+        self.size = fingerprint[1]
+
+        table = data.get(tinydb.TinyDB.DEFAULT_TABLE, {})
+        # As TinyDB Documents, so that they know their IDs
+        self.languages = [Document(table[docId], doc_id=int(docId)) for docId in sorted(table, key=int)]
+
+        self.database = tinydb.TinyDB(storage=MemoryStorage)
+        self.database.storage.write(data)
+
+    def __len__(self):
+        return len(self.languages)
+
+    def __repr__(self):
+        return "<LoadedDataset %s: %d languages, %d bytes, loaded in %.1fms>" % (
+            self.name, len(self), self.size, self.seconds * 1000)
+
+# The LoadedDataset for each dataset that has been requested so far
+loaded = {}
 
-    # Read datasets from json files
-    datasets = { name: readDataset(name) for name in datasetNames }
+# Held while loading or swapping in a dataset
+loadLock = threading.RLock()
+
+# Functions to be called as f(loadedDataset) after each dataset is (re)loaded
+loadListeners = []
+
+def addLoadListener(listener) -> None:
+    """Call listener(loadedDataset) every time a dataset is loaded or reloaded.
+    The app uses this to report load times and sizes in its metrics, since the
+    data package must not import the app."""
+    loadListeners.append(listener)
+
+def checkAvailable(name) -> None:
+    """Raise a KeyError unless the named dataset may be loaded."""
+    if name not in datasetNames:
+        raise KeyError(name)
+    if isTestDataset(name) and not TEST_DATASETS_ENABLED:
+        raise KeyError(f"{name} is a test dataset (set LINGDB_TEST_DATASETS=1 to use it)")
+
+def loadDataset(name) -> LoadedDataset:
+    """Read the named dataset from its .db file."""
+    start = time.perf_counter()
+    path = databaseFilename(name)
+    fp = fingerprint(path, getattr(loaded.get(name), "fingerprint", None))
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    dataset = LoadedDataset(name, data, fp, time.perf_counter() - start)
+
+    logger.info("loaded %r", dataset)
+    for listener in loadListeners:
+        listener(dataset)
+    return dataset
+
+def getLoadedDataset(name) -> LoadedDataset:
+    """Return the named dataset, loading it if this is the first request for it."""
+    checkAvailable(name)
+    startReloader()
+
+    dataset = loaded.get(name)
+    if dataset is None:
+        with loadLock:
+            # Another thread may have loaded it while we waited for the lock
+            if name not in loaded:
+                loaded[name] = loadDataset(name)
+            dataset = loaded[name]
+    return dataset
+
+def initDatabases() -> None:
+    """Initialize the databases for this application.
+    (Nothing to do: databases are loaded one at a time, as they are requested.)"""
+
+def getDatabase(name):
+    """Return the database whose name is the one specified, if it exists.
+    This is a TinyDB instance, or an sqldb.Database if ENGINE is "sqlite"."""
+    if ENGINE == "sqlite":
+        return getSQLDatabase(name)
+    return getLoadedDataset(name).database
+
+def initDatasets():
+    """Intialize the datasets when they are needed.
+    (Nothing to do: datasets are loaded one at a time, as they are requested.)"""
 
 def readDataset(name):
     """Reads the specified dataset from a file at /data/datasets/<name>/<name>.json"""
@@ -81,14 +191,172 @@ def readDataset(name):
 
 def getDataset(name):
     """Return the dataset whose name is the one specified, if it exists"""
-    # A bit of a hack: generate datasets only the first time they are requested
-    # See note at top of file
-    if not datasets:
-        initDatasets()
-
-    dataset = datasets[name]
-    return datasets[name]
+    return getLoadedDataset(name).languages
 
 def getDatasetNames():
     """Return all known dataset names"""
     return datasetNames
+
+# The fingerprint of each SQLite file, when ENGINE is "sqlite"
+sqlFingerprints = {}
+
+def getDatasetVersion(name) -> str:
+    """Return a hash of the content of the named dataset as it is currently
+    served, which changes whenever the dataset is rebuilt (e.g. for ETags)."""
+    if ENGINE == "sqlite":
+        checkAvailable(name)
+        fp = sqlFingerprints[name] = fingerprint(sqliteFilename(name), sqlFingerprints.get(name))
+        return fp[2]
+    return getLoadedDataset(name).fingerprint[2]
+
+################################################################################
+#                                 Reloading
+################################################################################
+# When a dataset's .db file is rebuilt (e.g. by `python -m data`), a background
+# thread notices and loads the new version, so running workers pick it up
+# without being restarted.
+#
+# The new version is loaded entirely off the request path, then swapped in
+# by replacing the entry in `loaded`. Requests that already hold the old
+# version keep using it until they finish.
+
+# How often (in seconds) to check whether dataset files have changed.
+# Set LINGDB_RELOAD_INTERVAL=0 to disable reloading.
+RELOAD_INTERVAL = float(os.environ.get("LINGDB_RELOAD_INTERVAL", 5))
+
+# Functions to be called as f(name, seconds, error) after each reload attempt
+reloadListeners = []
+
+# The background thread, and the process it was started in (threads don't
+# survive a fork, so each gunicorn worker must start its own)
+reloader = None
+reloaderPid = None
+
+def fingerprint(path, previous=None):
+    """Return (mtime, size, hash) for the file at path. The hash is only
+    computed when the mtime or size differ from the previous fingerprint,
+    since it requires reading the whole file."""
+    stat = os.stat(path)
+    if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+        return previous
+
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    return (stat.st_mtime_ns, stat.st_size, sha1.hexdigest())
+
+def addReloadListener(listener) -> None:
+    """Call listener(name, seconds, error) after every attempt to reload a
+    database, where error is None if the reload succeeded. The app uses this to
+    record reload metrics, since the data package must not import the app."""
+    reloadListeners.append(listener)
+
+def reloadDataset(name) -> bool:
+    """Load the named dataset from disk again and swap it in.
+    Return True iff the reload succeeded; otherwise the old version is kept."""
+    start = time.perf_counter()
+    error = None
+    try:
+        with loadLock:
+            loaded[name] = loadDataset(name)
+        logger.info("reloaded dataset %s", name)
+    except (OSError, ValueError) as err:
+        # e.g. the file was caught half-written; we'll try again next time
+        error = err
+        logger.warning("failed to reload dataset %s: %s", name, err)
+
+    seconds = time.perf_counter() - start
+    for listener in reloadListeners:
+        listener(name, seconds, error)
+    return error is None
+
+def reloadChangedDatasets() -> list:
+    """Reload every loaded dataset whose file has changed since it was loaded,
+    and return the names of those that were reloaded."""
+    reloaded = []
+    for name, dataset in list(loaded.items()):
+        old = dataset.fingerprint
+        try:
+            new = fingerprint(databaseFilename(name), old)
+        except OSError:
+            # The file is missing (perhaps it is being rebuilt): keep serving
+            # the version we have
+            continue
+
+        if new[2] == old[2]:
+            # Touched, but not changed: don't bother reloading
+            dataset.fingerprint = new
+            continue
+
+        if reloadDataset(name):
+            reloaded.append(name)
+    return reloaded
+
+def watchForChanges():
+    """Poll for changed datasets forever (run on the reloader thread)."""
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        try:
+            reloadChangedDatasets()
+        except Exception:
+            logger.exception("error while checking for changed datasets")
+
+def startReloader() -> None:
+    """Start the reloader thread for this process, if it isn't running."""
+    global reloader, reloaderPid
+
+    if RELOAD_INTERVAL <= 0 or reloaderPid == os.getpid():
+        return
+
+    with loadLock:
+        if reloaderPid == os.getpid():
+            return
+        reloader = threading.Thread(target=watchForChanges, name="dataset-reloader", daemon=True)
+        reloader.start()
+        reloaderPid = os.getpid()
+
+################################################################################
+#                                 Snapshots
+################################################################################
+
+# The open snapshots (see data/snapshot.py) of each dataset, as
+# (snapshot, (mtime, size) of its file when it was opened)
+snapshots = {}
+
+def getSnapshot(name) -> snapshot.Snapshot:
+    """Return the memory-mapped snapshot of the named dataset.
+    If the snapshot file has been rewritten since it was opened, the new
+    version is opened instead (stat()ing the file is cheap, unlike fingerprint())."""
+    checkAvailable(name)
+
+    path = snapshotFilename(name)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    opened = snapshots.get(name)
+    if opened is None or opened[1] != version:
+        opened = snapshots[name] = (snapshot.Snapshot(path), version)
+    return opened[0]
+
+################################################################################
+#                                   SQLite
+################################################################################
+
+# The open SQLite databases of each dataset, as
+# (database, (mtime, size) of its file when it was opened)
+sqlDatabases = {}
+
+def getSQLDatabase(name) -> sqldb.Database:
+    """Return the SQLite database of the named dataset. Like getSnapshot(), a
+    rewritten file is noticed (and reopened) on the next request."""
+    checkAvailable(name)
+
+    path = sqliteFilename(name)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    opened = sqlDatabases.get(name)
+    if opened is None or opened[1] != version:
+        opened = sqlDatabases[name] = (sqldb.Database(path), version)
+    return opened[0]
@@ -5,6 +5,10 @@ another JSON file representing the same data, but in TinyDB format.
 
 Files of this form are given the .db extension
 
+A binary snapshot of the same data (see data/snapshot.py) is also written, with
+the .snap extension, as is an SQLite database (see data/sqldb.py), with the
+.sqlite extension.
+
 Usage:
 $ python data/json_to_db.py <dataset>
 
@@ -17,7 +21,7 @@ from typing import (
 
 from tinydb import TinyDB
 
-from data import datasets
+from data import datasets, snapshot, sqldb
 from data.const import Datasets
 
 def convert(semester: str):
@@ -34,8 +38,16 @@ def convert(semester: str):
     db = TinyDB(outPath, encoding="utf-8")
     # Delete existing records
     db.purge()
-    for d in data:
-        db.insert(d)
+    # Insert all records with a single write (insert() rewrites the whole file
+    # every time, which takes quadratic time for large datasets)
+    db.insert_multiple(data)
+    db.close()
+
+    # Also write the memory-mapped snapshot of the same data
+    snapshot.write(datasets.snapshotFilename(semester), data)
+
+    # ...and the SQLite database
+    sqldb.write(datasets.sqliteFilename(semester), data)
 
 def main():
     """If command line args are provided, treat them as dataset names and convert
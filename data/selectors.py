@@ -38,7 +38,8 @@
 # be replaced by the key on the left
 # If the right-hand-side list is [], it is treated as the left-hand-side string itself
 
-from phonemes import metaclasses
+from phonemes import consonants, metaclasses, vowels
+from phonemes.utils import LazyDict
 # from lingdb.language import Language
 from .const import (
     D,
@@ -563,7 +564,7 @@ AGREEMENT = {
 
 METACLASS = {
     SELECT_NAME: "Contains metaclass:",
-    DICT: metaclasses.DICT,
+    DICT: LazyDict(lambda: metaclasses.DICT),
     MULTI: True,
     MODE: PICK_MULTI,
     REPLY: "have %s %s phoneme that is %s",
@@ -617,3 +618,13 @@ SELECTORS_DICT = { sel[HTML_ID] : sel for sel in SELECTORS }
 
 # function mappings used by lingdb_client.handleQuery()
 # function_map = { sel[HTML_ID]: sel[FUNCTION] for sel in SELECTORS }
+
+def choices(selector):
+    """Return the values that may be selected for the given selector."""
+    if selector[DICT] is not None:
+        return list(selector[DICT])
+    # Otherwise, it selects consonants or vowels (or classes of them)
+    module = consonants if selector[PROPERTY] == "consonants" else vowels
+    if selector[MODE] == PICK_CLASS:
+        return list(module.CLASSES_DICT)
+    return list(module.GLYPHS)
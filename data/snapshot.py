@@ -0,0 +1,517 @@
+"""A compact, memory-mapped binary format for datasets ("snapshots").
+
+Reading a dataset's JSON means parsing and allocating every value of every
+language up front. A snapshot (data/datasets/<name>/<name>.snap) holds the same
+data laid out in columns, so that it can be opened with mmap: opening one only
+parses a small header, the pages are shared by every process that opens the
+file, and nothing is decoded until a column is actually touched.
+
+Snapshots are written by json_to_db alongside each .db file, and opened with
+data.datasets.getSnapshot().
+
+File layout (all integers little-endian, all sections 8-byte aligned):
+
+    header      magic, version, number of rows, number of columns,
+                number of strings, offset of string table, offset of directory
+    strings     (count + 1) u32 offsets into a blob of UTF-8 text.
+                Every key and every string value is stored here exactly once,
+                and referred to elsewhere by its index (a "string id").
+    directory   one entry per column (i.e. per JSON key): the column's name
+                (string id), kind, and the offsets of its sections
+    columns     for each column, a bitmap of which rows have a value, then:
+                INT     one i32 per row
+                BOOL    one u8 per row
+                STR     one string id per row
+                LIST    (rows + 1) u32 offsets into an array of string ids
+                GLYPHS  a bitmask of `width` bytes per row, over the column's
+                        alphabet of glyphs (an array of string ids)
+                JSON    one string id per row, of the value encoded as JSON;
+                        the fallback for values that fit none of the above
+
+Phoneme lists (e.g. consonants) are stored as GLYPHS, so a row's inventory can
+be tested against a set of phonemes with a single bitwise AND; decoding such a
+list yields its glyphs in the canonical order of phonemes/consonants.py and
+vowels.py rather than in their original order.
+
+Usage:
+    snap = Snapshot("data/datasets/F25/F25.snap")
+    len(snap)                         # number of languages
+    snap.column("num consonants")[3]  # one value, decoded on demand
+    snap.row(3)                       # one language, as a dict
+    list(snap)                        # every language
+    snap.column("tone").counts(rows)  # {value: how many of rows have it}
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Iterable, List
+
+import phonemes
+
+MAGIC = b"LINGSNAP"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIIIIII")
+DIRECTORY_ENTRY = struct.Struct("<IIIIII")
+
+# Column kinds
+INT = 1
+BOOL = 2
+STR = 3
+LIST = 4
+GLYPHS = 5
+JSON = 6
+
+# Columns whose values are lists of phonemes
+GLYPH_COLUMNS = ("consonants", "vowels")
+
+# mmap'd arrays are read in place, so their byte order must match the machine's
+if sys.byteorder != "little":
+    raise ImportError("snapshots are only supported on little-endian machines")
+
+class SnapshotError(ValueError):
+    pass
+
+def align(n):
+    """Round n up to a multiple of 8."""
+    return (n + 7) & ~7
+
+# Columns with at most this many distinct values get a bitmap index (see
+# Column.bitmaps()), over which counting values takes a few bitwise ANDs
+MAX_BITMAP_VALUES = 256
+
+def rowMask(rows, numRows) -> int:
+    """Return a bitmask of the given rows (bit i set if row i is in rows)."""
+    mask = bytearray((numRows + 7) // 8)
+    for row in rows:
+        mask[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(mask, "little")
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(n):
+        return bin(n).count("1")
+
+def isInt32(v):
+    return type(v) is int and -2**31 <= v < 2**31
+
+################################################################################
+#                                   Writing
+################################################################################
+
+class SnapshotWriter:
+    """Accumulates languages one at a time, then writes them as a snapshot.
+
+        writer = SnapshotWriter()
+        for language in languages:
+            writer.add(language)
+        writer.write(path)
+    """
+
+    def __init__(self):
+        self.numRows = 0
+        # Column name -> list of values, one per row (None if missing)
+        self.columns = {}
+        self.stringIds = {}
+
+    def add(self, record: dict) -> None:
+        for key, value in record.items():
+            if key not in self.columns:
+                self.columns[key] = [None] * self.numRows
+            self.columns[key].append(value)
+        self.numRows += 1
+        for values in self.columns.values():
+            if len(values) < self.numRows:
+                values.append(None)
+
+    def addAll(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.add(record)
+
+    def stringId(self, s: str) -> int:
+        """Return the index of s in the string table, adding it if need be."""
+        i = self.stringIds.get(s)
+        if i is None:
+            i = self.stringIds[s] = len(self.stringIds)
+        return i
+
+    @staticmethod
+    def kindOf(name, values) -> int:
+        """Choose the most compact kind that can represent every value."""
+        present = [v for v in values if v is not None]
+        if all(isInt32(v) for v in present):
+            return INT
+        if all(type(v) is bool for v in present):
+            return BOOL
+        if all(type(v) is str for v in present):
+            return STR
+        if all(type(v) is list and all(type(x) is str for x in v) for v in present):
+            if name in GLYPH_COLUMNS and all(len(set(v)) == len(v) for v in present):
+                return GLYPHS
+            return LIST
+        return JSON
+
+    def encodeColumn(self, name, values, out: bytearray):
+        """Append the sections of one column to out, and return its directory entry."""
+        kind = self.kindOf(name, values)
+        n = self.numRows
+
+        presence = bytearray((n + 7) // 8)
+        for row, v in enumerate(values):
+            if v is not None:
+                presence[row >> 3] |= 1 << (row & 7)
+
+        def section(data: bytes) -> int:
+            out.extend(b"\0" * (align(len(out)) - len(out)))
+            offset = len(out)
+            out.extend(data)
+            return offset
+
+        presenceOffset = section(presence)
+        extraOffset = 0
+        param = 0
+
+        if kind == INT:
+            dataOffset = section(array("i", (v or 0 for v in values)).tobytes())
+        elif kind == BOOL:
+            dataOffset = section(bytes(bool(v) for v in values))
+        elif kind == STR:
+            dataOffset = section(array("I", (self.stringId(v or "") for v in values)).tobytes())
+        elif kind == JSON:
+            encode = lambda v: self.stringId(json.dumps(v, ensure_ascii=False))
+            dataOffset = section(array("I", (encode(v) for v in values)).tobytes())
+        elif kind == LIST:
+            offsets = array("I", [0])
+            items = array("I")
+            for v in values:
+                items.extend(self.stringId(x) for x in (v or ()))
+                offsets.append(len(items))
+            dataOffset = section(offsets.tobytes())
+            extraOffset = section(items.tobytes())
+        elif kind == GLYPHS:
+            seen = {g for v in values for g in (v or ())}
+            alphabet = [g for g in phonemes.GLYPHS if g in seen]
+            alphabet += sorted(seen.difference(alphabet))
+            index = {g: i for i, g in enumerate(alphabet)}
+            width = (len(alphabet) + 7) // 8
+            masks = bytearray()
+            for v in values:
+                mask = 0
+                for g in (v or ()):
+                    mask |= 1 << index[g]
+                masks.extend(mask.to_bytes(width, "little"))
+            dataOffset = section(masks)
+            extraOffset = section(array("I", (self.stringId(g) for g in alphabet)).tobytes())
+            param = len(alphabet)
+
+        return (self.stringId(name), kind, presenceOffset, dataOffset, extraOffset, param)
+
+    def tobytes(self) -> bytes:
+        # Column data comes first (in a separate buffer) so that every string
+        # is known before the string table is written
+        body = bytearray()
+        entries = [self.encodeColumn(name, values, body) for name, values in self.columns.items()]
+
+        out = bytearray(HEADER.size)
+
+        # String table
+        blob = bytearray()
+        offsets = array("I", [0])
+        for s in self.stringIds:
+            blob.extend(s.encode("utf-8"))
+            offsets.append(len(blob))
+        stringsOffset = align(len(out))
+        out.extend(b"\0" * (stringsOffset - len(out)))
+        out.extend(offsets.tobytes())
+        out.extend(blob)
+
+        # Directory, whose offsets must be shifted past everything before the body
+        directoryOffset = align(len(out))
+        bodyOffset = align(directoryOffset + DIRECTORY_ENTRY.size * len(entries))
+        out.extend(b"\0" * (directoryOffset - len(out)))
+        for nameId, kind, presence, data, extra, param in entries:
+            out.extend(DIRECTORY_ENTRY.pack(nameId, kind, bodyOffset + presence, bodyOffset + data,
+                                            bodyOffset + extra if extra else 0, param))
+        out.extend(b"\0" * (bodyOffset - len(out)))
+        out.extend(body)
+
+        HEADER.pack_into(out, 0, MAGIC, VERSION, self.numRows, len(entries),
+                         len(self.stringIds), stringsOffset, directoryOffset)
+        return bytes(out)
+
+    def write(self, path) -> None:
+        with open(path, "wb") as f:
+            f.write(self.tobytes())
+
+def write(path, records: Iterable[dict]) -> None:
+    """Write records (e.g. a list of languages read from JSON) as a snapshot."""
+    writer = SnapshotWriter()
+    writer.addAll(records)
+    writer.write(path)
+
+################################################################################
+#                                   Reading
+################################################################################
+
+class Column:
+    """A lazily decoded column of a snapshot: column[row] decodes a single
+    value, or returns None if that row has no value for this column."""
+
+    def __init__(self, snapshot, name, kind, presence, data, extra, param):
+        self.snapshot = snapshot
+        self.name = name
+        self.kind = kind
+        self.numRows = len(snapshot)
+        buf = snapshot.buffer
+        self.presence = buf[presence:presence + (self.numRows + 7) // 8]
+        self.data = data
+        self.extra = extra
+        self.param = param
+        self.bitmapIndex = None
+
+    def __len__(self):
+        return self.numRows
+
+    def has(self, row) -> bool:
+        return bool(self.presence[row >> 3] & (1 << (row & 7)))
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.numRows:
+            raise IndexError(row)
+        if not self.has(row):
+            return None
+        return self.decode(row)
+
+    def decode(self, row):
+        raise NotImplementedError('concrete Column implementations should override decode()')
+
+    def __iter__(self):
+        for row in range(self.numRows):
+            yield self[row]
+
+    def codes(self, row):
+        """Return the raw codes (ints, string ids, ...) of the value in row:
+        one for a single value, and one per distinct item for a list."""
+        raise NotImplementedError('concrete Column implementations should override codes()')
+
+    def decodeCode(self, code):
+        return code
+
+    def bitmaps(self):
+        """Return {code: bitmask of the rows whose value has that code}, or None
+        if the column has too many distinct values for that to be worthwhile.
+        Built the first time it is needed."""
+        if self.bitmapIndex is None:
+            rowsOf = {}
+            for row in range(self.numRows):
+                if self.has(row):
+                    for code in self.codes(row):
+                        rowsOf.setdefault(code, []).append(row)
+            if len(rowsOf) > MAX_BITMAP_VALUES:
+                self.bitmapIndex = False
+            else:
+                self.bitmapIndex = {code: rowMask(rows, self.numRows) for code, rows in rowsOf.items()}
+        return self.bitmapIndex if self.bitmapIndex is not False else None
+
+    def counts(self, rows) -> Counter:
+        """Count how many of the given rows have each value (rows with no value
+        are skipped); a list counts once for each distinct item in it.
+
+        Codes are counted rather than values, so each distinct value is only
+        decoded once."""
+        bitmaps = self.bitmaps()
+        if bitmaps is not None:
+            mask = rowMask(rows, self.numRows)
+            codes = {code: popcount(bitmap & mask) for code, bitmap in bitmaps.items()}
+        else:
+            codes = Counter()
+            for row in rows:
+                if self.has(row):
+                    codes.update(self.codes(row))
+        return Counter({self.decodeCode(code): n for code, n in codes.items() if n})
+
+class IntColumn(Column):
+    def __init__(self, *args):
+        super().__init__(*args)
+        buf = self.snapshot.buffer
+        # The raw values, read in place (missing values are 0)
+        self.values = buf[self.data:self.data + 4 * self.numRows].cast("i")
+
+    def decode(self, row):
+        return self.values[row]
+
+    def codes(self, row):
+        return (self.values[row],)
+
+class BoolColumn(Column):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.values = self.snapshot.buffer[self.data:self.data + self.numRows]
+
+    def decode(self, row):
+        return bool(self.values[row])
+
+    def codes(self, row):
+        return (self.values[row],)
+
+    def decodeCode(self, code):
+        return bool(code)
+
+class StrColumn(Column):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.ids = self.snapshot.buffer[self.data:self.data + 4 * self.numRows].cast("I")
+
+    def decode(self, row):
+        return self.snapshot.string(self.ids[row])
+
+    def codes(self, row):
+        return (self.ids[row],)
+
+    def decodeCode(self, code):
+        return self.snapshot.string(code)
+
+class JsonColumn(StrColumn):
+    """Values are counted by their JSON text, since decoded lists and dicts
+    aren't hashable."""
+
+    def decode(self, row):
+        return json.loads(super().decode(row))
+
+class ListColumn(Column):
+    def __init__(self, *args):
+        super().__init__(*args)
+        buf = self.snapshot.buffer
+        self.offsets = buf[self.data:self.data + 4 * (self.numRows + 1)].cast("I")
+        self.items = buf[self.extra:self.extra + 4 * self.offsets[self.numRows]].cast("I")
+
+    def decode(self, row):
+        string = self.snapshot.string
+        return [string(i) for i in self.items[self.offsets[row]:self.offsets[row + 1]]]
+
+    def codes(self, row):
+        return set(self.items[self.offsets[row]:self.offsets[row + 1]])
+
+    def decodeCode(self, code):
+        return self.snapshot.string(code)
+
+class GlyphColumn(Column):
+    """A column of phoneme lists, stored as one bitmask per row."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        buf = self.snapshot.buffer
+        self.width = (self.param + 7) // 8
+        self.masks = buf[self.data:self.data + self.width * self.numRows]
+        ids = buf[self.extra:self.extra + 4 * self.param].cast("I")
+        self.alphabet = [self.snapshot.string(i) for i in ids]
+        self.index = {g: i for i, g in enumerate(self.alphabet)}
+
+    def mask(self, row) -> int:
+        """Return the bitmask of the glyphs in the given row."""
+        start = row * self.width
+        return int.from_bytes(self.masks[start:start + self.width], "little")
+
+    def maskOf(self, glyphs) -> int:
+        """Return the bitmask of glyphs. Glyphs that appear in no row are ignored,
+        since they can never match anyway."""
+        mask = 0
+        for g in glyphs:
+            if g in self.index:
+                mask |= 1 << self.index[g]
+        return mask
+
+    def glyphs(self, mask) -> List[str]:
+        """Return the glyphs in a bitmask, in canonical order."""
+        return [g for i, g in enumerate(self.alphabet) if mask >> i & 1]
+
+    def decode(self, row):
+        return self.glyphs(self.mask(row))
+
+    def codes(self, row):
+        # The index of each glyph in the row's mask
+        mask = self.mask(row)
+        return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+    def decodeCode(self, code):
+        return self.alphabet[code]
+
+COLUMN_CLASSES = {
+    INT: IntColumn,
+    BOOL: BoolColumn,
+    STR: StrColumn,
+    LIST: ListColumn,
+    GLYPHS: GlyphColumn,
+    JSON: JsonColumn,
+}
+
+class Snapshot:
+    """A read-only, memory-mapped snapshot of a dataset."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+
+        if len(self.buffer) < HEADER.size:
+            raise SnapshotError(f"{path} is too short to be a snapshot")
+        magic, version, self.numRows, numColumns, numStrings, stringsOffset, directoryOffset = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"{path} is a version {version} snapshot, not version {VERSION}")
+
+        self.stringOffsets = self.buffer[stringsOffset:stringsOffset + 4 * (numStrings + 1)].cast("I")
+        self.blobOffset = stringsOffset + 4 * (numStrings + 1)
+        self.strings = {}
+
+        # Column name -> directory entry; columns are only built when first used
+        self.directory = {}
+        for i in range(numColumns):
+            entry = DIRECTORY_ENTRY.unpack_from(self.buffer, directoryOffset + i * DIRECTORY_ENTRY.size)
+            self.directory[self.string(entry[0])] = entry[1:]
+        self.columns = {}
+
+    def __len__(self):
+        return self.numRows
+
+    def string(self, i) -> str:
+        """Return the string with the given id, decoding it the first time."""
+        s = self.strings.get(i)
+        if s is None:
+            start = self.blobOffset + self.stringOffsets[i]
+            end = self.blobOffset + self.stringOffsets[i + 1]
+            s = self.strings[i] = str(self.buffer[start:end], "utf-8")
+        return s
+
+    def columnNames(self) -> List[str]:
+        return list(self.directory)
+
+    def column(self, name) -> Column:
+        """Return the named column (raising KeyError if there is none)."""
+        column = self.columns.get(name)
+        if column is None:
+            kind, *sections = self.directory[name]
+            column = self.columns[name] = COLUMN_CLASSES[kind](self, name, kind, *sections)
+        return column
+
+    def row(self, row) -> dict:
+        """Decode a single row into a dict like the one it was written from."""
+        record = {}
+        for name in self.directory:
+            column = self.column(name)
+            if column.has(row):
+                record[name] = column.decode(row)
+        return record
+
+    def __iter__(self):
+        for row in range(self.numRows):
+            yield self.row(row)
@@ -0,0 +1,182 @@
+"""An SQLite-backed alternative to the TinyDB databases.
+
+TinyDB has no indexes: every query scans (and copies) every language. For large
+or merged datasets, json_to_db can also write each dataset as an SQLite file
+(data/datasets/<name>/<name>.sqlite), with normalized, indexed tables:
+
+    languages(id, name, student, netid, doc)
+        One row per language; doc is the language's complete JSON.
+    fields(lang_id, key, value)
+        One row per property a language has. value is the property's value
+        for numbers, strings and bools, and NULL for lists.
+    list_values(lang_id, key, value)
+        One row per item of each (non-phoneme) list property,
+        e.g. (3, "word order", "SOV").
+    phonemes(lang_id, key, glyph)
+        One row per phoneme of each phoneme list, e.g. (3, "consonants", "p").
+
+Every table is indexed on (key, value), so a query on any JsonKey property is an
+index lookup. The queries themselves (app/query.py) compile to SQL run against
+these tables.
+
+Set LINGDB_ENGINE=sqlite to have data.datasets serve these databases instead of
+TinyDB ones. The files are opened read-only, and nothing is loaded into memory
+beyond SQLite's own page cache.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable
+
+from tinydb.database import Document
+
+# Properties whose values are lists of phonemes, stored in the phonemes table
+PHONEME_KEYS = ("consonants", "vowels")
+
+SCHEMA = """
+CREATE TABLE languages (
+    id      INTEGER PRIMARY KEY,
+    name    TEXT NOT NULL,
+    student TEXT NOT NULL,
+    netid   TEXT NOT NULL,
+    doc     TEXT NOT NULL
+);
+CREATE TABLE fields (
+    lang_id INTEGER NOT NULL REFERENCES languages(id),
+    key     TEXT NOT NULL,
+    value
+);
+CREATE TABLE list_values (
+    lang_id INTEGER NOT NULL REFERENCES languages(id),
+    key     TEXT NOT NULL,
+    value   TEXT NOT NULL
+);
+CREATE TABLE phonemes (
+    lang_id INTEGER NOT NULL REFERENCES languages(id),
+    key     TEXT NOT NULL,
+    glyph   TEXT NOT NULL
+);
+"""
+
+# Created after the data is inserted, which is much faster than maintaining them
+# during the inserts
+INDEXES = """
+CREATE INDEX fields_key_value ON fields(key, value, lang_id);
+CREATE INDEX list_values_key_value ON list_values(key, value, lang_id);
+CREATE INDEX phonemes_key_glyph ON phonemes(key, glyph, lang_id);
+"""
+
+# How many records to insert at a time
+BATCH_SIZE = 10000
+
+def fieldValue(value):
+    """Return the value to store in the fields table for a property value."""
+    if isinstance(value, list):
+        return None
+    if isinstance(value, (dict, float)) or value is None:
+        # Not queryable by any Query type; kept only for completeness
+        return json.dumps(value)
+    return value
+
+def write(path, records: Iterable[dict]) -> None:
+    """Write records (e.g. a list of languages read from JSON) to a new SQLite
+    database at path. The database is built under a temporary name and then
+    renamed into place, so readers never see a half-built database."""
+    tmpPath = path + ".tmp"
+    if os.path.exists(tmpPath):
+        os.remove(tmpPath)
+
+    conn = sqlite3.connect(tmpPath)
+    try:
+        conn.executescript(SCHEMA)
+        languages, fields, listValues, phonemes = [], [], [], []
+
+        def flush():
+            conn.executemany("INSERT INTO languages VALUES (?, ?, ?, ?, ?)", languages)
+            conn.executemany("INSERT INTO fields VALUES (?, ?, ?)", fields)
+            conn.executemany("INSERT INTO list_values VALUES (?, ?, ?)", listValues)
+            conn.executemany("INSERT INTO phonemes VALUES (?, ?, ?)", phonemes)
+            for rows in (languages, fields, listValues, phonemes):
+                rows.clear()
+
+        # Insert in batches, so that records may be streamed from disk
+        for langId, record in enumerate(records, 1):
+            languages.append((langId, record.get("name", ""), record.get("student", ""),
+                              record.get("netid", ""), json.dumps(record, ensure_ascii=False)))
+            for key, value in record.items():
+                fields.append((langId, key, fieldValue(value)))
+                if isinstance(value, list):
+                    rows = phonemes if key in PHONEME_KEYS else listValues
+                    rows.extend((langId, key, str(item)) for item in value)
+            if langId % BATCH_SIZE == 0:
+                flush()
+        flush()
+
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmpPath, path)
+
+class Database:
+    """A read-only SQLite database of languages, standing in for a TinyDB instance.
+
+    Queries are run with execute(); len() and all() behave like TinyDB's.
+    Each thread gets its own connection, since connections can't be shared."""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.local = threading.local()
+        self.size = None
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            uri = "file:%s?mode=ro" % os.path.abspath(self.path)
+            conn = self.local.conn = sqlite3.connect(uri, uri=True)
+        return conn
+
+    def execute(self, sql, params=()) -> list:
+        """Run a (parameterized) SQL query and return all of its rows."""
+        return self.connection().execute(sql, params).fetchall()
+
+    def __len__(self):
+        if self.size is None:
+            self.size = self.execute("SELECT COUNT(*) FROM languages")[0][0]
+        return self.size
+
+    def all(self) -> list:
+        """Return every language, as a dict with a doc_id (see search)."""
+        return [Document(json.loads(doc), doc_id=langId)
+                for langId, doc in self.execute("SELECT id, doc FROM languages ORDER BY id")]
+
+    def countWithProperty(self, key) -> int:
+        """Return how many languages have a value for the given property."""
+        return self.execute("SELECT COUNT(*) FROM fields WHERE key = ?", (key,))[0][0]
+
+    def documents(self, ids) -> list:
+        """Return the languages with the given ids, in id order (see search)."""
+        rows = self.execute("SELECT id, doc FROM languages WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+                            (json.dumps(list(ids)),))
+        return [Document(json.loads(doc), doc_id=langId) for langId, doc in rows]
+
+    def search(self, sql, params=()) -> list:
+        """Return the languages whose ids are selected by sql, which must select
+        a column named lang_id. Like TinyDB's, each is a dict with a doc_id
+        (the language's id, i.e. its 1-based position in the dataset)."""
+        rows = self.execute(
+            "SELECT l.id, l.doc FROM languages l JOIN (%s) m ON m.lang_id = l.id ORDER BY l.id" % sql,
+            params)
+        return [Document(json.loads(doc), doc_id=langId) for langId, doc in rows]
+
+def listTable(key):
+    """Return (table, value column) holding the items of the given list property."""
+    if key in PHONEME_KEYS:
+        return "phonemes", "glyph"
+    return "list_values", "value"
@@ -0,0 +1,337 @@
+""" Generate synthetic datasets of (almost) any size, so that the app can be
+    tested and benchmarked at scale.
+
+    The largest real dataset is only a few dozen languages. A synthetic dataset
+    looks just like a real semester's dataset (same JSON keys, same kinds of
+    values), but its languages are randomly generated:
+
+    * Phoneme inventories are sampled from the glyphs of phonemes/consonants.json
+      and phonemes/vowels.json, with each glyph appearing about as often as it
+      does in the real datasets.
+    * Typology values are sampled from the candidates of the fuzzy search terms
+      in data/const.py (the same values the CSV conversion can produce).
+    * A few well-known typological correlations (see `LanguageGenerator` below) hold
+      with a controllable strength, so that two-query comparisons have something
+      to find.
+
+    Synthetic datasets are written to data/datasets/<name>/<name>.json, .db and .snap,
+    exactly like real ones. Their names must begin with "_syn"; such datasets are
+    ignored by git and by csv_to_json, and are picked up automatically by
+    data.datasets, so they can be queried like any other dataset.
+
+    Usage:
+        # Generate a dataset of 10,000 languages, named _syn10k
+        python -m data.synthetic 10k
+
+        # Generate a dataset of 1,000,000 languages, with strongly correlated traits
+        python -m data.synthetic 1m --correlation 0.9 --seed 7
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List
+
+from . import const, snapshot, sqldb
+from .const import D, JsonKey as K
+from phonemes import consonants, vowels
+
+logging.basicConfig(format='%(levelname)s: %(message)s')
+logger = logging.getLogger('synthetic')
+
+# Every glyph appears with at least (and at most) this probability, even if
+# it is never (or always) seen in the real datasets.
+MIN_GLYPH_FREQ = 0.01
+MAX_GLYPH_FREQ = 0.95
+
+# The default strength of the correlations between traits
+DEFAULT_CORRELATION = 0.5
+
+# Fall back on these when no real datasets are available to draw names from
+NUM_FALLBACK_COUNTRIES = 150
+NUM_FALLBACK_FAMILIES = 40
+
+RECOMMEND = "Yes, my grammar was great to work with"
+
+# Word orders in which the object precedes the verb, and those in which it follows
+OV_ORDERS = ["SOV", "OSV", "OVS"]
+VO_ORDERS = ["SVO", "VSO", "VOS"]
+
+################################################################################
+#                       Statistics from the real datasets
+################################################################################
+
+def realDatasets() -> Iterator[List[dict]]:
+    """ Yield every real (non-test) dataset that has been generated on disk. """
+    for name in const.Datasets.names():
+        if name.startswith('_'):
+            continue
+        path = const.DATASET_PATH.format(name, "%s.json" % name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            yield json.load(f)
+
+def glyphFrequencies(key: str, glyphs: Iterable[str], languages: List[dict]) -> Dict[str, float]:
+    """ Return the fraction of languages whose `key` field contains each glyph,
+        clamped to [MIN_GLYPH_FREQ, MAX_GLYPH_FREQ]. """
+    counts = Counter(g for lang in languages for g in set(lang.get(key, [])))
+    total = max(len(languages), 1)
+    clamp = lambda f: min(max(f, MIN_GLYPH_FREQ), MAX_GLYPH_FREQ)
+    return {g: clamp(counts[g] / total) for g in glyphs}
+
+def observedValues(key: str, languages: List[dict]) -> List[str]:
+    """ Return the distinct values of the string field `key` among languages. """
+    return sorted({lang[key] for lang in languages if lang.get(key)})
+
+################################################################################
+#                                  Generation
+################################################################################
+
+class LanguageGenerator:
+    """ Generates random languages that look like the real thing.
+
+        A few correlations between traits each hold for a language with
+        probability `correlation`; otherwise the traits involved are sampled
+        independently:
+
+        * Voicing:      a voiced consonant implies its voiceless counterpart
+                        (e.g. /b/ implies /p/)
+        * Headedness:   OV word orders are head-final, VO word orders head-initial
+        * Isolation:    isolating languages have little or no affixation
+    """
+
+    def __init__(self, seed=None, correlation=DEFAULT_CORRELATION):
+        if not 0 <= correlation <= 1:
+            raise ValueError(f"correlation must be between 0 and 1, not {correlation}")
+
+        self.random = random.Random(seed)
+        self.correlation = correlation
+
+        real = [lang for dataset in realDatasets() for lang in dataset]
+        self.consonantFreqs = glyphFrequencies(K.CONSONANTS.value, consonants.GLYPHS, real)
+        self.vowelFreqs = glyphFrequencies(K.VOWELS.value, vowels.GLYPHS, real)
+        self.countries = (observedValues(K.COUNTRY.value, real)
+                          or ["Country %d" % i for i in range(NUM_FALLBACK_COUNTRIES)])
+        self.families = (observedValues(K.LANGUAGE_FAMILY.value, real)
+                         or ["Family %d" % i for i in range(NUM_FALLBACK_FAMILIES)])
+
+        # Look up each consonant's place and manner once, rather than per language
+        self.places = {c["glyph"]: c["place"] for c in consonants.data}
+        self.manners = {c["glyph"]: c["manner"] for c in consonants.data}
+
+        # Map each voiced consonant to its voiceless counterpart, if it has one
+        voiceless = {(c["place"], c["manner"]): c["glyph"] for c in consonants.data
+                     if c["voicing"] == "voiceless"}
+        self.counterparts = {c["glyph"]: voiceless[(c["place"], c["manner"])] for c in consonants.data
+                             if c["voicing"] == "voiced" and (c["place"], c["manner"]) in voiceless}
+
+        syllables = list(D.SYLLABLES.candidates())
+        self.onsets = [s for s in syllables if s.endswith("onset")]
+        self.codas = [s for s in syllables if s.endswith("coda")]
+
+    def correlated(self) -> bool:
+        """ Return True iff a correlation should hold for the trait being generated. """
+        return self.random.random() < self.correlation
+
+    def sample(self, candidates, p) -> List[str]:
+        """ Return each of candidates independently with probability p. """
+        return [c for c in candidates if self.random.random() < p]
+
+    def inventory(self, freqs: Dict[str, float]) -> List[str]:
+        """ Return a random phoneme inventory, including each glyph with its frequency. """
+        return [g for g, f in freqs.items() if self.random.random() < f]
+
+    def hexHash(self) -> str:
+        """ Return a random string that looks like an anonymized name (see csv_to_json.str_hash) """
+        return "%0*x" % (const.HASH_SIZE, self.random.getrandbits(4 * const.HASH_SIZE))
+
+    def syllables(self) -> List[str]:
+        """ Return a random set of syllable structures, e.g. [C onset, CC onset, C coda].
+            Onsets and codas are both "prefix-closed": CCC onset implies CC onset. """
+        choice = self.random.choice
+        numOnsets = min(choice([1, 1, 1, 2, 2, 3, 4]), len(self.onsets))
+        numCodas = choice([0, 0, 1, 1, 1, 2, 3])
+        result = self.onsets[:numOnsets] + self.codas[:numCodas]
+        if self.random.random() < 0.5:
+            result.insert(0, "V")
+        return result
+
+    def language(self, index: int) -> dict:
+        """ Return a random language. """
+        rand = self.random.random
+        choice = self.random.choice
+
+        cons = self.inventory(self.consonantFreqs)
+        if self.correlated():
+            present = set(cons)
+            cons += [self.counterparts[c] for c in list(cons)
+                     if c in self.counterparts and self.counterparts[c] not in present]
+        vows = self.inventory(self.vowelFreqs) or [choice(vowels.GLYPHS)]
+
+        consonantTypes = self.sample(D.CONSONANT_TYPES_F22.candidates(), 0.15)
+        stress = rand() < 0.8
+        predictableStress = stress and rand() < 0.7
+
+        morphology = self.sample(D.MORPHOLOGY.candidates(), 0.3) or [choice(list(D.MORPHOLOGY.candidates()))]
+        isolating = "isolating" in morphology and self.correlated()
+        if isolating:
+            wordFormation = ["purely isolating"]
+            affixal = "little or no affixation"
+            nonAffixal = "little or no complex word formation"
+        else:
+            formations = [f for f in D.WORD_FORMATION_S19.candidates() if f != "purely isolating"]
+            wordFormation = self.random.sample(formations, self.random.randint(1, 4))
+            affixal = choice(list(D.AFFIXATION_FREQ.candidates()))
+            nonAffixal = choice(list(D.NON_AFFIXATION_FREQ.candidates()))
+
+        wordOrder = choice(list(D.WORD_ORDER.candidates()))
+        if wordOrder in OV_ORDERS and self.correlated():
+            headedness = choice(["consistently head-final", "mostly head-final"])
+        elif wordOrder in VO_ORDERS and self.correlated():
+            headedness = choice(["consistently head-initial", "mostly head-initial"])
+        else:
+            headedness = choice(list(D.HEADEDNESS.candidates()))
+
+        return {
+            K.LANGUAGE.value: "Synthetic %d" % index,
+            K.NAME.value: self.hexHash(),
+            K.NETID.value: self.hexHash(),
+            K.COUNTRY.value: choice(self.countries),
+            K.LANGUAGE_FAMILY.value: choice(self.families),
+            K.ENDANGERMENT_LEVEL.value: [choice(list(D.ENDANGERMENT_LEVELS.candidates()))],
+            K.NUM_CONSONANTS.value: len(cons),
+            K.NUM_VOWELS.value: len(vows),
+            K.NUM_PHONEMES.value: len(cons) + len(vows),
+            K.CONSONANTS.value: cons,
+            K.CONSONANT_TYPES.value: consonantTypes,
+            K.VOWELS.value: vows,
+            K.VOWEL_TYPES.value: self.sample(D.VOWEL_TYPES.candidates(), 0.15),
+            K.NUM_CONSONANT_PLACES.value: len({self.places[c] for c in cons}),
+            K.NUM_CONSONANT_MANNERS.value: len({self.manners[c] for c in cons}),
+            K.COMPLEX_CONSONANTS.value: bool(consonantTypes),
+            K.TONE.value: rand() < 0.3,
+            K.STRESS.value: stress,
+            K.PREDICTABLE_STRESS.value: predictableStress,
+            K.UNPREDICTABLE_STRESS.value: stress and not predictableStress,
+            K.SYLLABLES.value: self.syllables(),
+            K.RECOMMEND.value: RECOMMEND,
+            K.MORPHOLOGICAL_TYPE.value: morphology,
+            K.WORD_FORMATION.value: wordFormation,
+            K.WORD_FORMATION_FREQ.value: [affixal, nonAffixal],
+            K.AFFIXATION_FREQ.value: affixal,
+            K.NON_AFFIXATION_FREQ.value: nonAffixal,
+            K.FUNCTIONAL_MORPHOLOGY.value: self.sample(D.FUNCTIONAL_MORPHOLOGY_F23.candidates(), 0.6),
+            K.WORD_ORDER.value: [wordOrder],
+            K.HEADEDNESS.value: [headedness],
+        }
+
+    def languages(self, size: int) -> Iterator[dict]:
+        """ Yield `size` random languages. """
+        for i in range(1, size + 1):
+            yield self.language(i)
+
+################################################################################
+#                                   Output
+################################################################################
+
+def write(name: str, languages: Iterable[dict]) -> int:
+    """ Write languages to the .json, .db, .snap and .sqlite files of the dataset `name`,
+        and return how many were written.
+
+        The languages are streamed to disk one at a time, so a dataset of
+        millions of languages never has to fit in memory at once (although the
+        columns of the snapshot do). The .db file
+        is written directly in TinyDB's format, rather than through TinyDB,
+        which would rewrite the whole file on every insert.
+
+        The .sqlite file is then built from the .json file, a language at a time.
+
+        All files are written under temporary names and then renamed into
+        place, so a running app never reloads a half-written dataset. """
+    if not name.startswith(const.SYNTHETIC_PREFIX):
+        raise ValueError(f"synthetic dataset names must begin with {const.SYNTHETIC_PREFIX!r}, not {name!r}")
+
+    jsonPath = const.DATASET_PATH.format(name, "%s.json" % name)
+    dbPath = const.DATASET_PATH.format(name, "%s.db" % name)
+    snapPath = const.DATASET_PATH.format(name, "%s.snap" % name)
+    sqlitePath = const.DATASET_PATH.format(name, "%s.sqlite" % name)
+    os.makedirs(os.path.dirname(jsonPath), exist_ok=True)
+
+    count = 0
+    snap = snapshot.SnapshotWriter()
+    with open(jsonPath + ".tmp", "w", encoding="utf-8") as jsonFile, \
+         open(dbPath + ".tmp", "w", encoding="utf-8") as dbFile:
+        jsonFile.write("[")
+        dbFile.write('{"_default": {')
+        for count, lang in enumerate(languages, 1):
+            sep = "\n" if count == 1 else ",\n"
+            doc = json.dumps(lang, ensure_ascii=False)
+            jsonFile.write(sep + doc)
+            # TinyDB document IDs count up from 1, and are stored as strings
+            dbFile.write('%s"%d": %s' % (sep, count, doc))
+            snap.add(lang)
+        jsonFile.write("\n]\n")
+        dbFile.write("\n}}\n")
+
+    snap.write(snapPath + ".tmp")
+    sqldb.write(sqlitePath, readLanguages(jsonPath + ".tmp"))
+
+    os.replace(jsonPath + ".tmp", jsonPath)
+    os.replace(dbPath + ".tmp", dbPath)
+    os.replace(snapPath + ".tmp", snapPath)
+    return count
+
+def readLanguages(jsonPath: str) -> Iterator[dict]:
+    """ Read back the languages of a .json file written by write(), one at a
+        time (each is on its own line). """
+    with open(jsonPath, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if line.startswith("{"):
+                yield json.loads(line)
+
+def parseSize(s: str) -> int:
+    """ Parse a dataset size like "1000", "10k" or "1m". """
+    multipliers = {"k": 10**3, "m": 10**6}
+    s = s.strip().lower()
+    if s and s[-1] in multipliers:
+        return int(s[:-1]) * multipliers[s[-1]]
+    return int(s)
+
+def defaultName(size: int) -> str:
+    """ Return a name like _syn10k for a dataset of the given size. """
+    for suffix, multiplier in [("m", 10**6), ("k", 10**3)]:
+        if size >= multiplier and size % multiplier == 0:
+            return "%s%d%s" % (const.SYNTHETIC_PREFIX, size // multiplier, suffix)
+    return "%s%d" % (const.SYNTHETIC_PREFIX, size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset.")
+    parser.add_argument('-v', '--verbosity', action='count', default=0,
+                        help='increase output verbosity')
+    parser.add_argument('size', type=parseSize,
+                        help='how many languages to generate (e.g. 1000, 10k, 1m)')
+    parser.add_argument('--name',
+                        help=f'the name of the dataset (default: {const.SYNTHETIC_PREFIX}<size>)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed, for reproducible datasets (default: 0)')
+    parser.add_argument('--correlation', type=float, default=DEFAULT_CORRELATION,
+                        help='how strongly correlated traits are, from 0 to 1 (default: %(default)s)')
+    args = parser.parse_args()
+
+    # Reuse the verbosity levels of the CSV conversion
+    from .csv_to_json import get_log_level
+    logger.setLevel(get_log_level(args.verbosity))
+
+    name = args.name or defaultName(args.size)
+    generator = LanguageGenerator(seed=args.seed, correlation=args.correlation)
+    logger.info('Generating %d languages into %s ...', args.size, name)
+    count = write(name, generator.languages(args.size))
+    print(f"Wrote {count} languages to dataset {name}.")
+
+if __name__ == '__main__':
+    main()
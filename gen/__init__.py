@@ -1 +1,36 @@
+import contextlib
+import os
+
 import phonemes
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: builds aren't serialized, but each file is still written atomically
+    fcntl = None
+
+# Held while building, so that processes building at once (e.g. several app
+# workers started with LINGDB_GENERATE) take turns; every build after the first
+# then finds nothing changed
+LOCK_PATH = os.path.join(os.path.dirname(__file__), ".build.lock")
+
+@contextlib.contextmanager
+def buildlock():
+    if fcntl is None:
+        yield
+        return
+    with open(LOCK_PATH, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+# Regenerate front.html and survey.html (and the static files they use), writing
+# only the files whose content has changed. Cheap when nothing has, so it is
+# safe to call on app startup (see LINGDB_GENERATE in app/__init__.py).
+def build():
+    from . import allgen, splice
+    with buildlock():
+        html = allgen.main(output=splice.CONTENT)
+        return splice.main(html)
@@ -5,11 +5,13 @@
 #
 #       https://xkcd.com/1421/
 #
+# The HTML is built in memory (see capture()), and files are only written when
+# their content changes (see writeifchanged()), so regenerating is cheap.
+#
 # Usage:
 #   From cmd line in project root: (type in cmd after $)
-#        > linguistics-db/ $ set PYTHONIOENCODING=utf-8
-#        > linguistics-db/ $ python -m gen > gen/out.html
-import sys, copy, json
+#        > linguistics-db/ $ python -m gen
+import sys, contextlib, copy, json, glob, hashlib, os, tempfile, threading
 
 from phonemes import vowels, consonants, metaclasses
 from . import ipa_table
@@ -25,7 +27,6 @@ from data import const, selectors
 #                                                                              #
 ################################################################################
 
-indent_lvl = 0    # current indent level
 TAB_WIDTH = 2     # spaces per indentation level
 
 # Tag types
@@ -43,6 +44,11 @@ VOWEL = "vowel"
 ACTIVE = True
 INACTIVE = False
 
+# Popover bodies are written to separate files here, one per popover, named by
+# the hash of their content, and fetched by front.js when they are first needed
+FRAGMENT_PATH = "app/static/popovers/"
+FRAGMENT_URL = "/static/popovers/"
+
 IPA_TRAPEZOID_ASPECT_RATIO = 1000 / 700
 IPA_TRAPEZOID_H = 300
 IPA_TRAPEZOID_W = int(IPA_TRAPEZOID_ASPECT_RATIO * IPA_TRAPEZOID_H)
@@ -53,21 +59,80 @@ IPA_TRAPEZOID_W = int(IPA_TRAPEZOID_ASPECT_RATIO * IPA_TRAPEZOID_H)
 #                                                                              #
 ################################################################################
 
+# The lines of HTML generated so far, and the current indent level
+class HTMLBuffer:
+    def __init__(self):
+        self.lines = []
+        self.indentLvl = 0
+
+    def write(self, str):
+        tab = " " * (TAB_WIDTH * self.indentLvl)
+        self.lines.append("%s%s\n" % (tab, str))
+
+    def getvalue(self):
+        return "".join(self.lines)
+
+# The buffer tprint() currently writes to, per thread
+output = threading.local()
+
+# Collect everything tprint()ed within the with block into a new HTMLBuffer
+@contextlib.contextmanager
+def capture():
+    outer = getattr(output, "buffer", None)
+    output.buffer = HTMLBuffer()
+    try:
+        yield output.buffer
+    finally:
+        output.buffer = outer
+
+def currentbuffer():
+    buffer = getattr(output, "buffer", None)
+    if buffer is None:
+        raise RuntimeError("HTML can only be generated within capture()")
+    return buffer
+
 # increase the current indent level
 def indent():
-    global indent_lvl
-    indent_lvl += 1
+    currentbuffer().indentLvl += 1
 
 # decrease the current indent level to a min of 0
 def dedent():
-    global indent_lvl
-    indent_lvl = max(0, indent_lvl-1)
+    buffer = currentbuffer()
+    buffer.indentLvl = max(0, buffer.indentLvl-1)
 
-# print str preceded by the current indent level
+# print str (into the current buffer) preceded by the current indent level
 def tprint(str):
-    global indent_lvl
-    tab = " " * (TAB_WIDTH * indent_lvl)
-    print("%s%s" % (tab, str))
+    currentbuffer().write(str)
+
+# Write content to path, unless the file already has exactly that content.
+# The file is replaced in one step, so readers never see it half written, and
+# each writer uses its own temporary file, so concurrent builds can't clash.
+# Return whether it was written.
+def writeifchanged(path, content):
+    data = content.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if hashlib.sha1(f.read()).digest() == hashlib.sha1(data).digest():
+                return False
+    except FileNotFoundError:
+        pass
+
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+    except BaseException:
+        removeifexists(tmpPath)
+        raise
+    return True
+
+# Remove the file at path, unless (e.g.) a concurrent build already has
+def removeifexists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 # Wrap str in an HTML tag t and return it, with optional classList
 # NOTE this needs a lot of work (making it work w/ indenting, and allowing embedding)
@@ -320,6 +385,40 @@ def popoverbodiesdiv(selectorList):
     return
 
 
+# Return the HTML of the popover body (template) of sel, or "" if it has none
+def popoverbodyhtml(sel):
+    with capture() as html:
+        popoverbodiesdiv([sel])
+    return html.getvalue()
+
+# Write the popover body of every selector in selectorList to its own fragment
+# file in FRAGMENT_PATH, named by its content hash (so it can be cached forever).
+# Return the manifest: a dict mapping each popover prefix to its fragment's URL.
+def popoverfragments(selectorList):
+    os.makedirs(FRAGMENT_PATH, exist_ok=True)
+
+    manifest = {}
+    for sel in selectorList:
+        prefix = sel.get(selectors.POPOVER_PREFIX)
+        html = popoverbodyhtml(sel)
+        if not prefix or not html:
+            continue
+
+        digest = hashlib.sha1(html.encode("utf-8")).hexdigest()[:10]
+        name = "%s.%s.html" % (prefix, digest)
+        writeifchanged(FRAGMENT_PATH + name, html)
+        manifest[prefix] = FRAGMENT_URL + name
+
+    # Remove the fragments of old versions of the popovers
+    current = set(os.path.basename(url) for url in manifest.values())
+    for path in glob.glob(FRAGMENT_PATH + "*.html"):
+        if os.path.basename(path) not in current:
+            removeifexists(path)
+
+    writeifchanged(FRAGMENT_PATH + "manifest.json", json.dumps(manifest, sort_keys=True, indent=4) + "\n")
+
+    return manifest
+
 # Given the info for a list of selectors, print out the complete HTML representing
 # the following for every selector in the list:
 # 1) An <option> selector containing each
@@ -777,31 +876,58 @@ def ipaboxgen(table, headers, pType):
     tprint(tag("div", type=CLOSE))
 
 
-# Print the selectors.py constants to a .js file for use
-def exportJavascript():
-    # TODO move these constants elsewhere (__main__ or __init__ perhaps?)
-    JS_PATH = "app/static/js/"
-    JS_NAME = "selectors_const.js"
-
-    filename = "{0}{1}".format(JS_PATH, JS_NAME)
-
-    VAR_NAME = "SELECTORS_DICT"
-
-    # Remove the functions because they aren't transferrable to JS
-    # Note the functions have been removed so this step is no longer necessary
-    dict = copy.deepcopy(selectors.SELECTORS_DICT)
-    for key in dict:
-        val = dict[key]
-        # del val[selectors.FUNCTION]
-
-    VAR_DATA = json.dumps(dict, sort_keys=True, indent=4)
-
-    with open(filename, "w", encoding="utf-8") as js:
-        var = "var {0} = {1};\n".format(VAR_NAME, VAR_DATA)
-
-        js.write("/* Automatically generated by selectors.py. DO NOT EDIT! */\n")
-        js.write(var)
-        js.flush() # "with" should take care of this, but being explicit is nice
+# The fields of each selector that front.js uses. The others (e.g. PROPERTY and
+# DICT) are only needed serverside, so they aren't exported.
+JS_FIELDS = [
+    selectors.HTML_ID,
+    selectors.MODE,
+    selectors.POPOVER_PREFIX,
+    selectors.REPLY,
+    selectors.REPLY_VARS,
+]
+
+# Maps the names of static files (relative to app/static/) to the content-hashed
+# names they are actually written to. Read by app/assets.py.
+ASSET_MANIFEST = "app/static/assets.json"
+
+# Write content to a static file, under a name including its content hash
+# (e.g. js/selectors_const.js -> js/selectors_const.0123456789.js), so that it
+# can be cached forever. Remove any older versions, and record the new name in
+# the asset manifest.
+def writeasset(name, content):
+    base, ext = os.path.splitext(name)
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:10]
+    hashedName = "%s.%s%s" % (base, digest, ext)
+
+    staticPath = os.path.dirname(ASSET_MANIFEST)
+    hashedPath = os.path.join(staticPath, hashedName)
+    for path in glob.glob(os.path.join(staticPath, "%s.*%s" % (base, ext))):
+        if path != hashedPath:
+            removeifexists(path)
+    writeifchanged(hashedPath, content)
+
+    manifest = {}
+    if os.path.exists(ASSET_MANIFEST):
+        with open(ASSET_MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    manifest[name] = hashedName
+    writeifchanged(ASSET_MANIFEST, json.dumps(manifest, sort_keys=True, indent=4) + "\n")
+
+# Export the selectors.py constants (and the manifest of popover fragments) to a
+# minified, content-hashed .js file for use
+def exportJavascript(fragments):
+    # Only the fields used by the frontend
+    dict = {}
+    for key, sel in selectors.SELECTORS_DICT.items():
+        dict[key] = {field: sel[field] for field in JS_FIELDS if field in sel}
+
+    compact = lambda data: json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    js = "".join([
+        "/* Automatically generated by gen/allgen.py. DO NOT EDIT! */\n",
+        "var SELECTORS_DICT=%s;\n" % compact(dict),
+        "var POPOVER_FRAGMENTS=%s;\n" % compact(fragments),
+    ])
+    writeasset("js/selectors_const.js", js)
 
 
 ################################################################################
@@ -810,26 +936,33 @@ def exportJavascript():
 #                                                                              #
 ################################################################################
 
-# Prints the auto generated html to stdout, or a file named output if specified
-def main(output=None):
+# Write the popover fragments and the js file, and return the auto generated html
+def generate():
 
-    # Print the js file
-    exportJavascript()
+    # Write the popover bodies, and the js file (which lists them)
+    fragments = popoverfragments(selectors.SELECTORS)
+    exportJavascript(fragments)
 
-    # Redirect to file if desired
-    if output:
-        file = open(output, "w", encoding="utf-8")
-        sys.stdout = file
+    with capture() as html:
+        tprint(comment("  ### BEGIN AUTO-GENERATED HTML. DO NOT EDIT ###"))
 
-    tprint(comment("  ### BEGIN AUTO-GENERATED HTML. DO NOT EDIT ###"))
+        # Generate the dropdown menu and its associated divs
+        selectdropdowndiv(selectors.SELECTORS)
 
-    # Generate the dropdown menu and its associated divs
-    selectdropdowndiv(selectors.SELECTORS)
+        # Popover body templates (pbox, clbox, lbox, ipabox) are fetched into
+        # this div as they are needed (see popoverfragments)
+        tprint(tag("div", id="popover-templates"))
 
-    # Generate popover body templates (pbox, clbox, lbox, ipabox)
-    popoverbodiesdiv(selectors.SELECTORS)
+        tprint(comment("  ### END AUTO-GENERATED HTML. EDITING IS OK AGAIN ###"))
 
-    tprint(comment("  ### END AUTO-GENERATED HTML. EDITING IS OK AGAIN ###"))
+    return html.getvalue()
 
-    # Make sure we're really done printing
-    sys.stdout.flush()
+# Prints the auto generated html to stdout, or writes it to a file named output
+# if specified (and changed). Returns the html.
+def main(output=None):
+    html = generate()
+    if output:
+        writeifchanged(output, html)
+    else:
+        sys.stdout.write(html)
+    return html
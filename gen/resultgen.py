@@ -0,0 +1,190 @@
+# Precompute the results of every single-trait query, for each dataset
+#
+# There are only so many single-trait queries: one per selector (see
+# data/selectors.py), per value it can take, per mode, per reasonable k.
+# This runs each of them once, ahead of time, and writes the results to
+# data/datasets/<name>/<name>.results.json, which app/precomputed.py then serves
+# without evaluating anything. Two-query requests are answered from the same
+# file, one query at a time.
+#
+# Lists are queried one value at a time (e.g. "at least 1 of p"), with k of 0
+# or 1 (or "all of p"); numbers with every k from 0 to one more than the
+# largest value in the dataset. Anything else falls back to the live query
+# engine.
+#
+# Results files are tied to the exact .db file they were computed from, so
+# rerun this whenever the datasets are rebuilt (i.e. after `python -m data`).
+#
+# Usage:
+#   From cmd line in project root: (type in cmd after $)
+#        > linguistics-db/ $ python -m gen.resultgen          (every semester)
+#        > linguistics-db/ $ python -m gen.resultgen F25 S19  (just these)
+#
+# File format:
+#   {
+#     "dataset": "F25",
+#     "version": <sha1 of F25.db>,
+#     "sqliteVersion": <sha1 of F25.sqlite, or null if there is none>,
+#     "languages": 27,
+#     "masks": ["BwAAAA", ...],   # distinct sets of matching languages
+#     "results": {<digest>: <index into masks, or null if too few languages
+#                            had data for the query>, ...}
+#   }
+#
+# Each mask is a bitmask of matching languages (bit i set if the i-th language,
+# in TinyDB document order, matched), as little-endian URL-safe base64. The
+# i-th language is also the one with id i + 1 in the .sqlite file, which is
+# built from the same JSON, so the results serve either engine.
+import argparse
+import base64
+import json
+import os
+
+from app import precomputed, querier, query as querylib
+from data import const, datasets, selectors
+
+# The modes offered by the frontend. ALL is sent with k = len(selList) (i.e. 1,
+# for the single values enumerated here), and only applies to lists.
+MODES = [querylib.GEQ, querylib.LEQ, querylib.EQ, querylib.LT, querylib.GT, querylib.NEQ, querylib.ALL]
+
+################################################################################
+#                                                                              #
+#                        ENUMERATION                                           #
+#                                                                              #
+################################################################################
+
+def maxValue(languages, property):
+    """Return the largest integer value of property in languages (or 0)."""
+    values = [lang[property] for lang in languages if isinstance(lang.get(property), int)]
+    return max(values, default=0)
+
+def queryDatas(selector, languages):
+    """Yield a query dict (like the ones the frontend sends) for every
+    single-trait query on selector worth precomputing."""
+    trait = selector[selectors.HTML_ID]
+    replyVars = selector[selectors.REPLY_VARS] or []
+    base = {"trait": trait, "reply": selector[selectors.REPLY]}
+
+    if not replyVars:
+        yield base
+        return
+
+    values = selectors.choices(selector) if "sel" in replyVars or "selList" in replyVars else [None]
+    for value in values:
+        queryData = dict(base)
+        if "sel" in replyVars:
+            queryData["sel"] = value
+        if "selList" in replyVars:
+            queryData["selList"] = [value]
+
+        if "mode" not in replyVars:
+            yield queryData
+            continue
+
+        if "selList" in replyVars:
+            ks = [0, 1]
+        else:
+            property = selector[selectors.PROPERTY].format(value=value)
+            ks = range(maxValue(languages, property) + 2)
+
+        for mode in MODES:
+            if mode == querylib.ALL:
+                if "selList" in replyVars:
+                    yield dict(queryData, mode=mode, k="1")
+                continue
+            for k in ks:
+                yield dict(queryData, mode=mode, k=str(k))
+
+def allQueries(languages):
+    """Return every single-trait Query worth precomputing, without duplicates."""
+    queries = {}
+    for selector in selectors.SELECTORS:
+        if selector[selectors.MODE] == selectors.NO_QUERY:
+            continue
+        for queryData in queryDatas(selector, languages):
+            form = {"payload": json.dumps([queryData])}
+            try:
+                q, = querier.queriesFromForm(form)
+            except (KeyError, TypeError, ValueError):
+                # Not a valid combination for this selector
+                continue
+            queries.setdefault(precomputed.digestKey(q), q)
+    return list(queries.values())
+
+################################################################################
+#                                                                              #
+#                        PRECOMPUTATION                                        #
+#                                                                              #
+################################################################################
+
+def encodeMask(indices):
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def precompute(name, verbose=False):
+    """Precompute every single-trait query on the named dataset, and return the
+    results (in the format described above)."""
+    dataset = datasets.loadDataset(name)
+    db = dataset.database
+    # Matches are TinyDB documents, which know their IDs. dataset.languages
+    # is in ID order.
+    ids = sorted(doc.doc_id for doc in db.all())
+    indexOfID = {docID: i for i, docID in enumerate(ids)}
+
+    masks = {}
+    results = {}
+    queries = allQueries(dataset.languages)
+    for q in queries:
+        try:
+            matches = querier.handleQuery(q, db)
+        except querier.QuorumError:
+            results[precomputed.digestKey(q)] = None
+            continue
+        except Exception as err:
+            if verbose:
+                print(f"{name}: skipping {q.canonical()}: {err!r}")
+            continue
+        mask = encodeMask(indexOfID[m.language.data.doc_id] for m in matches)
+        results[precomputed.digestKey(q)] = masks.setdefault(mask, len(masks))
+
+    if verbose:
+        print(f"{name}: {len(results)} queries, {len(masks)} distinct results")
+
+    return {
+        "dataset": name,
+        "version": dataset.fingerprint[2],
+        "sqliteVersion": sqliteVersion(name),
+        "languages": len(dataset),
+        "masks": list(masks),
+        "results": results,
+    }
+
+def sqliteVersion(name):
+    try:
+        return datasets.fingerprint(datasets.sqliteFilename(name))[2]
+    except FileNotFoundError:
+        return None
+
+def write(name, verbose=False):
+    path = datasets.resultsFilename(name)
+    data = precompute(name, verbose)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"), sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute single-trait query results.")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument('datasets', nargs='*',
+                        help='which datasets to precompute (default: every non-test semester)')
+    args = parser.parse_args()
+
+    names = args.datasets or [n for n in const.Datasets.names() if not datasets.isTestDataset(n)]
+    for name in names:
+        write(name, args.verbose)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
-# Given a template text file A and a content text file B, create a new file that
+# Given a template text A and a content text B, create a new text that
 # replaces all of the content in the template A between two anchors with
-# the contents of the contents of B. Write this file to filenameC
+# the contents of B. main() does this for every template in TEMPLATES at once,
+# and writes each output file only if its content changed.
 
 # NOTE: Nested replacements are not supported.
 # Anchors should be alone on a line (excluding whitespace) but this is not enforced
@@ -10,16 +11,28 @@
 # START START END END will replace from the first start to the first end,
 # NOT until the second end.
 
-import sys
+from .allgen import writeifchanged
 
-def splice(template, content, output, startAnchor, endAnchor):
-    # template, content, output are all filenames / paths
-    fTemplate = open(template, "r", encoding="utf-8")
-    fContent  = open(content, "r", encoding="utf-8")
-    fOutput   = open(output, "w", encoding="utf-8")
+START_ANCHOR = "<!-- ANCHOR: AUTOGEN START -->"
+END_ANCHOR   = "<!-- ANCHOR: AUTOGEN END -->"
+
+# The auto generated html, as written by allgen.main
+CONTENT = "gen/out.html"
+
+# (template, output) pairs to splice the auto generated html into
+TEMPLATES = [
+    # front.html (main LingDB site)
+    ("app/templates/front_template.html", "app/templates/front.html"),
+    # survey.html (google docs autofiller site)
+    ("app/templates/survey_template.html", "app/templates/survey.html"),
+]
+
+# Return template (a str) with content (a str) spliced in between the anchors
+def splice(template, content, startAnchor, endAnchor):
+    output = []
 
     replacing = False # Am I currently replacing?
-    for templateLine in fTemplate:
+    for templateLine in template.splitlines(keepends=True):
 
 
         # This block of code is structured so oddly to highlight the fact
@@ -37,12 +50,12 @@ def splice(template, content, output, startAnchor, endAnchor):
 
                 # Print each line of content, prepended by the same whitespace
                 # as preceded the ending anchor
-                for contentLine in fContent:
-                    fOutput.write(" " * spaces)
-                    fOutput.write(contentLine)
+                for contentLine in content.splitlines(keepends=True):
+                    output.append(" " * spaces)
+                    output.append(contentLine)
 
                 # Print the end anchor when done
-                fOutput.write(templateLine)
+                output.append(templateLine)
             else:
                 pass # do nothing for template lines between anchors
 
@@ -51,27 +64,24 @@ def splice(template, content, output, startAnchor, endAnchor):
         else:
             if startAnchor in templateLine:
                 replacing = True
-                fOutput.write(templateLine)
+                output.append(templateLine)
             else:
-                fOutput.write(templateLine)
-
-
-
-
-def main():
-    # Generate front.html (main LingDB site)
-    template = "app/templates/front_template.html"
-    content = "gen/out.html"
-    output = "app/templates/front.html"
+                output.append(templateLine)
 
-    start = "<!-- ANCHOR: AUTOGEN START -->"
-    end   = "<!-- ANCHOR: AUTOGEN END -->"
+    return "".join(output)
 
-    splice(template, content, output, start, end)
 
-    # Generate survey.html (google docs autofiller site)
-    template = "app/templates/survey_template.html"
-    content = "gen/out.html"
-    output = "app/templates/survey.html"
+# Splice content (by default, the contents of CONTENT) into every template, and
+# write the outputs that changed. Return the paths of the outputs written.
+def main(content=None):
+    if content is None:
+        with open(CONTENT, "r", encoding="utf-8") as f:
+            content = f.read()
 
-    splice(template, content, output, start, end)
+    written = []
+    for template, output in TEMPLATES:
+        with open(template, "r", encoding="utf-8") as f:
+            text = splice(f.read(), content, START_ANCHOR, END_ANCHOR)
+        if writeifchanged(output, text):
+            written.append(output)
+    return written
@@ -1,2 +1,9 @@
 from . import consonants, vowels, metaclasses, phonemes, ipa_json
 from .phonemes import *
+
+def __getattr__(name):
+    """Forward the tables of .phonemes (e.g. GLYPHS), which are only built when
+    first used, and so aren't imported by the * above"""
+    if name in phonemes.TABLES:
+        return getattr(phonemes, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -84,51 +84,73 @@ HEADERS = {
 # ================= JSON processing ===================
 # Get Consonant info from consonants.json
 # Consonants.json is generated by gen/ipa-json.js from gen/ipa-consonats.html
-data = ipa_json.readIPAFromJson("phonemes/consonants.json")
-#print(data)
+#
+# The tables below are only built when they are first used (by load()), so that
+# importing this module (and everything that imports it) stays cheap.
+TABLES = ("data", "GLYPHS", "MANNER_DICT", "PLACE_DICT", "VOICING_DICT", "CLASSES_DICT")
 
-# Extract glyphs from json
-GLYPHS = utils.glyphs(data)
+def load():
+    """Build the tables from consonants.json, unless they have been already"""
+    global data, GLYPHS, MANNER_DICT, PLACE_DICT, VOICING_DICT, CLASSES_DICT
+    if "CLASSES_DICT" in globals():
+        return
 
-# Create dicts mapping all possible property values to the glyphs satisfying
-# those properties
-# E.g. {"voiced":    ["b", "d", ...],
-#       "voiceless": ["p", "t", ...]}"""
-MANNER_DICT = utils.enumerateProperty(data, "manner")
-PLACE_DICT = utils.enumerateProperty(data, "place")
-VOICING_DICT = utils.enumerateProperty(data, "voicing")
+    data = ipa_json.readIPAFromJson("phonemes/consonants.json")
 
-# Combine these dicts together
-CLASSES_DICT = {**MANNER_DICT, **PLACE_DICT, **VOICING_DICT}
-# print(CLASSES_DICT)
+    # Extract glyphs from json
+    GLYPHS = utils.glyphs(data)
+
+    # Create dicts mapping all possible property values to the glyphs satisfying
+    # those properties
+    # E.g. {"voiced":    ["b", "d", ...],
+    #       "voiceless": ["p", "t", ...]}"""
+    MANNER_DICT = utils.enumerateProperty(data, "manner")
+    PLACE_DICT = utils.enumerateProperty(data, "place")
+    VOICING_DICT = utils.enumerateProperty(data, "voicing")
+
+    # Combine these dicts together (last, since it marks the tables as built)
+    CLASSES_DICT = {**MANNER_DICT, **PLACE_DICT, **VOICING_DICT}
+
+def __getattr__(name):
+    """Build the tables the first time one of them is used"""
+    if name in TABLES:
+        load()
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 
 # =============== API functions ==================
 def isConsonant(s):
     """Return True iff s is a consonant representable in this system"""
+    load()
     return s in GLYPHS
 
 def getGlyphsFromClass(className):
+    load()
     return utils.getGlyphsFromClass(data, CLASSES_DICT, className)
 
 def getGlyphsFromClasses(classList):
+    load()
     return utils.getGlyphsFromClasses(data, CLASSES_DICT, classList)
 
 def getGlyphsMatching(propertyName, propertyValue):
     """Finds a list of all phonemes from data such that the phoneme's
     property named propertyName has the value specified by propertyValue. Return
     a list of the glyphs of all matching phonemes"""
+    load()
     return utils.getGlyphsMatching(data, propertyName, propertyValue)
 
 def getNumMannersFromGlyphs(glyphList):
     """Finds the number of manners of articulation represented in glyphList"""
+    load()
     phonemes = [utils.getDataFromGlyph(data, g) for g in glyphList]
     matches = utils.enumerateProperty(phonemes, "manner")
     return len(matches)
 
 def getNumPlacesFromGlyphs(glyphList):
     """Finds the number of places of articulation represented in glyphList"""
+    load()
     phonemes = [utils.getDataFromGlyph(data, g) for g in glyphList]
     matches = utils.enumerateProperty(phonemes, "place")
     return len(matches)
@@ -13,101 +13,132 @@ from . import consonants, vowels, phonemes, utils
 # ref. https://en.wikipedia.org/wiki/Place_of_articulation
 # ref. https://essentialsoflinguistics.pressbooks.com/chapter/4-5-natural-classes/
 
-PHONEMES    = phonemes.GLYPHS
-VOWELS      = vowels.GLYPHS
-CONSONANTS  = consonants.GLYPHS
+# Every class below is only built when it is first used (by load()), since doing
+# so requires reading in all of the phoneme data
+TABLES = (
+    "PHONEMES", "VOWELS", "CONSONANTS", "COMPLEX_CONSONANTS", "STRIDENTS",
+    "SIBILANTS", "GLOTTALS", "LABIALS", "CORONALS", "NASALS",
+    "LATERAL_APPROXIMANTS", "FRICATIVES", "RHOTICS", "LIQUIDS", "GLIDES",
+    "APPROXIMANTS", "VOICED", "VOICELESS", "SONORANTS", "OBSTRUENTS", "VOCALIC",
+    "CONSONANTALS", "SYLLABIC", "NONSYLLABIC", "CONTINUANTS", "OCCLUSIVES",
+    "DICT",
+)
+
+def load():
+    """Build the classes, unless they have been already"""
+    global PHONEMES, VOWELS, CONSONANTS, COMPLEX_CONSONANTS, STRIDENTS, \
+        SIBILANTS, GLOTTALS, LABIALS, CORONALS, NASALS, LATERAL_APPROXIMANTS, \
+        FRICATIVES, RHOTICS, LIQUIDS, GLIDES, APPROXIMANTS, VOICED, VOICELESS, \
+        SONORANTS, OBSTRUENTS, VOCALIC, CONSONANTALS, SYLLABIC, NONSYLLABIC, \
+        CONTINUANTS, OCCLUSIVES, DICT
+    if "DICT" in globals():
+        return
+
+    PHONEMES    = phonemes.GLYPHS
+    VOWELS      = vowels.GLYPHS
+    CONSONANTS  = consonants.GLYPHS
+
+    # Unsure what these are
+    COMPLEX_CONSONANTS = []
+
+    # A superset of sibiliants incl. s, z, ʃ, ʒ, tʃ, dʒ + f, v
+    STRIDENTS = []
+
+    # A subset of stridents incl. s, z, ʃ, ʒ, tʃ, dʒ
+    SIBILANTS = []
+
+    # ====== Place-based classes ========
+    # ---- Basic places ----
+    GLOTTALS = consonants.getGlyphsMatching("place", "glottal")
+
+    # ---- Complex places ----
+    # A category including bilabials and labiodentals
+    LABIALS = []
+
+    CORONALS = []
+
+    # ====== Manner-based classes =======
+    # ---- Basic manners ----
+    NASALS                  = consonants.getGlyphsMatching("manner", "nasal")
+    LATERAL_APPROXIMANTS    = consonants.getGlyphsMatching("manner", "lateral approximant")
+    FRICATIVES              = consonants.getGlyphsMatching("manner", "fricative")
+
+    # ---- Complex manners ----
+    # https://en.wikipedia.org/wiki/Rhotic_consonant
+    RHOTICS = ["r", "ɾ", "ɹ", "ɻ", "ʀ", "ʁ", "ɽ", "ɺ"]
+
+    # https://en.wikipedia.org/wiki/Liquid_consonant
+    LIQUIDS = utils.unique(RHOTICS + LATERAL_APPROXIMANTS)
+
+    # https://en.wikipedia.org/wiki/Semivowel
+    GLIDES = ["j", "ɥ", "ɰ", "w"]
+
+    APPROXIMANTS = utils.unique(LATERAL_APPROXIMANTS + RHOTICS + GLIDES)
+
+    # ====== Other classes ========
+    # https://gawron.sdsu.edu/intro/course_core/lectures/phonology.htm
+    VOICED      = phonemes.getGlyphsMatching("voicing", "voiced")
+    VOICELESS   = phonemes.getGlyphsMatching("voicing", "voiceless")
+
+    SONORANTS   = utils.unique(VOWELS + GLIDES + LIQUIDS + NASALS)
+    OBSTRUENTS  = utils.subtract(PHONEMES, SONORANTS)
+
+    VOCALIC         = utils.unique(VOWELS + GLIDES + GLOTTALS)
+    CONSONANTALS    = utils.subtract(PHONEMES, VOCALIC)
+
+    # The syllabic / nonsyllabic boundary is language specific and not standard.
+    # Therefore this class is very misleading - maybe it should be removed
+    SYLLABIC    = utils.unique(VOWELS + LIQUIDS + NASALS)
+    NONSYLLABIC = utils.subtract(PHONEMES, SYLLABIC)
+
+    # NOTE: The continuant / occlusive boundary is disputed
+    # https://en.wikipedia.org/wiki/Continuant
+    # https://en.wikipedia.org/wiki/Occlusive
+    CONTINUANTS = utils.unique(FRICATIVES + VOWELS + APPROXIMANTS)
+    OCCLUSIVES  = utils.subtract(PHONEMES, CONTINUANTS)
+
+    # Dict containing all the lists above
+    classes = {
+           #"complex consonant":     COMPLEX_CONSONANTS,
+           #"stridents":             STRIDENTS,
+           #"sibilant":              SIBILANTS,
+
+           # liquids + rhotics
+           #"labial":                LABIALS,
+           #"coronal":               CORONALS,
+
+            "voiced":               VOICED,
+            "voiceless":            VOICELESS,
+
+            "sonorant":             SONORANTS,
+            "obstruents":           OBSTRUENTS,
+
+            "consonantal":          CONSONANTALS,
+            "vocalic":              VOCALIC,
+
+            "syllabic":             SYLLABIC,
+            "nonsyllabic":          NONSYLLABIC,
+
+            "continuant":           CONTINUANTS,
+            "noncontinuant":        OCCLUSIVES,
+    }
 
-# Unsure what these are
-COMPLEX_CONSONANTS = []
+    # Sort all of the lists stored in DICT to ensure they are in a deterministic order
+    # (and to avoid polluting the git history with a bunch of meaningless order changes)
+    # DICT is assigned last, since it marks the classes as built
+    DICT = {key : sorted(classes[key]) for key in classes}
 
-# A superset of sibiliants incl. s, z, ʃ, ʒ, tʃ, dʒ + f, v
-STRIDENTS = []
-
-# A subset of stridents incl. s, z, ʃ, ʒ, tʃ, dʒ
-SIBILANTS = []
-
-# ====== Place-based classes ========
-# ---- Basic places ----
-GLOTTALS = consonants.getGlyphsMatching("place", "glottal")
-
-# ---- Complex places ----
-# A category including bilabials and labiodentals
-LABIALS = []
-
-CORONALS = []
-
-# ====== Manner-based classes =======
-# ---- Basic manners ----
-NASALS                  = consonants.getGlyphsMatching("manner", "nasal")
-LATERAL_APPROXIMANTS    = consonants.getGlyphsMatching("manner", "lateral approximant")
-FRICATIVES              = consonants.getGlyphsMatching("manner", "fricative")
-
-# ---- Complex manners ----
-# https://en.wikipedia.org/wiki/Rhotic_consonant
-RHOTICS = ["r", "ɾ", "ɹ", "ɻ", "ʀ", "ʁ", "ɽ", "ɺ"]
-
-# https://en.wikipedia.org/wiki/Liquid_consonant
-LIQUIDS = utils.unique(RHOTICS + LATERAL_APPROXIMANTS)
-
-# https://en.wikipedia.org/wiki/Semivowel
-GLIDES = ["j", "ɥ", "ɰ", "w"]
-
-APPROXIMANTS = utils.unique(LATERAL_APPROXIMANTS + RHOTICS + GLIDES)
-
-# ====== Other classes ========
-# https://gawron.sdsu.edu/intro/course_core/lectures/phonology.htm
-VOICED      = phonemes.getGlyphsMatching("voicing", "voiced")
-VOICELESS   = phonemes.getGlyphsMatching("voicing", "voiceless")
-
-SONORANTS   = utils.unique(VOWELS + GLIDES + LIQUIDS + NASALS)
-OBSTRUENTS  = utils.subtract(PHONEMES, SONORANTS)
-
-VOCALIC         = utils.unique(VOWELS + GLIDES + GLOTTALS)
-CONSONANTALS    = utils.subtract(PHONEMES, VOCALIC)
-
-# The syllabic / nonsyllabic boundary is language specific and not standard.
-# Therefore this class is very misleading - maybe it should be removed
-SYLLABIC    = utils.unique(VOWELS + LIQUIDS + NASALS)
-NONSYLLABIC = utils.subtract(PHONEMES, SYLLABIC)
-
-# NOTE: The continuant / occlusive boundary is disputed
-# https://en.wikipedia.org/wiki/Continuant
-# https://en.wikipedia.org/wiki/Occlusive
-CONTINUANTS = utils.unique(FRICATIVES + VOWELS + APPROXIMANTS)
-OCCLUSIVES  = utils.subtract(PHONEMES, CONTINUANTS)
-
-# Dict containing all the lists above
-DICT = {
-       #"complex consonant":     COMPLEX_CONSONANTS,
-       #"stridents":             STRIDENTS,
-       #"sibilant":              SIBILANTS,
-
-       # liquids + rhotics
-       #"labial":                LABIALS,
-       #"coronal":               CORONALS,
-
-        "voiced":               VOICED,
-        "voiceless":            VOICELESS,
-
-        "sonorant":             SONORANTS,
-        "obstruents":           OBSTRUENTS,
-
-        "consonantal":          CONSONANTALS,
-        "vocalic":              VOCALIC,
-
-        "syllabic":             SYLLABIC,
-        "nonsyllabic":          NONSYLLABIC,
-
-        "continuant":           CONTINUANTS,
-        "noncontinuant":        OCCLUSIVES,
-}
-
-# Sort all of the lists stored in DICT to ensure they are in a deterministic order
-# (and to avoid polluting the git history with a bunch of meaningless order changes)
-DICT = {key : sorted(DICT[key]) for key in DICT}
+def __getattr__(name):
+    """Build the classes the first time one of them is used"""
+    if name in TABLES:
+        load()
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 def getGlyphsFromClass(className):
+    load()
     return utils.getGlyphsFromClass(phonemes.data, DICT, className)
 
 def getGlyphsFromClasses(classList):
+    load()
     return utils.getGlyphsFromClasses(phonemes.data, DICT, classList)
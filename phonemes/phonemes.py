@@ -3,9 +3,25 @@ single place"""
 
 from . import consonants, vowels, metaclasses, utils
 
-# Concatenate the consonants and vowels data
-data = consonants.data + vowels.data
-GLYPHS = utils.glyphs(data)
+# The tables below are only built when they are first used (by load())
+TABLES = ("data", "GLYPHS")
+
+def load():
+    """Build the tables, unless they have been already"""
+    global data, GLYPHS
+    if "GLYPHS" in globals():
+        return
+
+    # Concatenate the consonants and vowels data
+    data = consonants.data + vowels.data
+    GLYPHS = utils.glyphs(data)
+
+def __getattr__(name):
+    """Build the tables the first time one of them is used"""
+    if name in TABLES:
+        load()
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 # ============ Public Functions ============
 def isPhoneme(s):
@@ -15,6 +31,7 @@ def isPhoneme(s):
 def getGlyphsMatching(propertyName, propertyValue):
     """Returns a list of the glyphs of any producible phoneme that satisfies
     el[propertyName] == propertyValue"""
+    load()
     return utils.getGlyphsMatching(data, propertyName, propertyValue)
 
 class Phoneme:
@@ -1,6 +1,8 @@
 """A collection of helpful functions for manipulating lists of dicts
 representing IPA phonemes"""
 
+from collections.abc import Mapping
+
 # ============ Public Functions ============
 def unique(ls):
     """Return a list containing the unique elements of the input list. Note that
@@ -90,3 +92,25 @@ def getDataFromGlyph(dataSrc, glyph):
         if p["glyph"] == glyph:
             return p
     return None
+
+class LazyDict(Mapping):
+    """A read-only dict whose contents are only built (by calling build()) when
+    they are first used, e.g. LazyDict(lambda: metaclasses.DICT)"""
+
+    def __init__(self, build):
+        self.build = build
+        self.dict = None
+
+    def contents(self):
+        if self.dict is None:
+            self.dict = self.build()
+        return self.dict
+
+    def __getitem__(self, key):
+        return self.contents()[key]
+
+    def __iter__(self):
+        return iter(self.contents())
+
+    def __len__(self):
+        return len(self.contents())
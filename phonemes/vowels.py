@@ -79,53 +79,79 @@ CLBOX_HEADERS = {
 
 
 # ==== General Vowel Data ====
-
-data = ipa_json.readIPAFromJson("phonemes/vowels.json")
-GLYPHS = utils.glyphs(data)
-
-# Create dicts mapping all possible property values to the glyphs satisfying
-# those properties
-# E.g. {"voiced":    ["b", "d", ...],
-#       "voiceless": ["p", "t", ...], ...}"""
-HEIGHT_DICT             = utils.enumerateProperty(data, "height")
-HEIGHT_REGION_DICT      = utils.enumerateProperty(data, "height region")
-HEIGHT_OFFSET_DICT      = utils.enumerateProperty(data, "height offset")
-BACKNESS_DICT           = utils.enumerateProperty(data, "backness")
-BACKNESS_REGION_DICT    = utils.enumerateProperty(data, "backness region")
-ROUNDEDNESS_DICT        = utils.enumerateProperty(data, "roundedness")
-VOICING_DICT            = utils.enumerateProperty(data, "voicing")
-
-# Combine these dicts together
-# MAJOR BUG: CLASSES_DICT expects unique keys,
-# but is provided with non-unique keys (e.g. "low" is both a key in height, height region)
-# Which I believe leads to loss of data.
-# Must ensure that the "right" data is not lost
-# e.g. if two key/value pairs exist with a key of "low", one should be a superset of
-# the other -- we would like to keep the superset not the subset.
-# If I'm lucky then later keys will overwrite earlier ones, but this is not
-# something nice to rely on.
-CLASSES_DICT = {
-    **HEIGHT_DICT,
-    **HEIGHT_REGION_DICT,
-    **HEIGHT_OFFSET_DICT,
-    **BACKNESS_DICT,
-    **BACKNESS_REGION_DICT,
-    **ROUNDEDNESS_DICT,
-    **VOICING_DICT
-}
+# The tables below are only built when they are first used (by load()), so that
+# importing this module (and everything that imports it) stays cheap.
+TABLES = (
+    "data", "GLYPHS",
+    "HEIGHT_DICT", "HEIGHT_REGION_DICT", "HEIGHT_OFFSET_DICT",
+    "BACKNESS_DICT", "BACKNESS_REGION_DICT", "ROUNDEDNESS_DICT", "VOICING_DICT",
+    "CLASSES_DICT",
+)
+
+def load():
+    """Build the tables from vowels.json, unless they have been already"""
+    global data, GLYPHS, HEIGHT_DICT, HEIGHT_REGION_DICT, HEIGHT_OFFSET_DICT, \
+        BACKNESS_DICT, BACKNESS_REGION_DICT, ROUNDEDNESS_DICT, VOICING_DICT, CLASSES_DICT
+    if "CLASSES_DICT" in globals():
+        return
+
+    data = ipa_json.readIPAFromJson("phonemes/vowels.json")
+    GLYPHS = utils.glyphs(data)
+
+    # Create dicts mapping all possible property values to the glyphs satisfying
+    # those properties
+    # E.g. {"voiced":    ["b", "d", ...],
+    #       "voiceless": ["p", "t", ...], ...}"""
+    HEIGHT_DICT             = utils.enumerateProperty(data, "height")
+    HEIGHT_REGION_DICT      = utils.enumerateProperty(data, "height region")
+    HEIGHT_OFFSET_DICT      = utils.enumerateProperty(data, "height offset")
+    BACKNESS_DICT           = utils.enumerateProperty(data, "backness")
+    BACKNESS_REGION_DICT    = utils.enumerateProperty(data, "backness region")
+    ROUNDEDNESS_DICT        = utils.enumerateProperty(data, "roundedness")
+    VOICING_DICT            = utils.enumerateProperty(data, "voicing")
+
+    # Combine these dicts together (last, since it marks the tables as built)
+    # MAJOR BUG: CLASSES_DICT expects unique keys,
+    # but is provided with non-unique keys (e.g. "low" is both a key in height, height region)
+    # Which I believe leads to loss of data.
+    # Must ensure that the "right" data is not lost
+    # e.g. if two key/value pairs exist with a key of "low", one should be a superset of
+    # the other -- we would like to keep the superset not the subset.
+    # If I'm lucky then later keys will overwrite earlier ones, but this is not
+    # something nice to rely on.
+    CLASSES_DICT = {
+        **HEIGHT_DICT,
+        **HEIGHT_REGION_DICT,
+        **HEIGHT_OFFSET_DICT,
+        **BACKNESS_DICT,
+        **BACKNESS_REGION_DICT,
+        **ROUNDEDNESS_DICT,
+        **VOICING_DICT
+    }
+
+def __getattr__(name):
+    """Build the tables the first time one of them is used"""
+    if name in TABLES:
+        load()
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 def isVowel(s):
     """Returns true iff s is a vowel representable in this system"""
+    load()
     return s in GLYPHS
 
 def getGlyphsFromClass(className):
+    load()
     return utils.getGlyphsFromClass(data, CLASSES_DICT, className)
 
 def getGlyphsFromClasses(classList):
+    load()
     return utils.getGlyphsFromClasses(data, CLASSES_DICT, classList)
 
 def getGlyphsMatching(propertyName, propertyValue):
     """Finds a list of all phonemes from data such that the phoneme's
     property named propertyName has the value specified by propertyValue. Return
     a list of the glyphs of all matching phonemes"""
+    load()
     return utils.getGlyphsMatching(data, propertyName, propertyValue)
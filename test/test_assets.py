@@ -0,0 +1,38 @@
+import unittest
+
+from app import app, assets
+
+class TestHashedAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def testReferencedByHashedName(self):
+        with app.test_request_context():
+            url = assets.assetURL("js/selectors_const.js")
+        self.assertRegex(url, r"^/static/js/selectors_const\.[0-9a-f]{10}\.js$")
+        for page in ("/", "/survey"):
+            self.assertIn('src="%s"' % url, self.client.get(page).get_data(as_text=True))
+
+    def testCachedForAYear(self):
+        with app.test_request_context():
+            url = assets.assetURL("js/selectors_const.js")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("var SELECTORS_DICT=", response.get_data(as_text=True))
+        self.assertEqual(response.cache_control.max_age, assets.MAX_AGE)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertTrue(response.cache_control.public)
+        response.close()
+
+    def testUnhashedNotCachedForAYear(self):
+        response = self.client.get("/static/js/front.js")
+        self.assertNotEqual(response.cache_control.max_age, assets.MAX_AGE)
+        response.close()
+
+    def testUnknownAsset(self):
+        with app.test_request_context():
+            self.assertEqual(assets.assetURL("js/front.js"), "/static/js/front.js")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from bench import load, runner
+
+def results(**medians):
+    return {"results": {name: {"median": median} for name, median in medians.items()}}
+
+class TestBench(unittest.TestCase):
+
+    def testCompare(self):
+        baseline = results(a=1.0, b=1.0, c=1.0)
+        current = results(a=1.1, b=2.0, d=5.0)
+        self.assertEqual(runner.compare(current, baseline, tolerance=0.25), [("b", 1.0, 2.0)])
+        self.assertEqual(runner.compare(current, baseline, tolerance=1.5), [])
+
+    def testRun(self):
+        out = runner.run(["F25"], repeat=1, only="Bool.query", log=lambda *args: None)
+        self.assertEqual(list(out["results"]), ["Bool.query[F25]"])
+        self.assertEqual(out["results"]["Bool.query[F25]"]["runs"], 1)
+
+class TestLoad(unittest.TestCase):
+
+    def testPercentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(load.percentile(values, 50), 50)
+        self.assertEqual(load.percentile(values, 99), 99)
+        self.assertEqual(load.percentile([7], 95), 7)
+
+    def testRun(self):
+        results = load.run(load.InProcessClient, ["F25"], [1, 2], 4, log=lambda *args: None)
+        self.assertEqual([r["concurrency"] for r in results], [1, 2])
+        self.assertTrue(all(r["requests"] == 4 for r in results))
@@ -0,0 +1,73 @@
+import gzip
+import json
+import unittest
+
+from app import app, compression, responder
+from bench import payloads
+
+class TestCompression(unittest.TestCase):
+
+    def testNegotiate(self):
+        self.assertEqual(compression.negotiate("gzip, deflate"), compression.GZIP)
+        self.assertEqual(compression.negotiate("*"), compression.supportedEncodings()[0])
+        self.assertIsNone(compression.negotiate("gzip;q=0, identity"))
+        self.assertIsNone(compression.negotiate(""))
+        self.assertIsNone(compression.negotiate(None))
+
+    def testCompactHTML(self):
+        HTML = """
+        <div>
+            <!-- a comment -->
+            <b>bold</b>   text
+        </div>"""
+        self.assertEqual(responder.compactHTML(HTML), "<div> <b>bold</b> text </div>")
+
+    def testDumps(self):
+        obj = {"payload": "ünïcödé <b>", "data": [("p", 3), ("t", 2)]}
+        self.assertEqual(json.loads(responder.dumps(obj)), json.loads(json.dumps(obj)))
+        self.assertNotIn(" ", responder.dumps({"a": [1, 2]}))
+
+    def testQueryResponse(self):
+        client = app.test_client()
+        form = payloads.form(payloads.SAMPLE_PAYLOADS["two-queries"], "F25")
+
+        plain = client.post("/", data=form)
+        self.assertNotIn("Content-Encoding", plain.headers)
+
+        compressed = client.post("/", data=form, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed.headers["Vary"])
+        self.assertEqual(gzip.decompress(compressed.get_data()), plain.get_data())
+        self.assertLess(len(compressed.get_data()), len(plain.get_data()) / 2)
+
+    def testStaticFile(self):
+        client = app.test_client()
+        response = client.get("/static/js/front.js", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertTrue(response.headers["ETag"].endswith('-gzip"'))
+        with open("app/static/js/front.js", "rb") as f:
+            self.assertEqual(gzip.decompress(response.get_data()), f.read())
+        response.close()
+
+    def testStaticFileNotModified(self):
+        client = app.test_client()
+        gzipped = {"Accept-Encoding": "gzip"}
+        first = client.get("/static/js/front.js", headers=gzipped)
+        tag = first.headers["ETag"]
+        hits = compression.compressedFile.cache_info().hits
+
+        again = client.get("/static/js/front.js", headers=dict(gzipped, **{"If-None-Match": tag}))
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers["ETag"], tag)
+        self.assertEqual(again.get_data(), b"")
+
+        # A changed copy is sent again, compressed from the cache
+        stale = client.get("/static/js/front.js", headers=dict(gzipped, **{"If-None-Match": '"stale"'}))
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.get_data(), first.get_data())
+        self.assertEqual(compression.compressedFile.cache_info().hits, hits + 1)
+        for response in (first, again, stale):
+            response.close()
+
+if __name__ == '__main__':
+    unittest.main()
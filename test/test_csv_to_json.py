@@ -0,0 +1,64 @@
+import csv
+import json
+import logging
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from data import const, csv_to_json
+
+class TestCSVToJSON(unittest.TestCase):
+
+    def setUp(self):
+        # Real survey answers don't always fuzzy match; that's expected here
+        logger = logging.getLogger('csv_to_json')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.ERROR)
+
+    def testFromSemester(self):
+        # The committed JSON was converted from the committed CSVs
+        dataset = csv_to_json.Dataset.from_semester("F25")
+        with open("data/datasets/F25/F25.json", "r", encoding="utf-8") as f:
+            self.assertEqual(json.loads(json.dumps(dataset.languages)), json.load(f))
+
+    def testReadRowsSkipsHeader(self):
+        path = csv_to_json.get_path("F25", const.Surveys.GRAMMAR.value)
+        rows = csv_to_json.read_csv_rows(path)
+        self.assertFalse(hasattr(rows, "__len__"))
+        with open(path, newline="", encoding="utf-8") as f:
+            self.assertEqual(list(rows), list(csv.reader(f))[1:])
+
+    def testAnonymize(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = pathlib.Path(tmp)
+            (root / "F25").mkdir()
+            header = ["time", "netid", "name", "language"]
+            rows = [["1", "abc123", "Some One", "Zulu"], ["2", "def456", "  some one ", "Xhosa"]]
+            with open(root / "F25" / "unanon-grammar.csv", "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows([header] + rows)
+
+            with mock.patch.object(csv_to_json, "DATASET_PATH", root):
+                csv_to_json.anonymize_semester_data("F25")
+
+            self.assertEqual(sorted(p.name for p in (root / "F25").iterdir()),
+                             ["anon-grammar.csv", "unanon-grammar.csv"])
+            with open(root / "F25" / "anon-grammar.csv", newline="", encoding="utf-8") as f:
+                anon = list(csv.reader(f))
+        self.assertEqual(anon[0], header)
+        self.assertEqual(anon[1], ["1", csv_to_json.str_hash("abc123"), csv_to_json.str_hash("Some One"), "Zulu"])
+        # Names are normalized before hashing
+        self.assertEqual(anon[1][const.NAME], anon[2][const.NAME])
+
+    def testStrHash(self):
+        # Existing anon CSVs were hashed with these values; they mustn't change
+        self.assertEqual(csv_to_json.str_hash("abc123"), "f58fa3df820114f5")
+        self.assertEqual(csv_to_json.str_hash(" Café "), "165e78c4a92670ee")
+        self.assertEqual(csv_to_json.str_hash("ABC123 "), csv_to_json.str_hash("abc123"))
+
+        hits = csv_to_json.str_hash.cache_info().hits
+        csv_to_json.str_hash("abc123")
+        self.assertEqual(csv_to_json.str_hash.cache_info().hits, hits + 1)
+
+if __name__ == '__main__':
+    unittest.main()
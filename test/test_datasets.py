@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from data import datasets
+
+def writeDatabase(path, languages):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"_default": {str(i): lg for i, lg in enumerate(languages, 1)}}, f)
+
+class TestReload(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.mkdir(os.path.join(tmp.name, "Reload"))
+        self.path = os.path.join(tmp.name, "Reload", "Reload.db")
+        writeDatabase(self.path, [{"name": "a"}])
+
+        # Point data.datasets at a private dataset, with reloading done by hand
+        for name, value in [("DATASET_PATH", os.path.join(tmp.name, "{0}", "{1}")),
+                            ("datasetNames", ["Reload"]),
+                            ("loaded", {}),
+                            ("loadListeners", []),
+                            ("reloadListeners", []),
+                            ("RELOAD_INTERVAL", 0)]:
+            patcher = mock.patch.object(datasets, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def testReload(self):
+        reloads = []
+        datasets.addReloadListener(lambda name, seconds, error: reloads.append((name, error)))
+
+        old = datasets.getDatabase("Reload")
+        self.assertEqual(len(old), 1)
+
+        # Nothing has changed yet
+        self.assertEqual(datasets.reloadChangedDatasets(), [])
+
+        writeDatabase(self.path, [{"name": "a"}, {"name": "b"}])
+        self.assertEqual(datasets.reloadChangedDatasets(), ["Reload"])
+        self.assertEqual(reloads, [("Reload", None)])
+
+        # The new version is swapped in, but the old one still works
+        self.assertEqual(len(datasets.getDatabase("Reload")), 2)
+        self.assertEqual(len(old), 1)
+
+    def testBrokenFile(self):
+        reloads = []
+        datasets.addReloadListener(lambda name, seconds, error: reloads.append((name, error)))
+
+        datasets.getDatabase("Reload")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"_default": {"1": ')
+
+        # A half-written file is not swapped in
+        self.assertEqual(datasets.reloadChangedDatasets(), [])
+        self.assertIsInstance(reloads[0][1], ValueError)
+        self.assertEqual(len(datasets.getDatabase("Reload")), 1)
+
+    def testUnknownDataset(self):
+        with self.assertRaises(KeyError):
+            datasets.getDatabase("_nonexistent")
+
+class TestLoading(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(datasets, "loaded", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testSingleLoad(self):
+        loads = []
+        with mock.patch.object(datasets, "loadListeners", [loads.append]):
+            languages = datasets.getDataset("F25")
+            db = datasets.getDatabase("F25")
+
+        # Both APIs share one load of one dataset
+        self.assertEqual([d.name for d in loads], ["F25"])
+        self.assertEqual(list(datasets.loaded), ["F25"])
+        self.assertEqual(languages, datasets.readDataset("F25"))
+        self.assertEqual(db.all(), languages)
+        self.assertGreater(loads[0].size, 0)
+
+    def testTestDatasets(self):
+        self.assertTrue(datasets.isTestDataset("_test"))
+        self.assertTrue(datasets.isTestDataset("S19test"))
+        self.assertFalse(datasets.isTestDataset("_syn10k"))
+        self.assertFalse(datasets.isTestDataset("F25"))
+
+        with mock.patch.object(datasets, "TEST_DATASETS_ENABLED", False):
+            with self.assertRaises(KeyError):
+                datasets.getDataset("_test")
+
+        with mock.patch.object(datasets, "TEST_DATASETS_ENABLED", True):
+            self.assertEqual(len(datasets.getDataset("_test2")), 1)
@@ -0,0 +1,84 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+import gen
+from gen import allgen, splice
+
+class TestSplice(unittest.TestCase):
+
+    def testSplice(self):
+        template = "a\n  START\n  old\n  END\nb\n"
+        self.assertEqual(splice.splice(template, "x\ny\n", "START", "END"),
+                         "a\n  START\n  x\n  y\n  END\nb\n")
+
+class TestGenerate(unittest.TestCase):
+
+    def testNoStdout(self):
+        stdout, sys.stdout = sys.stdout, io.StringIO()
+        try:
+            html = allgen.generate()
+            printed = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(printed, "")
+        self.assertIn('id="popover-templates"', html)
+
+    def testTprintOutsideCapture(self):
+        with self.assertRaises(RuntimeError):
+            allgen.tprint("<br>")
+
+    def testUnchangedNotWritten(self):
+        # The generated files are committed, so rebuilding writes nothing
+        outputs = [output for _, output in splice.TEMPLATES] + [splice.CONTENT]
+        mtimes = [os.stat(path).st_mtime_ns for path in outputs]
+        self.assertEqual(gen.build(), [])
+        self.assertEqual([os.stat(path).st_mtime_ns for path in outputs], mtimes)
+
+    def testWriteIfChanged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.html")
+            self.assertTrue(allgen.writeifchanged(path, "<p>ö</p>\n"))
+            self.assertFalse(allgen.writeifchanged(path, "<p>ö</p>\n"))
+            self.assertTrue(allgen.writeifchanged(path, "<p>o</p>\n"))
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "<p>o</p>\n")
+
+    def testConcurrentWrites(self):
+        # Concurrent builds write the same files; none may fail or see a
+        # partial file
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.html")
+            contents = ["<p>%d</p>\n" % i * 10000 for i in range(8)]
+            errors = []
+            def write(content):
+                try:
+                    for _ in range(20):
+                        allgen.writeifchanged(path, content)
+                except Exception as err:
+                    errors.append(err)
+            threads = [threading.Thread(target=write, args=(c,)) for c in contents]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertIn(f.read(), contents)
+            self.assertEqual(os.listdir(tmp), ["out.html"])
+
+            allgen.removeifexists(path)
+            allgen.removeifexists(path)
+            self.assertFalse(os.path.exists(path))
+
+    def testConcurrentBuilds(self):
+        code = "import gen; gen.build()"
+        processes = [subprocess.Popen([sys.executable, "-c", code]) for _ in range(4)]
+        self.assertEqual([p.wait() for p in processes], [0] * 4)
+
+if __name__ == '__main__':
+    unittest.main()
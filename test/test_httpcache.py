@@ -0,0 +1,164 @@
+import base64
+import json
+import unittest
+from unittest import mock
+
+from app import app, httpcache, responder
+
+payload = [{"mode": "at least", "k": "2", "selList": ["p", "t", "k"],
+            "trait": "ipa-consonant-selector", "reply": "contain at least 2 of p, t, k"}]
+
+class TestTokens(unittest.TestCase):
+
+    def testRoundTrip(self):
+        token = httpcache.encodeToken("F25", payload)
+        form, canonical = httpcache.decodeToken(token)
+        self.assertEqual(canonical, token)
+        self.assertEqual(form["dataset"], "F25")
+        self.assertEqual(json.loads(form["payload"]), payload)
+        self.assertEqual(httpcache.tokenFromForm(form), token)
+
+    def testCanonical(self):
+        # Key order and whitespace don't matter
+        data = json.dumps({"payload": payload, "dataset": "F25"}, indent=2)
+        token = base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        form, canonical = httpcache.decodeToken(token)
+        self.assertNotEqual(canonical, token)
+        self.assertEqual(canonical, httpcache.encodeToken("F25", payload))
+
+    def testMalformed(self):
+        for token in ["!!!", "bm90IGpzb24", httpcache.encodeToken("F25", "not a list")[:-4]]:
+            with self.assertRaises(ValueError):
+                httpcache.decodeToken(token)
+
+    def testMaxAge(self):
+        self.assertEqual(httpcache.maxAge("public, max-age=60"), 60)
+        self.assertIsNone(httpcache.maxAge("max-age=60"))
+        self.assertIsNone(httpcache.maxAge("public, no-store, max-age=60"))
+
+    def testEtagRenderVersion(self):
+        token = httpcache.encodeToken("F25", payload)
+        tag = httpcache.etag("v1", token)
+        self.assertEqual(httpcache.etag("v1", token), tag)
+        self.assertNotEqual(httpcache.etag("v2", token), tag)
+
+        # A deploy that changes how responses are rendered changes every tag
+        self.addCleanup(httpcache.renderVersion.cache_clear)
+        httpcache.renderVersion.cache_clear()
+        with mock.patch.object(responder, "PAGE_SIZE", responder.PAGE_SIZE + 1):
+            self.assertNotEqual(httpcache.etag("v1", token), tag)
+        httpcache.renderVersion.cache_clear()
+        with mock.patch.object(httpcache, "RENDER_VERSION", httpcache.RENDER_VERSION + 1):
+            self.assertNotEqual(httpcache.etag("v1", token), tag)
+
+class TestRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        self.url = httpcache.queryURL(httpcache.encodeToken("F25", payload))
+
+    def testGet(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.get_data(as_text=True))["code"], "info")
+        self.assertTrue(response.headers["ETag"])
+        self.assertIn("public", response.headers["Cache-Control"])
+
+        # Same results as a POST
+        post = self.client.post("/", data={"payload": json.dumps(payload), "dataset": "F25"})
+        self.assertEqual(post.get_data(), response.get_data())
+
+        # Revalidation
+        again = self.client.get(self.url, headers={"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers["ETag"], response.headers["ETag"])
+
+    def testMatchesPages(self):
+        self.addCleanup(setattr, responder, "PAGE_SIZE", responder.PAGE_SIZE)
+        responder.PAGE_SIZE = 10
+        token = httpcache.encodeToken("F25", payload)
+        html = json.loads(self.client.get(httpcache.queryURL(token)).get_data(as_text=True))["payload"]
+        self.assertEqual(html.count("<tr>"), 10)
+        url = httpcache.matchesURL(token, 0, 10)
+        self.assertIn('data-url="%s"' % url, html)
+
+        rows = 10
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("public", response.headers["Cache-Control"])
+            page = response.get_json()
+            rows += page["rows"].count("<tr>")
+            url = page["next"]
+        self.assertGreater(rows, 10)
+
+        # A page size chosen by the client carries over to the next pages
+        url, limitedRows = httpcache.matchesURL(token, 0, 10, 7), 10
+        while url:
+            self.assertIn("&limit=7", url)
+            page = self.client.get(url).get_json()
+            self.assertLessEqual(page["rows"].count("<tr>"), 7)
+            limitedRows += page["rows"].count("<tr>")
+            url = page["next"]
+        self.assertEqual(limitedRows, rows)
+
+        self.assertEqual(self.client.get(httpcache.matchesURL(token, 5, 0)).status_code, 400)
+        self.assertEqual(self.client.get(httpcache.matchesURL(token, 0, 0) + "&limit=0").status_code, 400)
+
+    def testCompressedRevalidation(self):
+        response = self.client.get(self.url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        tag = response.headers["ETag"]
+        again = self.client.get(self.url, headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers["ETag"], tag)
+
+    def testRedirect(self):
+        data = json.dumps({"payload": payload, "dataset": "F25"}, indent=2)
+        token = base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        response = self.client.get(httpcache.queryURL(token))
+        self.assertEqual(response.status_code, 301)
+        self.assertTrue(response.headers["Location"].endswith(self.url))
+
+    def testErrors(self):
+        self.assertEqual(self.client.get("/q/!!!").status_code, 400)
+        unknown = httpcache.queryURL(httpcache.encodeToken("nonexistent", payload))
+        self.assertEqual(self.client.get(unknown).status_code, 404)
+
+class TestCachingMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        self.now = 0
+        self.middleware = httpcache.CachingMiddleware(self.app, clock=lambda: self.now)
+
+    def app(self, environ, startResponse):
+        self.calls += 1
+        startResponse("200 OK", [("ETag", '"abc"'), ("Cache-Control", "public, max-age=10")])
+        return [b"body %d" % self.calls]
+
+    def get(self, path, **headers):
+        environ = {"REQUEST_METHOD": "GET", "PATH_INFO": path}
+        environ.update(headers)
+        statuses = []
+        body = b"".join(self.middleware(environ, lambda status, headers: statuses.append(status)))
+        return statuses[0], body
+
+    def testCaching(self):
+        self.assertEqual(self.get("/q/x"), ("200 OK", b"body 1"))
+        self.assertEqual(self.get("/q/x"), ("200 OK", b"body 1"))
+        self.assertEqual(self.get("/q/x", HTTP_IF_NONE_MATCH='"abc"'), ("304 Not Modified", b""))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.middleware.hits, 2)
+
+        # Other paths aren't cached
+        self.get("/")
+        self.get("/")
+        self.assertEqual(self.calls, 3)
+
+        # Expired
+        self.now = 11
+        self.assertEqual(self.get("/q/x"), ("200 OK", b"body 4"))
+
+if __name__ == '__main__':
+    unittest.main()
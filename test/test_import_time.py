@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# The repo's own top-level packages
+PACKAGES = ("app", "data", "gen", "phonemes")
+
+# How long (in ms) importing app may spend in the repo's own modules, excluding
+# third party ones like flask. Generous, so that slow machines don't fail it;
+# set LINGDB_IMPORT_BUDGET_MS to tighten or loosen it.
+BUDGET_MS = float(os.environ.get("LINGDB_IMPORT_BUDGET_MS", 250))
+
+def importTimes(code):
+    """Run code in a fresh interpreter with -X importtime, and return the time
+    spent importing each module (excluding its own imports), in ms."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        selfTime, _, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(selfTime) / 1000
+    return times
+
+class TestImportTime(unittest.TestCase):
+
+    def testBudget(self):
+        code = "import app"
+        # The first run may compile .pyc files, which isn't representative
+        importTimes(code)
+        times = importTimes(code)
+        own = {m: t for m, t in times.items() if m.split(".")[0] in PACKAGES}
+        self.assertIn("app.routes", own)
+
+        total = sum(own.values())
+        slowest = sorted(own.items(), key=lambda item: -item[1])[:5]
+        self.assertLess(total, BUDGET_MS, "slowest imports: %s" % slowest)
+
+    def testPhonemeTablesLazy(self):
+        code = ("import sys, app\n"
+                "from phonemes import consonants, vowels, metaclasses, phonemes\n"
+                "for module in (consonants, vowels, metaclasses, phonemes):\n"
+                "    assert not any(t in vars(module) for t in module.TABLES), module\n")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def testPhonemeTables(self):
+        from phonemes import consonants, metaclasses
+        import phonemes
+        self.assertIn("p", consonants.GLYPHS)
+        self.assertIn("p", phonemes.GLYPHS)
+        self.assertTrue(phonemes.isPhoneme("a"))
+        self.assertEqual(sorted(metaclasses.DICT["voiced"]), metaclasses.DICT["voiced"])
+        with self.assertRaises(AttributeError):
+            consonants.NOT_A_TABLE
+
+if __name__ == '__main__':
+    unittest.main()
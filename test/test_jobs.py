@@ -0,0 +1,148 @@
+import json
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import app, jobs, querier
+
+payload = json.dumps([{"mode": "at least", "k": "2", "selList": ["p", "t", "k"],
+                       "trait": "ipa-consonant-selector", "reply": "contain at least 2 of p, t, k"}])
+
+def waitFor(jobId, timeout=60):
+    """Poll for the job until it ends, and return it."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get(jobId)
+        if job["state"] in (jobs.DONE, jobs.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job %s didn't finish" % jobId)
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(jobs, "DATABASE_PATH", os.path.join(tmp.name, "jobs.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(jobs.shutdown)
+        patcher = mock.patch.object(jobs, "SUBMIT_ENABLED", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.params = {"payload": payload, "datasets": ["F24", "F25"]}
+
+    def testSemesters(self):
+        job = waitFor(jobs.submit("semesters", self.params)["id"])
+        self.assertEqual(job["state"], jobs.DONE)
+        self.assertEqual(job["progress"], 1)
+        self.assertEqual(list(job["result"]), ["F24", "F25"])
+
+        form = {"payload": payload, "dataset": "F25"}
+        results = querier.handleQueries(querier.queriesFromForm(form), querier.dbFromForm(form))
+        self.assertEqual(job["result"]["F25"]["matches"], [len(results[0])])
+        self.assertEqual(job["result"]["F25"]["graphData"], json.loads(json.dumps(querier.graphData(results[0]))))
+
+    def testPairs(self):
+        queries = json.loads(payload) + [{"trait": "tone-selector", "sel": True}]
+        params = {"payload": json.dumps(queries), "datasets": ["F25"]}
+        job = waitFor(jobs.submit("pairs", params)["id"])
+        self.assertEqual(job["state"], jobs.DONE, job.get("error"))
+        result = job["result"]["F25"]
+        self.assertEqual(result["noQuorum"], [])
+        pair, = result["pairs"]
+        self.assertEqual((pair["a"], pair["b"]), (0, 1))
+        self.assertEqual(sum(pair["table"]), result["languages"])
+
+    def testNotRepeated(self):
+        first = jobs.submit("semesters", self.params)
+        self.assertEqual(jobs.submit("semesters", dict(self.params))["id"], first["id"])
+        finished = waitFor(first["id"])
+
+        with mock.patch.object(jobs, "schedule", side_effect=AssertionError("rerun")):
+            again = jobs.submit("semesters", self.params)
+        self.assertEqual(again, finished)
+
+    def testInvalid(self):
+        invalid = [
+            ("nonsense", self.params),
+            ("semesters", {"payload": payload, "datasets": ["X99"]}),
+            ("semesters", {"payload": payload, "datasets": [1]}),
+            ("semesters", {"datasets": ["F25"]}),
+            ("semesters", {"payload": json.loads(payload)}),
+            # Unknown params would make otherwise identical jobs distinct
+            ("semesters", dict(self.params, x="1")),
+            # Payloads are checked before they are queued
+            ("semesters", {"payload": "[{}]"}),
+            ("semesters", {"payload": "[]"}),
+            ("pairs", {"payload": "not json"}),
+        ]
+        for analysisName, params in invalid:
+            with self.assertRaises(ValueError, msg=params):
+                jobs.submit(analysisName, params)
+        conn = jobs.connect()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 0)
+        conn.close()
+
+    def testFailed(self):
+        # e.g. a job queued by an older version, before payloads were checked
+        conn = jobs.connect()
+        conn.execute("INSERT INTO jobs (id, analysis, params, state, submitted) VALUES (?, ?, ?, ?, ?)",
+                     ("bad", "semesters", json.dumps({"payload": "[{}]", "datasets": ["F25"]}),
+                      jobs.QUEUED, time.time()))
+        conn.close()
+        jobs.schedule("bad")
+        job = waitFor("bad")
+        self.assertEqual(job["state"], jobs.FAILED)
+        self.assertIn("Error", job["error"])
+
+    def testExpired(self):
+        job = waitFor(jobs.submit("semesters", self.params)["id"])
+        conn = jobs.connect()
+        conn.execute("UPDATE jobs SET finished = ? WHERE id = ?", (time.time() - jobs.TTL - 1, job["id"]))
+        conn.close()
+
+        other = jobs.submit("semesters", dict(self.params, datasets=["F25"]))
+        self.assertIsNone(jobs.get(job["id"]))
+        self.assertIsNotNone(jobs.get(other["id"]))
+
+    def testInterruptedJobRestarted(self):
+        job = jobs.submit("semesters", self.params)
+        waitFor(job["id"])
+        # Pretend the job was cut short by its worker dying
+        dead = subprocess.Popen(["true"])
+        dead.wait()
+        conn = jobs.connect()
+        conn.execute("UPDATE jobs SET state = ?, pid = ?, result = NULL WHERE id = ?",
+                     (jobs.RUNNING, dead.pid, job["id"]))
+        conn.close()
+
+        self.assertEqual(waitFor(job["id"])["state"], jobs.DONE)
+
+    def testRoutes(self):
+        client = app.test_client()
+        response = client.post("/jobs", json={"analysis": "semesters", "params": self.params})
+        self.assertIn(response.status_code, (200, 202))
+        job = response.get_json()
+        self.assertEqual(response.headers["Location"], "/jobs/%s" % job["id"])
+
+        events = client.get("/jobs/%s/events" % job["id"]).get_data(as_text=True)
+        last = json.loads(events.strip().split("\n\n")[-1][len("data: "):])
+        self.assertEqual(last["state"], jobs.DONE)
+        self.assertEqual(client.get("/jobs/%s" % job["id"]).get_json(), last)
+
+        self.assertEqual(client.get("/jobs/nonsense").status_code, 404)
+        self.assertEqual(client.post("/jobs", json={"analysis": "nonsense"}).status_code, 400)
+        self.assertEqual(client.post("/jobs", data="not json").status_code, 400)
+
+        with mock.patch.object(jobs, "SUBMIT_ENABLED", False):
+            response = client.post("/jobs", json={"analysis": "semesters", "params": self.params})
+            self.assertEqual(response.status_code, 404)
+        # Existing jobs can still be polled
+        self.assertEqual(client.get("/jobs/%s" % job["id"]).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import unittest
+from unittest import mock
+
+from app import app, httpcache, memory
+from data import datasets
+
+payload = [{"mode": "at least", "k": "2", "selList": ["p", "t", "k"],
+            "trait": "ipa-consonant-selector", "reply": "contain at least 2 of p, t, k"}]
+
+class TestSizer(unittest.TestCase):
+
+    def testSharedCountedOnce(self):
+        sizer = memory.Sizer()
+        shared = ["x" * 100]
+        first = sizer.size({"a": shared})
+        self.assertGreater(first, sys.getsizeof(shared[0]))
+        self.assertEqual(sizer.size(shared), 0)
+
+    def testDuplicateStrings(self):
+        sizer = memory.Sizer()
+        a, b = "".join(["ab"] * 50), "".join(["ab"] * 50)
+        self.assertIsNot(a, b)
+        sizer.size([a, b, a])
+        report = sizer.stringReport()
+        self.assertEqual((report["count"], report["distinct"]), (2, 1))
+        self.assertEqual(report["duplicateBytes"], sys.getsizeof(b))
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        datasets.getLoadedDataset("F25")
+
+    def testDatasetReport(self):
+        report = memory.report()["datasets"]["F25"]
+        for part in ("languages", "database", "wrappers"):
+            self.assertGreater(report[part], 0, part)
+        self.assertGreaterEqual(report["total"], report["languages"] + report["database"])
+        self.assertLessEqual(report["strings"]["distinct"], report["strings"]["count"])
+
+    def testEndpointDisabled(self):
+        with mock.patch.object(memory, "ENABLED", False):
+            self.assertEqual(self.client.get("/admin/memory").status_code, 404)
+
+    def testEndpoint(self):
+        with mock.patch.object(memory, "ENABLED", True):
+            report = self.client.get("/admin/memory").get_json()
+            self.assertIn("F25", report["datasets"])
+
+            token = httpcache.encodeToken("F25", payload)
+            allocations = self.client.get("/admin/memory?query=" + token).get_json()
+            self.assertEqual(allocations["query"], httpcache.queryURL(token))
+            self.assertLessEqual(len(allocations["lines"]), memory.TOP_ALLOCATIONS)
+            self.assertEqual(self.client.get("/admin/memory?query=!!").status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from app import metrics
+
+class TestMetrics(unittest.TestCase):
+
+    def testCounter(self):
+        c = metrics.Counter("test_counter_total", "A test counter.", ["status"])
+        c.inc(status="info")
+        c.inc(2, status="info")
+        self.assertEqual(c.get(status="info"), 3)
+        self.assertIn('test_counter_total{status="info"} 3', c.render())
+
+        # Unknown labels are an error
+        with self.assertRaises(ValueError):
+            c.inc(phase="parse")
+
+    def testGauge(self):
+        g = metrics.Gauge("test_bytes", "A test gauge.", ["dataset"])
+        g.set(10, dataset="F25")
+        g.set(4, dataset="F25")
+        self.assertEqual(g.get(dataset="F25"), 4)
+        self.assertIn('test_bytes{dataset="F25"} 4', g.render())
+
+    def testHistogram(self):
+        h = metrics.Histogram("test_seconds", "A test histogram.", buckets=(0.1, 1))
+        h.observe(0.05)
+        h.observe(0.5)
+        h.observe(5)
+        lines = h.render()
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count 3', lines)
+
+    def testRequestTimer(self):
+        timer = metrics.RequestTimer()
+        with timer.phase(metrics.PARSE):
+            pass
+        with timer.phase(metrics.SEARCH):
+            pass
+        with timer.phase(metrics.SEARCH):
+            pass
+        self.assertEqual(set(timer.phases), {metrics.PARSE, metrics.SEARCH})
+        self.assertIn("parse;dur=", timer.serverTiming())
+
+if __name__ == '__main__':
+    unittest.main()
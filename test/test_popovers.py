@@ -0,0 +1,28 @@
+import json
+import unittest
+
+from app import app
+
+class TestPopoverFragments(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        with open("app/static/popovers/manifest.json", "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+    def testFragments(self):
+        self.assertTrue(self.manifest)
+        for prefix, url in self.manifest.items():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('id="%s-template"' % prefix, response.get_data(as_text=True))
+            response.close()
+
+    def testNotInlined(self):
+        front = self.client.get("/").get_data(as_text=True)
+        self.assertIn('id="popover-templates"', front)
+        for prefix in self.manifest:
+            self.assertNotIn('id="%s-template"' % prefix, front)
+
+if __name__ == '__main__':
+    unittest.main()
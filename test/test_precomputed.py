@@ -0,0 +1,82 @@
+import json
+import random
+import unittest
+from unittest import mock
+
+from app import precomputed, querier, query
+from data import datasets
+from gen import resultgen
+
+def summarize(matches):
+    """The languages and causes of matches, with list causes in a canonical order."""
+    return [(m.language.data, sorted(m.cause) if isinstance(m.cause, list) else m.cause)
+            for m in matches]
+
+class TestPrecomputed(unittest.TestCase):
+
+    def setUp(self):
+        self.db = datasets.getDatabase("F25")
+        self.queries = resultgen.allQueries(datasets.getDataset("F25"))
+
+    def testMask(self):
+        for indices in [[], [0], [1, 5, 26], list(range(100))]:
+            self.assertEqual(precomputed.decodeMask(resultgen.encodeMask(indices)), indices)
+
+    def testSameAsLive(self):
+        rng = random.Random(0)
+        for q in rng.sample(self.queries, 300):
+            found = precomputed.lookup(q, "F25", self.db)
+            self.assertIsNotNone(found, q.canonical())
+            matches, hasQuorum = found
+            try:
+                live = querier.handleQuery(q, self.db)
+            except querier.QuorumError:
+                self.assertFalse(hasQuorum)
+                continue
+            self.assertTrue(hasQuorum)
+            self.assertEqual(summarize(matches), summarize(live), q.canonical())
+
+    def testHandleQueries(self):
+        q = next(q for q in self.queries if precomputed.lookup(q, "F25", self.db)[1])
+        with mock.patch.object(type(q), "query", side_effect=AssertionError("evaluated")):
+            results = querier.handleQueries([q], self.db, dataset="F25")
+        self.assertIs(results[0].query, q)
+
+    def testAllMode(self):
+        # The frontend sends "all" with k = len(selList)
+        queryData = {"trait": "ipa-consonant-selector", "mode": "all", "k": "1", "selList": ["p"],
+                     "reply": "have all of p"}
+        q, = querier.queriesFromForm({"payload": json.dumps([queryData])})
+        self.assertEqual(q.mode, query.ALL)
+        found = precomputed.lookup(q, "F25", self.db)
+        self.assertIsNotNone(found)
+        matches, hasQuorum = found
+        self.assertTrue(hasQuorum)
+        self.assertEqual(summarize(matches), summarize(querier.handleQuery(q, self.db)))
+
+    def testStale(self):
+        results = precomputed.getResults("F25")
+        with mock.patch.object(results, "version", "stale"):
+            self.assertIsNone(precomputed.lookup(self.queries[0], "F25", self.db))
+
+    def testSQLite(self):
+        sqlDB = datasets.getSQLDatabase("F25")
+        rng = random.Random(1)
+        with mock.patch.object(datasets, "ENGINE", "sqlite"), mock.patch.dict(datasets.loaded, clear=True):
+            for q in rng.sample(self.queries, 100):
+                found = precomputed.lookup(q, "F25", sqlDB)
+                self.assertIsNotNone(found, q.canonical())
+                matches, hasQuorum = found
+                if hasQuorum:
+                    live = querier.handleQuery(q, self.db)
+                    self.assertEqual(summarize(matches), summarize(live), q.canonical())
+                    self.assertEqual([m.language.data.doc_id for m in matches],
+                                     [m.language.data.doc_id for m in live])
+            # The TinyDB dataset was never loaded
+            self.assertEqual(datasets.loaded, {})
+
+    def testMissing(self):
+        self.assertIsNone(precomputed.getResults("_test"))
+
+if __name__ == '__main__':
+    unittest.main()
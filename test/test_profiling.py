@@ -0,0 +1,73 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from unittest import mock
+
+from app import app, httpcache, profiling
+
+payload = [{"mode": "at least", "k": "2", "selList": ["p", "t", "k"],
+            "trait": "ipa-consonant-selector", "reply": "contain at least 2 of p, t, k"}]
+form = {"dataset": "F25", "payload": json.dumps(payload)}
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def testDisabledByDefault(self):
+        with mock.patch.object(profiling, "PROFILE_DIR", None):
+            response = self.client.post("/", data=form, headers={profiling.HEADER: "1"})
+        self.assertNotIn(profiling.HEADER, response.headers)
+
+    def testProfiledOnRequest(self):
+        with mock.patch.object(profiling, "PROFILE_DIR", self.dir), \
+             mock.patch.object(profiling, "ADMIN", True):
+            self.assertNotIn(profiling.HEADER, self.client.post("/", data=form).headers)
+            response = self.client.post("/", data=form, headers={profiling.HEADER: "1"})
+        name = response.headers[profiling.HEADER]
+        self.assertEqual(sorted(os.listdir(self.dir)), [name[:-len(".pstats")] + ".json", name])
+
+        stats = pstats.Stats(os.path.join(self.dir, name))
+        self.assertTrue(any(func[2] == "handleQueries" for func in stats.stats))
+        with open(os.path.join(self.dir, name[:-len(".pstats")] + ".json")) as f:
+            info = json.load(f)
+        self.assertEqual(info["url"], httpcache.queryURL(httpcache.tokenFromForm(form)))
+        self.assertEqual(info["status"], "info")
+
+    def testUnauthorized(self):
+        with mock.patch.object(profiling, "PROFILE_DIR", self.dir):
+            response = self.client.post("/", data=form, headers={profiling.HEADER: "1"})
+            self.assertNotIn(profiling.HEADER, response.headers)
+            with mock.patch.object(profiling, "SECRET", "s3cret"), \
+                 mock.patch.object(profiling, "ADMIN", True):
+                response = self.client.post("/", data=form, headers={profiling.HEADER: "1"})
+                self.assertNotIn(profiling.HEADER, response.headers)
+                response = self.client.post("/", data=form, headers={profiling.HEADER: "s3cret"})
+                self.assertIn(profiling.HEADER, response.headers)
+        self.assertEqual(len(os.listdir(self.dir)), 2)
+
+    def testUniqueNamesNotCached(self):
+        url = httpcache.queryURL(httpcache.tokenFromForm(form))
+        with mock.patch.object(profiling, "PROFILE_DIR", self.dir), \
+             mock.patch.object(profiling, "SAMPLE_RATE", 1.0):
+            responses = [self.client.get(url) for _ in range(3)]
+        names = {response.headers[profiling.HEADER] for response in responses}
+        self.assertEqual(len(names), 3)
+        self.assertEqual(len(os.listdir(self.dir)), 6)
+        for response in responses:
+            self.assertIn("no-store", response.headers["Cache-Control"])
+            self.assertNotIn("public", response.headers["Cache-Control"])
+
+    def testSampled(self):
+        with mock.patch.object(profiling, "PROFILE_DIR", self.dir), \
+             mock.patch.object(profiling, "SAMPLE_RATE", 1.0):
+            response = self.client.post("/", data=form)
+        self.assertIn(profiling.HEADER, response.headers)
+
+if __name__ == '__main__':
+    unittest.main()
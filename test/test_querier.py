@@ -1,6 +1,12 @@
+import json
 import unittest
 
 from app import querier, query
+from data import datasets
+
+import tinydb
+
+Lang = tinydb.Query()
 
 payload = """[
     {
@@ -47,6 +53,53 @@ class TestQuery(unittest.TestCase):
         print(queries)
 
 
+class TestGraphData(unittest.TestCase):
+
+    def graphData(self, queryData, dataset="F25"):
+        form = {"dataset": dataset, "payload": json.dumps([queryData])}
+        q, = querier.queriesFromForm(form)
+        matches = querier.handleQuery(q, querier.dbFromForm(form))
+        data = querier.graphData(matches, dataset=dataset)
+        # Counting from the languages themselves gives the same result
+        self.assertEqual(data, querier.graphData(matches))
+        return matches, data
+
+    def testList(self):
+        matches, data = self.graphData({"trait": "ipa-consonant-selector", "mode": "at least",
+                                        "k": "1", "selList": ["p", "t", "k"]})
+        self.assertEqual({value for value, n in data}, {"p", "t", "k"})
+        for value, n in data:
+            self.assertEqual(n, sum(value in m.language.data["consonants"] for m in matches))
+        self.assertEqual([n for value, n in data], sorted((n for value, n in data), reverse=True))
+
+    def testNum(self):
+        matches, data = self.graphData({"trait": "phoneme-inventory-size-selector", "mode": "at least",
+                                        "k": "5", "sel": "vowels", "selList": ["vowels"]})
+        self.assertEqual(sum(n for value, n in data), len(matches))
+        self.assertEqual([value for value, n in data], sorted(value for value, n in data))
+
+    def testBool(self):
+        matches, data = self.graphData({"trait": "tone-selector"})
+        self.assertEqual(data[0], [True, len(matches)])
+        self.assertEqual(data[1][0], False)
+
+
+class TestDataMask(unittest.TestCase):
+
+    def testSameForEveryBackend(self):
+        db = datasets.getDatabase("F25")
+        sqlDB = datasets.getSQLDatabase("F25")
+        n = len(datasets.getDataset("F25"))
+        queries = querier.queriesFromForm({"payload": payload})
+        for q in queries + [query.Always()]:
+            mask = querier.dataMask(q, db, "F25")
+            self.assertEqual(querier.dataMask(q, db), mask, q)
+            self.assertEqual(querier.dataMask(q, sqlDB, numLanguages=n), mask, q)
+
+        self.assertIsNone(querier.dataMask(query.Always(), db, "F25"))
+        tone = querier.dataMask(queries[1], db, "F25")
+        self.assertEqual(bin(tone).count("1"), len(db.search(Lang["tone"].exists())))
+
 
 if __name__ == '__main__':
     unittest.main()
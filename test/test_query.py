@@ -1,3 +1,5 @@
+import copy
+import pickle
 import unittest
 
 from app import query
@@ -121,6 +123,18 @@ class TestQuery(unittest.TestCase):
         q = query.List("consonants", query.LT, 3, ["p", "t", "k"])
         self.queryHelper(q, [["k"], ["p", "t"]])
 
+    # "all" of ls (k is ignored; the frontend sends len(ls))
+    def testListAll(self):
+        q = query.List("consonants", query.ALL, 0, ["p", "t", "t"])
+        self.queryHelper(q, [["p", "t"], ["p", "t"]])
+
+    def testInvalidMode(self):
+        with self.assertRaises(query.InvalidModeError):
+            query.Num("num consonants", "about", 5)
+        with self.assertRaises(KeyError):
+            query.compareByMode("about", 1, 2)
+        self.assertTrue(query.compareByMode(query.GEQ, 2, 2))
+
     # Test meta-lists (concatenation of several single-property lists)
     def testMetalist1(self):
         q = query.List(["consonants", "vowels"], query.LT, 3, ["a", "e", "p", "b"])
@@ -136,6 +150,48 @@ class TestQuery(unittest.TestCase):
         results = q.query(testdb)
         self.assertEqual(results[0].language.name(), "French")
 
+    # Queries are immutable, hashable value objects
+    def testQueryEquality(self):
+        a = query.List("consonants", query.GT, 2, ["p", "t", "k"])
+        b = query.List("consonants", "More  Than", 2, ("k", "p", "t"))
+        self.assertEqual(a.key(), b.key())
+        self.assertEqual(a.digest(), b.digest())
+        self.assertNotEqual(a, query.List("consonants", query.GT, 1, ["p", "t", "k"]))
+        self.assertEqual(len({a, query.List("consonants", query.GT, 2, ["p", "t", "k"])}), 1)
+
+    def testQueryImmutable(self):
+        q = query.Num("num consonants", query.GT, 5)
+        with self.assertRaises(AttributeError):
+            q.k = 6
+        with self.assertRaises(AttributeError):
+            q.extra = True
+
+    def testQueryCopyPickle(self):
+        queries = [
+            query.List("consonants", query.ALL, 0, ["p", "t", "k"], desc="have all of {ls}"),
+            query.List(["consonants", "vowels"], query.GEQ, 1, ["a"]),
+            query.Num("num consonants", query.LT, 5),
+            query.String("country", query.NEQ, "Nigeria"),
+            query.Bool("stress", True),
+            query.Always(),
+        ]
+        for q in queries:
+            hash(q)
+            for copied in (pickle.loads(pickle.dumps(q)), copy.copy(q), copy.deepcopy(q)):
+                self.assertEqual(copied, q)
+                self.assertEqual(hash(copied), hash(q))
+                self.assertEqual(copied.desc(), q.desc())
+                self.assertEqual([(m.language.data, m.cause) for m in copied.query(testdb)],
+                                 [(m.language.data, m.cause) for m in q.query(testdb)])
+                with self.assertRaises(AttributeError):
+                    copied.descStr = "changed"
+
+    def testIntern(self):
+        a = query.intern(query.Bool("stress", True))
+        b = query.intern(query.Bool("stress", True))
+        self.assertIs(a, b)
+        self.assertIsNot(a, query.intern(query.Bool("stress", False)))
+
     def tearDown(self):
         testdb.close()
 
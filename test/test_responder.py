@@ -1,3 +1,4 @@
+import json
 import unittest
 
 from app import responder, query
@@ -63,6 +64,57 @@ class TestQuery(unittest.TestCase):
         # (checking for direct equality with a known HTML string would work,
         # but seems fragile)
 
+    def testCausesUnchanged(self):
+        q = query.List("consonants", query.GEQ, 1, ["p", "t"])
+        matches = q.query(testdb)
+        causes = [m.cause for m in matches]
+
+        HTML = responder.generateHTML([matches])
+        self.assertEqual([m.cause for m in matches], causes)
+        self.assertIn("/p/, /t/", HTML.replace("/t/, /p/", "/p/, /t/"))
+
+    def testTwoQueryStats(self):
+        a = query.Bool("stress", True).query(testdb)
+        b = query.Bool("tone", True).query(testdb)
+
+        HTML = responder.generateHTML([a, b])
+        self.assertIn("Fisher's exact test: p = 1,", HTML)
+        # Spanish has both, English only stress, French neither
+        self.assertIn("1 both, 1 only the first, 0 only the second, 1 neither", HTML)
+        self.assertIn("&phi; = 0.50, lift = 1.50", HTML)
+
+    def testTwoQueryStatsMissingData(self):
+        # Two more languages that didn't answer about tone: they match stress
+        # only because they have no data for tone, so they are left out
+        for name in ("German", "Dutch"):
+            testdb.insert({"name": name, "netid": "", "student": "", "stress": True})
+        a = query.Bool("stress", True).query(testdb)
+        b = query.Bool("tone", True).query(testdb)
+
+        HTML = responder.generateHTML([a, b])
+        self.assertIn("1 both, 1 only the first, 0 only the second, 1 neither", HTML)
+        self.assertIn("&phi; = 0.50, lift = 1.50", HTML)
+
+    def testPagination(self):
+        self.addCleanup(setattr, responder, "PAGE_SIZE", responder.PAGE_SIZE)
+        responder.PAGE_SIZE = 2
+        q = query.Num("num consonants", query.GT, 5)
+        matches = q.query(testdb)
+        pageURL = lambda i, cursor: "/matches/x?query=%d&cursor=%d" % (i, cursor)
+
+        HTML = responder.generateHTML([matches], pageURL=pageURL)
+        self.assertIn("English", HTML)
+        self.assertIn("French", HTML)
+        self.assertNotIn("Spanish", HTML)
+        self.assertIn('data-url="/matches/x?query=0&cursor=2"', HTML)
+
+        # Without a pageURL, every match is listed
+        self.assertIn("Spanish", responder.generateHTML([matches]))
+
+        page = json.loads(responder.matchesPage(matches, 2, 2, lambda cursor: "next"))
+        self.assertIn("Spanish", page["rows"])
+        self.assertIsNone(page["next"])
+
     def tearDown(self):
         testdb.close()
 
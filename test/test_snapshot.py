@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from data import datasets, snapshot
+
+languages = [
+    {"name": "A", "num vowels": 5, "tone": True, "country": "Peru",
+     "consonants": ["t", "p", "k"], "word order": ["SOV"]},
+    {"name": "B", "num vowels": -3, "tone": False,
+     "consonants": [], "word order": ["SVO", "free"], "weird": {"x": [1, 2]}},
+    {"name": "C", "country": "Chile", "consonants": ["m"], "recommend": "ünïcödé"},
+]
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "test.snap")
+        snapshot.write(self.path, languages)
+        self.snap = snapshot.Snapshot(self.path)
+
+    def testRoundTrip(self):
+        self.assertEqual(len(self.snap), 3)
+        rows = list(self.snap)
+        # Phonemes come back in canonical order
+        self.assertEqual(rows[0]["consonants"], ["p", "t", "k"])
+        rows[0]["consonants"] = languages[0]["consonants"]
+        self.assertEqual(rows, languages)
+
+    def testColumns(self):
+        self.assertEqual(self.snap.column("num vowels").kind, snapshot.INT)
+        self.assertEqual(self.snap.column("tone").kind, snapshot.BOOL)
+        self.assertEqual(self.snap.column("word order").kind, snapshot.LIST)
+        self.assertEqual(self.snap.column("weird").kind, snapshot.JSON)
+        self.assertEqual(list(self.snap.column("country")), ["Peru", None, "Chile"])
+
+    def testCounts(self):
+        rows = [0, 1, 2]
+        self.assertEqual(self.snap.column("num vowels").counts(rows), {5: 1, -3: 1})
+        self.assertEqual(self.snap.column("tone").counts(rows), {True: 1, False: 1})
+        self.assertEqual(self.snap.column("country").counts(rows), {"Peru": 1, "Chile": 1})
+        self.assertEqual(self.snap.column("word order").counts(rows), {"SOV": 1, "SVO": 1, "free": 1})
+        self.assertEqual(self.snap.column("consonants").counts(rows), {"p": 1, "t": 1, "k": 1, "m": 1})
+        self.assertEqual(self.snap.column("consonants").counts([0]), {"p": 1, "t": 1, "k": 1})
+
+    def testGlyphMasks(self):
+        consonants = self.snap.column("consonants")
+        self.assertEqual(consonants.kind, snapshot.GLYPHS)
+        mask = consonants.maskOf(["p", "k", "ʔ"])
+        self.assertEqual(consonants.glyphs(consonants.mask(0) & mask), ["p", "k"])
+        self.assertEqual(consonants.mask(1), 0)
+
+    def testNotASnapshot(self):
+        with open(self.path, "wb") as f:
+            f.write(b"{}" * 100)
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.Snapshot(self.path)
+
+    def testDatasetSnapshots(self):
+        for name in ["F17", "F25"]:
+            snap = datasets.getSnapshot(name)
+            data = datasets.readDataset(name)
+            self.assertEqual(len(snap), len(data))
+            self.assertEqual(snap.row(0)["name"], data[0]["name"])
+            self.assertEqual(sorted(snap.row(0)["consonants"]), sorted(data[0]["consonants"]))
@@ -0,0 +1,90 @@
+import os
+import random
+import tempfile
+import unittest
+
+import tinydb
+from tinydb.storages import MemoryStorage
+
+from app import querier, query, stats
+from bench import payloads
+from data import datasets, sqldb
+
+def summarize(matches):
+    """The names and causes of matches, with list causes in a canonical order."""
+    return [(m.language.data, sorted(m.cause) if isinstance(m.cause, list) else m.cause)
+            for m in matches]
+
+class TestSQLDatabase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        data = datasets.readDataset("F25")
+        path = os.path.join(cls.tmp.name, "F25.sqlite")
+        sqldb.write(path, data)
+        cls.sql = sqldb.Database(path)
+
+        cls.tiny = tinydb.TinyDB(storage=MemoryStorage)
+        cls.tiny.insert_multiple(data)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def assertSameResults(self, q):
+        sqlMatches, tinyMatches = q.query(self.sql), q.query(self.tiny)
+        self.assertEqual(summarize(sqlMatches), summarize(tinyMatches), q)
+        # Both know which rows matched (e.g. for stats and graph data)
+        self.assertIsNotNone(querier.matchedRows(sqlMatches), q)
+        self.assertEqual(querier.matchedRows(sqlMatches), querier.matchedRows(tinyMatches), q)
+
+    def testLen(self):
+        self.assertEqual(len(self.sql), len(self.tiny))
+        self.assertEqual(self.sql.all(), self.tiny.all())
+        self.assertEqual([doc.doc_id for doc in self.sql.all()], [doc.doc_id for doc in self.tiny.all()])
+
+    def testQueryTypes(self):
+        queries = [
+            query.List("consonants", query.GEQ, 2, ["p", "t", "k", "ʔ"]),
+            query.List("consonants", query.LEQ, 0, ["ɬ", "ʘ"]),
+            query.List("consonants", query.EQ, 1, ["m", "q"]),
+            query.List("consonants", query.ALL, 2, ["p", "t"]),
+            query.List("word order", query.GT, 0, ["SOV", "SVO"]),
+            query.List(("consonants", "vowels"), query.GEQ, 3, ["p", "a", "i", "ʔ"]),
+            query.Num("num consonants", query.GT, 20),
+            query.Num("num vowels", query.EQ, 5),
+            query.String("country", query.EQ, "India"),
+            query.Bool("tone", True),
+            query.Bool("tone", False),
+            query.Always(),
+            query.Never(),
+        ]
+        for q in queries:
+            self.assertSameResults(q)
+
+        n = len(self.sql)
+        results = [query.Always().query(self.sql), query.Bool("tone", True).query(self.sql)]
+        self.assertEqual(stats.fromResults(results, n),
+                         stats.fromResults([query.Always().query(self.tiny), query.Bool("tone", True).query(self.tiny)], n))
+
+    def testRandomQueries(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            request = payloads.FakeRequest([payloads.randomQuery(rng)], "F25")
+            for q in querier.queriesFromRequest(request):
+                self.assertSameResults(q)
+
+    def testQuorum(self):
+        for p in ["consonants", "tone", "nonexistent property"]:
+            self.assertEqual(self.sql.countWithProperty(p),
+                             len(self.tiny.search(tinydb.Query()[p].exists())))
+
+    def testGetSQLDatabase(self):
+        db = datasets.getSQLDatabase("F25")
+        self.assertIsInstance(db, sqldb.Database)
+        self.assertIs(datasets.getSQLDatabase("F25"), db)
+        self.assertEqual(len(db), len(self.tiny))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import math
+import random
+import unittest
+
+from app import stats
+
+def bruteFisher(table):
+    """Fisher's exact test, straight from its definition."""
+    a, b, c, d = table
+    n = a + b + c + d
+    row1, row2, col1 = a + b, c + d, a + c
+    prob = lambda x: math.comb(row1, x) * math.comb(row2, col1 - x) / math.comb(n, col1)
+    observed = prob(a)
+    xs = range(max(0, col1 - row2), min(row1, col1) + 1)
+    return min(1.0, sum(prob(x) for x in xs if prob(x) <= observed * (1 + 1e-7)))
+
+class TestStats(unittest.TestCase):
+
+    def testFisherKnownValues(self):
+        # As given by R's fisher.test
+        self.assertAlmostEqual(stats.fisher(stats.Table(3, 1, 1, 3)), 0.4857142857)
+        self.assertAlmostEqual(stats.fisher(stats.Table(10, 2, 3, 15)), 0.0005367241)
+        self.assertEqual(stats.fisher(stats.Table(0, 0, 0, 5)), 1.0)
+
+    def testFisherMatchesDefinition(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            table = stats.Table(*[rng.randint(0, rng.choice([3, 20, 150])) for _ in range(4)])
+            if sum(table) == 0:
+                continue
+            expected = bruteFisher(table)
+            self.assertAlmostEqual(stats.fisher(table) / expected, 1, places=9, msg=table)
+
+    def testPhiAndLift(self):
+        table = stats.Table(10, 2, 3, 15)
+        self.assertAlmostEqual(stats.phi(table), (150 - 6) / math.sqrt(12 * 18 * 13 * 17))
+        self.assertAlmostEqual(stats.lift(table), 10 * 30 / (12 * 13))
+        self.assertIsNone(stats.phi(stats.Table(0, 0, 3, 4)))
+        self.assertIsNone(stats.lift(stats.Table(0, 0, 3, 4)))
+
+    def testPairwise(self):
+        rng = random.Random(1)
+        n = 200
+        masks = [rng.getrandbits(n) for _ in range(6)]
+        pairs = list(stats.pairwise(masks, n))
+        self.assertEqual(len(pairs), 15)
+        for i, j, table, result in pairs:
+            both = bin(masks[i] & masks[j]).count("1")
+            expected = stats.fromCounts(bin(masks[i]).count("1"), bin(masks[j]).count("1"), both, n)
+            self.assertEqual(table, expected)
+            self.assertEqual(sum(table), n)
+            self.assertEqual(result, stats.compute(expected))
+
+    def testPairwiseMissingData(self):
+        rng = random.Random(2)
+        n = 200
+        masks = [rng.getrandbits(n) for _ in range(4)]
+        dataMasks = [rng.getrandbits(n) for _ in range(3)] + [None]
+        for i, j, table, result in stats.pairwise(masks, n, dataMasks):
+            known = (dataMasks[i] if dataMasks[i] is not None else (1 << n) - 1) & \
+                    (dataMasks[j] if dataMasks[j] is not None else (1 << n) - 1)
+            self.assertEqual(sum(table), bin(known).count("1"))
+            self.assertEqual(table.a, bin(masks[i] & masks[j] & known).count("1"))
+            self.assertEqual(table, stats.fromMasks(masks[i], masks[j], known))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from data import synthetic
+from data.const import JsonKey as K
+
+class TestSynthetic(unittest.TestCase):
+
+    def testDeterministic(self):
+        a = list(synthetic.LanguageGenerator(seed=1).languages(20))
+        b = list(synthetic.LanguageGenerator(seed=1).languages(20))
+        self.assertEqual(a, b)
+
+    def testLanguage(self):
+        for lang in synthetic.LanguageGenerator(seed=2).languages(50):
+            self.assertEqual(lang[K.NUM_CONSONANTS.value], len(lang[K.CONSONANTS.value]))
+            self.assertEqual(lang[K.NUM_PHONEMES.value],
+                             lang[K.NUM_CONSONANTS.value] + lang[K.NUM_VOWELS.value])
+            self.assertTrue(lang[K.VOWELS.value])
+            self.assertEqual(lang[K.STRESS.value],
+                             lang[K.PREDICTABLE_STRESS.value] or lang[K.UNPREDICTABLE_STRESS.value])
+
+    def testCorrelation(self):
+        gen = synthetic.LanguageGenerator(seed=3, correlation=1)
+        for lang in gen.languages(50):
+            cons = set(lang[K.CONSONANTS.value])
+            for c in cons:
+                if c in gen.counterparts:
+                    self.assertIn(gen.counterparts[c], cons)
+            if lang[K.WORD_ORDER.value][0] in synthetic.OV_ORDERS:
+                self.assertIn("head-final", lang[K.HEADEDNESS.value][0])
+
+    def testSize(self):
+        self.assertEqual(synthetic.parseSize("10k"), 10000)
+        self.assertEqual(synthetic.parseSize("1M"), 1000000)
+        self.assertEqual(synthetic.defaultName(10000), "_syn10k")
+        self.assertEqual(synthetic.defaultName(1500), "_syn1500")